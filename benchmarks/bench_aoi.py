@@ -0,0 +1,74 @@
+'''
+Benchmark: area-of-interest filtering
+
+Spreads N players over map.tmx and compares one broadcast tick
+without filtering (everyone gets everyone) against the AOI grid
+(everyone gets the 3x3 cells around them):
+- players delivered per tick (fan-out)
+- bytes sent per tick
+- server encode time per tick
+- client json.loads time per frame
+- python benchmarks/bench_aoi.py [players]
+'''
+import json
+import random
+import sys
+import timeit
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from server.playerHandler import PlayerHandler
+
+TILE_SIZE = 64
+
+
+def map_size(path: Path) -> tuple[int, int]:
+    root = ET.parse(path).getroot()
+    return int(root.get("width")) * TILE_SIZE, int(root.get("height")) * TILE_SIZE
+
+
+def best_of(func, repeat: int = 5) -> float:
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    width, height = map_size(ROOT / "assets" / "maps" / "map.tmx")
+    rng = random.Random(7)
+
+    handler = PlayerHandler()
+    pids = []
+    for _ in range(n):
+        pid = handler.register()
+        handler.update(pid, rng.uniform(0, width), rng.uniform(0, height), "map.tmx",
+                       rng.choice(["down", "up", "left", "right"]), rng.random() < 0.5)
+        pids.append(pid)
+
+    # Without filtering: one frame, every client receives it
+    full = handler.encode_players()
+    naive_encode = best_of(handler.encode_players)
+    naive_parse = best_of(lambda: json.loads(full))
+
+    # With the grid: one frame per distinct view
+    def encode_views() -> dict:
+        return handler.encode_views(handler.views_of(pids))
+
+    frames = encode_views()
+    per_client = [frames[view] for view in handler.views_of(pids)]
+    aoi_encode = best_of(encode_views)
+    aoi_parse = sum(best_of(lambda f=f: json.loads(f), 3) for f in frames.values()) / len(frames)
+    delivered = sum(len(json.loads(f)) for f in per_client)
+
+    print(f"players: {n} on map.tmx ({width}x{height} px), views: {len(frames)}")
+    print(f"{'':26}{'everyone':>12}{'AOI grid':>12}")
+    print(f"{'players delivered / tick':26}{n * n:>12}{delivered:>12}")
+    print(f"{'bytes sent / tick':26}{len(full) * n:>12}{sum(map(len, per_client)):>12}")
+    print(f"{'server encode ms / tick':26}{naive_encode * 1e3:>12.2f}{aoi_encode * 1e3:>12.2f}")
+    print(f"{'client parse ms / frame':26}{naive_parse * 1e3:>12.3f}{aoi_parse * 1e3:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+'''
+Benchmark: autosave journal vs full saves
+
+saves/game0.json with 600 monsters and 300 items, in a temporary directory.
+120 autosaves (10 minutes at one every 5 s): the player walks, a couple of
+monsters gain exp or lose hp, an item count changes now and then, and the
+player changes map every 30 autosaves. Per autosave:
+- full: GameManager.save (to_dict on the main thread, the whole file
+  written by SaveManager)
+- journal: SaveJournal.checkpoint (a diff of the map, position and bag,
+  appended to the journal, with a full save every AUTOSAVE_COMPACT_ENTRIES
+  lines)
+Reported: main-thread ms per autosave, how long SaveManager's thread then
+takes to get it on disk (serializing, writing, fsync), and bytes written.
+Then a crash: the game is loaded again without a final save, and the
+recovered map, position and bag have to match the ones it crashed with.
+- SDL_VIDEODRIVER=dummy python benchmarks/bench_autosave.py
+'''
+import logging
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+os.chdir(ROOT)
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame as pg
+
+from src.utils import GameSettings, Logger
+
+AUTOSAVES = 120
+
+
+def grow_bag(gm, monsters: int, items: int) -> None:
+    names = list(gm.monster_database) or ["Sproutkit"]
+    gm.bag._monsters_data = [
+        {"name": names[i % len(names)], "level": 5 + i % 60, "hp": 40 + i % 90, "max_hp": 130, "exp": i * 37}
+        for i in range(monsters)
+    ]
+    gm.bag._items_data = [{"name": f"Item {i}", "count": 1 + i % 99, "sprite_path": "ingame_ui/potion.png"}
+                          for i in range(items)]
+
+
+def play(gm, step: int, rng: random.Random) -> None:
+    """What changes between two autosaves"""
+    gm.player.position.x += GameSettings.TILE_SIZE * rng.choice((-2, -1, 1, 2))
+    for monster in rng.sample(gm.bag._monsters_data[:6], 2):
+        monster["exp"] += rng.randint(5, 40)
+        monster["hp"] = max(0, monster["hp"] - rng.randint(0, 10))
+    if step % 7 == 0:
+        gm.bag._items_data[rng.randrange(len(gm.bag._items_data))]["count"] += 1
+    if step % 30 == 29:
+        gm.current_map_key = rng.choice([key for key in gm.maps if key != gm.current_map_key])
+
+
+def state(gm) -> tuple:
+    p = gm.player.position
+    return gm.current_map_key, (p.x, p.y), gm.bag._monsters_data, gm.bag._items_data
+
+
+def run(mode: str, tmp: str) -> tuple[list[float], list[float], int, object]:
+    from src.core import GameManager
+    from src.core.managers.save_journal import SaveJournal, journal_path
+    from src.core.services import save_manager
+
+    path = os.path.join(tmp, f"{mode}.json")
+    gm = GameManager.load("saves/game0.json")
+    grow_bag(gm, 600, 300)
+    gm.save(path)
+    save_manager.flush()
+    journal = SaveJournal(path)
+    journal.attach(gm)
+
+    # Bytes written: every full save rewrites the file, the journal only grows
+    written = 0
+    rng = random.Random(43)
+    calls, background = [], []
+    for step in range(AUTOSAVES):
+        play(gm, step, rng)
+        saves_before = save_manager.saves_written
+        jsize = os.path.getsize(journal_path(path)) if os.path.exists(journal_path(path)) else 0
+        t0 = time.perf_counter()
+        if mode == "full":
+            gm.save(path)
+        else:
+            journal.checkpoint(gm)
+        t1 = time.perf_counter()
+        save_manager.flush()
+        calls.append(t1 - t0)
+        background.append(time.perf_counter() - t1)
+        if save_manager.saves_written > saves_before:
+            written += os.path.getsize(path)
+        if os.path.exists(journal_path(path)):
+            written += max(0, os.path.getsize(journal_path(path)) - jsize)
+    return calls, background, written, (gm, path)
+
+
+def main() -> None:
+    pg.init()
+    pg.display.set_mode((1, 1))
+    Logger.setLevel(logging.WARNING)
+    from src.core import GameManager
+
+    tmp = tempfile.mkdtemp()
+    try:
+        print(f"{AUTOSAVES} autosaves, 600 monsters, 300 items")
+        print(f"{'mode':<9}{'main ms p50':>13}{'max':>8}{'save thread ms p50':>20}{'KiB written':>13}")
+        for mode in ("full", "journal"):
+            calls, background, written, (gm, path) = run(mode, tmp)
+            print(f"{mode:<9}{statistics.median(calls) * 1000:>13.2f}{max(calls) * 1000:>8.2f}"
+                  f"{statistics.median(background) * 1000:>20.2f}{written / 1024:>13.0f}")
+
+        # Crash: the last state only lives in the journal
+        recovered = GameManager.load(path)
+        assert state(recovered) == state(gm), "journal replay lost progress"
+        print(f"crash recovery: map {recovered.current_map_key}, position and "
+              f"{len(recovered.bag._monsters_data)} monsters restored from {path}.journal")
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    main()
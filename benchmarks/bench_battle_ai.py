@@ -0,0 +1,171 @@
+'''
+Benchmark: enemy battle AI
+
+Random 3 vs 3 battles between the shipped species (levels 10-30, both
+sides holding a couple of potions).
+- rules: SearchModel's tuple states are played against src/battle/engine.py
+  with random actions on both sides and must stay identical
+- search: ExpectimaxAI.choose from random enemy turns, per time budget:
+  nodes/s, depth reached, transposition table hits, and decision latency
+  (p50 / max, it has to stay close to the budget)
+- frames: a 60 fps loop doing a fixed amount of Python work per frame
+  (about 5 ms) while the AI thinks the whole time, given a new position
+  as soon as it has decided: frame time p50 / p99 / max (time lost to the
+  search thread or waiting for the GIL shows up here) and frames per
+  decision, for no AI, IncrementalAI (3 ms slices on the main thread,
+  BattleScene's default) and ThreadedAI
+- strength: how often the enemy wins with AttackAI (the old behaviour)
+  and with ExpectimaxAI, the player following potion_policy
+- python benchmarks/bench_battle_ai.py
+'''
+import copy
+import logging
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from src.battle import Battle, Fighter, potion_policy
+from src.battle.ai import PLAYER_AGAIN, PLAYER_WON, ENEMY_WON, AttackAI, ExpectimaxAI, IncrementalAI, SearchModel, ThreadedAI
+from src.battle.rules import BattleState
+from src.data.database import GameDatabase
+from src.utils import Logger
+
+ITEMS = {"Heal Potion": 2, "Strength Potion": 1}
+ENEMY_ITEMS = {"Heal Potion": 2, "Defense Potion": 1}
+
+
+def random_battle(db: GameDatabase, rng: random.Random) -> Battle:
+    species = list(db.species)
+    level = rng.randint(10, 30)
+    team = lambda: [Fighter.create(db, rng.choice(species), level + rng.randint(-3, 3)) for _ in range(3)]
+    return Battle.create(team(), team(), ITEMS, ENEMY_ITEMS)
+
+
+def enemy_turn(db: GameDatabase, rng: random.Random) -> Battle:
+    '''A battle a few turns in, waiting for the enemy'''
+    while True:
+        battle = random_battle(db, rng)
+        for _ in range(rng.randint(0, 3)):
+            battle.step(potion_policy()(battle))
+        if battle.state is BattleState.PLAYER_TURN and battle.player_turn(potion_policy()(battle)):
+            if battle.state is BattleState.ENEMY_TURN:
+                return battle
+
+
+def check_rules(db: GameDatabase, rng: random.Random, battles: int) -> int:
+    steps = 0
+    for _ in range(battles):
+        battle = random_battle(db, rng)
+        model = SearchModel(battle)
+        state = model.state(battle)
+        while not battle.over and battle.turns < 200:
+            if battle.state is BattleState.PLAYER_TURN:
+                action = rng.choice(model.player_actions(state))
+                state, result = model.apply_player(state, action)
+                assert battle.player_turn(action)
+                expected = {PLAYER_WON: BattleState.WON, PLAYER_AGAIN: BattleState.PLAYER_TURN}
+                assert battle.state is expected.get(result, BattleState.ENEMY_TURN)
+            else:
+                action = rng.choice(model.enemy_actions(state))
+                state, result = model.apply_enemy(state, action)
+                battle.enemy_turn(action)
+                assert battle.state is (BattleState.LOST if result == ENEMY_WON else BattleState.PLAYER_TURN)
+            assert state == model.state(battle), "search model and engine disagree"
+            steps += 1
+    return steps
+
+
+def work(n: int) -> int:
+    """A fixed amount of Python work standing in for update() + draw()"""
+    total = 0
+    for i in range(n):
+        total += i * i % 7
+    return total
+
+
+def calibrate(seconds: float) -> int:
+    n = 10_000
+    while True:
+        t0 = time.perf_counter()
+        work(n)
+        took = time.perf_counter() - t0
+        if took > 0.001:
+            return int(n * seconds / took)
+        n *= 2
+
+
+def frame_loop(frames: int, n: int, ai, make_battle) -> tuple[list[float], int]:
+    """Time of each frame and the number of decisions made"""
+    times, decisions = [], 0
+    for _ in range(frames):
+        start = time.perf_counter()
+        if ai is not None:
+            decisions += ai.poll() is not None
+            if not ai.thinking:
+                ai.begin(make_battle())
+        work(n)
+        times.append(time.perf_counter() - start)
+        time.sleep(max(0.0, 1 / 60 - (time.perf_counter() - start)))
+    return times, decisions
+
+
+def ms(values: list[float], q: float) -> float:
+    return sorted(values)[min(len(values) - 1, int(q * len(values)))] * 1000
+
+
+def main() -> None:
+    Logger.setLevel(logging.WARNING)
+    db = GameDatabase.load(str(ROOT / "src/data/monsters.json"), str(ROOT / "src/data/items.json"),
+                           str(ROOT / "src/data/trainers.json"))
+    rng = random.Random(48)
+
+    steps = check_rules(db, rng, 300)
+    print(f"rules: {steps} random steps, search model == engine\n")
+
+    positions = [enemy_turn(db, rng) for _ in range(30)]
+    print(f"{'budget ms':>10}{'nodes/s':>11}{'depth p50':>11}{'tt hits':>9}{'latency p50':>13}{'max':>8}")
+    for budget in (0.02, 0.05, 0.1, 0.25):
+        ai = ExpectimaxAI(time_budget=budget)
+        nodes, elapsed, depths, hits, latencies = 0, 0.0, [], 0, []
+        for battle in positions:
+            ai.reset()
+            t0 = time.perf_counter()
+            ai.choose(battle)
+            latencies.append(time.perf_counter() - t0)
+            nodes += ai.nodes
+            hits += ai.table_hits
+            elapsed += ai.elapsed
+            depths.append(ai.depth)
+        print(f"{budget * 1000:>10.0f}{nodes / elapsed:>11,.0f}{statistics.median(depths):>11.0f}"
+              f"{hits / max(nodes, 1):>9.0%}{ms(latencies, 0.5):>13.1f}{max(latencies) * 1000:>8.1f}")
+
+    frames, n = 600, calibrate(0.005)
+    print(f"\n{'frame ms':<14}{'p50':>7}{'p99':>7}{'max':>7}{'frames/decision':>17}")
+    for label, ai in (("no AI", None),
+                      ("incremental", IncrementalAI(ExpectimaxAI(time_budget=0.25))),
+                      ("thread", ThreadedAI(ExpectimaxAI(time_budget=0.25)))):
+        times, decisions = frame_loop(frames, n, ai, lambda: copy.deepcopy(rng.choice(positions)))
+        if ai is not None:
+            ai.cancel()
+        per_decision = f"{frames / decisions:.1f}" if decisions else "-"
+        print(f"{label:<14}{ms(times, 0.5):>7.2f}{ms(times, 0.99):>7.2f}{max(times) * 1000:>7.2f}{per_decision:>17}")
+
+    wins = {}
+    battles = [random_battle(db, rng) for _ in range(150)]
+    for ai in (AttackAI(), ExpectimaxAI(time_budget=0.02)):
+        wins[ai.name] = 0
+        for battle in battles:
+            ai.reset()
+            battle = copy.deepcopy(battle)
+            battle.run(potion_policy(), enemy_policy=ai)
+            wins[ai.name] += not battle.won
+    print(f"\nenemy wins out of {len(battles)}: " + ", ".join(f"{name} {n}" for name, n in wins.items()))
+
+
+if __name__ == "__main__":
+    main()
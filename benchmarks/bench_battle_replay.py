@@ -0,0 +1,117 @@
+'''
+Benchmark: battle replays
+
+A corpus of random 3 vs 3 battles (levels 5-40, potions on both sides) is
+played by the engine and recorded with src/battle/replay.py: the player
+mixes potion_policy with random switches, the enemy picks a random
+action, so every action code shows up. Or pass a directory of recorded
+replays (e.g. saves/replays) to use those instead.
+- record: battles/s for Battle.run vs the same battles with record()
+- files: bytes per replay, seconds to write and to load the corpus
+- replay: turns/s re-executing every replay (best of 5), and every
+  outcome has to match its recording
+- python benchmarks/bench_battle_replay.py [replay dir]
+'''
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from src.battle import Action, Battle, Fighter, potion_policy
+from src.battle.replay import load, record, replay, replay_paths, verify
+from src.data.database import GameDatabase
+from src.utils import Logger, get_codec
+
+BATTLES = 3000
+ITEMS = {"Heal Potion": 2, "Strength Potion": 1, "Defense Potion": 1}
+
+
+def random_battle(db: GameDatabase, rng: random.Random) -> Battle:
+    species = list(db.species)
+    level = rng.randint(5, 40)
+    team = lambda: [Fighter.create(db, rng.choice(species), level + rng.randint(-3, 3)) for _ in range(3)]
+    return Battle.create(team(), team(), ITEMS, ITEMS)
+
+
+def policies(rng: random.Random):
+    potions = potion_policy()
+
+    def player(battle: Battle) -> Action:
+        if rng.random() < 0.1 and battle.can(Action.SWITCH):
+            return Action.SWITCH
+        return potions(battle)
+
+    def enemy(battle: Battle) -> Action:
+        return rng.choice([a for a in Action if battle.enemy_can(a)])
+
+    return player, enemy
+
+
+def build_corpus(db: GameDatabase, directory: str) -> None:
+    battles = [random_battle(db, random.Random(i)) for i in range(BATTLES)]
+    t0 = time.perf_counter()
+    for i, battle in enumerate(battles):
+        player, enemy = policies(random.Random(i))
+        battle.copy().run(player, enemy_policy=enemy)
+    plain = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    logs = []
+    for i, battle in enumerate(battles):
+        player, enemy = policies(random.Random(i))
+        logs.append(record(battle.copy(), player, enemy))
+    recorded = time.perf_counter() - t0
+    print(f"record: {BATTLES / plain:,.0f} battles/s plain, {BATTLES / recorded:,.0f} battles/s recording")
+
+    dumps = get_codec().dumps
+    t0 = time.perf_counter()
+    for i, log in enumerate(logs):
+        with open(os.path.join(directory, f"battle-{i:05d}.json"), "w", encoding="utf-8") as f:
+            f.write(dumps(log.to_dict()))
+    print(f"write: {BATTLES} replays in {time.perf_counter() - t0:.2f} s")
+
+
+def main() -> None:
+    Logger.setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        if len(sys.argv) > 1:
+            directory = sys.argv[1]
+        else:
+            db = GameDatabase.load(str(ROOT / "src/data/monsters.json"), str(ROOT / "src/data/items.json"),
+                                   str(ROOT / "src/data/trainers.json"))
+            directory = tmp
+            build_corpus(db, directory)
+
+        paths = replay_paths([directory])
+        size = sum(os.path.getsize(p) for p in paths)
+        t0 = time.perf_counter()
+        logs = [load(p) for p in paths]
+        print(f"load: {len(logs)} replays, {size / max(len(logs), 1):,.0f} bytes each, "
+              f"{time.perf_counter() - t0:.2f} s")
+
+    results = [replay(log) for log in logs]
+    bad = sum(bool(verify(log, battle)) for log, battle in zip(logs, results))
+    turns = sum(battle.turns for battle in results)
+    ends = {}
+    for log in logs:
+        ends[log.end] = ends.get(log.end, 0) + 1
+    best = float("inf")
+    for _ in range(5):
+        t0 = time.perf_counter()
+        for log in logs:
+            replay(log)
+        best = min(best, time.perf_counter() - t0)
+    print(f"replay: {turns:,} turns ({sum(len(log.actions) for log in logs):,} actions) in {best:.3f} s, "
+          f"{turns / best:,.0f} turns/s, {len(logs) / best:,.0f} battles/s")
+    print(f"outcomes {ends}, {bad} differ from the recording")
+    assert bad == 0
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+'''
+Benchmark: BattleScene.setup_battle
+
+A trainer battle against Serena (saves/game0.json's bag) is set up over and
+over: setup_battle + enter + one switch on each side, i.e. 4 Monsters.
+For each variant:
+- setup time (p50 / min over 300 setups)
+- Python allocations of one setup (tracemalloc peak)
+- pixels scaled per setup: every 300x300 battle sprite made is a new
+  360 KB Surface, outside tracemalloc's view
+- before: the sprite sheet cropped and scaled for every Monster, as
+  Monster._setup_sprite used to do
+- after: resource_manager.get_battle_image, made once per sprite and side
+- SDL_VIDEODRIVER=dummy python benchmarks/bench_battle_setup.py
+'''
+import logging
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+os.chdir(ROOT)
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame as pg
+
+from src.utils import BattleType, GameSettings, Logger
+
+SETUPS = 300
+
+
+def main() -> None:
+    pg.init()
+    pg.display.set_mode((1, 1))
+    Logger.setLevel(logging.WARNING)
+    GameSettings.BATTLE_REPLAY_DIR = None
+
+    from src.core import GameManager
+    from src.core.services import resource_manager
+    from src.scenes.battle_scene import BattleScene
+
+    gm = GameManager.load("saves/game0.json")
+    trainer = gm.trainer_database["Serena"]
+    team = [dict(gm.monster_database[m["name"]], level=m["level"]) for m in trainer["team"]]
+    scene = BattleScene()
+    scaled = [0]
+    cached = resource_manager.get_battle_image
+
+    def uncached(path: str, is_player: bool, size: tuple[int, int]) -> pg.Surface:
+        sheet = resource_manager.get_image(path)
+        half = sheet.get_width() // 2
+        crop = sheet.subsurface(pg.Rect(half if is_player else 0, 0, half, sheet.get_height()))
+        scaled[0] += size[0] * size[1]
+        return pg.transform.scale(crop, size)
+
+    def counting(path: str, is_player: bool, size: tuple[int, int]) -> pg.Surface:
+        if (path, is_player, size) not in resource_manager._battle_images:
+            scaled[0] += size[0] * size[1]
+        return cached(path, is_player, size)
+
+    def setup() -> None:
+        scene.setup_battle(gm, team[0], BattleType.TRAINER, enemy_team=team)
+        scene.enter()
+        scene._switch_monster(1)
+        scene._switch_enemy(1)
+
+    print(f"{'variant':<8}{'p50 ms':>9}{'min ms':>9}{'alloc peak B':>14}{'pixels scaled':>15}")
+    for name, get_image in (("before", uncached), ("after", counting)):
+        resource_manager.get_battle_image = get_image
+        setup()
+        times = []
+        for _ in range(SETUPS):
+            t0 = time.perf_counter()
+            setup()
+            times.append(time.perf_counter() - t0)
+        scaled[0] = 0
+        tracemalloc.start()
+        setup()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{name:<8}{statistics.median(times) * 1000:>9.3f}{min(times) * 1000:>9.3f}{peak:>14,}{scaled[0]:>15,}")
+    resource_manager.get_battle_image = cached
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+'''
+Benchmark: headless battle simulation
+
+Random battles over the shipped monsters.json: teams of 1-3 species on
+each side, levels 1-60, 0-3 of each potion, the player following
+potion_policy (heal below 30 %, then drink the boosts, then attack).
+Battles per second for:
+- engine: src/battle/engine.py, one Battle at a time (the same rules as
+  BattleScene, without the UI delays)
+- numpy: src/battle/simulator.py, all battles at once
+Every engine battle is checked against the batch result (winner, turns,
+HP left on both sides). Then the time to build a species x species win-rate
+matrix and a trainer matrix for the designers.
+- python benchmarks/bench_battle_sim.py
+'''
+import logging
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import numpy as np
+
+from src.battle import Battle, Fighter, potion_policy
+from src.battle.rules import POTIONS
+from src.battle.simulator import StatTables, simulate, species_matrix, trainer_matrix
+from src.data.database import GameDatabase
+from src.utils import Logger
+
+ENGINE_BATTLES = 20_000
+BATCH_BATTLES = 1_000_000
+
+
+def random_battles(tables: StatTables, n: int, seed: int):
+    rng = np.random.default_rng(seed)
+    s = len(tables.species)
+
+    def teams():
+        species = rng.integers(0, s, size=(n, 3), dtype=np.int32)
+        size = rng.integers(1, 4, size=n)
+        species[np.arange(3) >= size[:, None]] = -1
+        return species, rng.integers(1, 61, size=(n, 3), dtype=np.int32)
+
+    player, player_levels = teams()
+    enemy, enemy_levels = teams()
+    return player, player_levels, enemy, enemy_levels, rng.integers(0, 4, size=(n, 3), dtype=np.int32)
+
+
+def run_engine(db: GameDatabase, tables: StatTables, battles, count: int) -> list[tuple]:
+    policy = potion_policy(0.3)
+    player, player_levels, enemy, enemy_levels, items = battles
+    results = []
+    for i in range(count):
+        battle = Battle.create(
+            [Fighter.create(db, tables.species[c], int(lv)) for c, lv in zip(player[i], player_levels[i]) if c >= 0],
+            [Fighter.create(db, tables.species[c], int(lv)) for c, lv in zip(enemy[i], enemy_levels[i]) if c >= 0],
+            dict(zip(POTIONS, map(int, items[i]))),
+        )
+        battle.run(policy)
+        results.append((battle.won, battle.turns,
+                        sum(f.hp for f in battle.player.team), sum(f.hp for f in battle.enemy.team)))
+    return results
+
+
+def main() -> None:
+    Logger.setLevel(logging.WARNING)
+    db = GameDatabase.load(str(ROOT / "src/data/monsters.json"), str(ROOT / "src/data/items.json"),
+                           str(ROOT / "src/data/trainers.json"))
+    t0 = time.perf_counter()
+    tables = StatTables(db)
+    print(f"stat tables: {len(tables.species)} species x {tables.max_hp.shape[1]} levels, "
+          f"{(time.perf_counter() - t0) * 1000:.1f} ms")
+
+    battles = random_battles(tables, BATCH_BATTLES, seed=46)
+    t0 = time.perf_counter()
+    engine = run_engine(db, tables, battles, ENGINE_BATTLES)
+    engine_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    result = simulate(tables, *battles)
+    batch_s = time.perf_counter() - t0
+
+    batch = list(zip(result.won[:ENGINE_BATTLES].tolist(), result.turns[:ENGINE_BATTLES].tolist(),
+                     result.player_hp[:ENGINE_BATTLES].tolist(), result.enemy_hp[:ENGINE_BATTLES].tolist()))
+    mismatches = sum(a != b for a, b in zip(engine, batch))
+    print(f"{'':<8}{'battles':>10}{'seconds':>10}{'battles/s':>13}")
+    print(f"{'engine':<8}{ENGINE_BATTLES:>10}{engine_s:>10.2f}{ENGINE_BATTLES / engine_s:>13,.0f}")
+    print(f"{'numpy':<8}{BATCH_BATTLES:>10}{batch_s:>10.2f}{BATCH_BATTLES / batch_s:>13,.0f}")
+    print(f"player win rate {result.win_rate:.3f}, longest battle {result.turns.max()} turns, "
+          f"engine vs numpy mismatches: {mismatches}/{ENGINE_BATTLES}")
+    assert mismatches == 0
+
+    t0 = time.perf_counter()
+    rates = species_matrix(tables, 20, level_spread=3, samples=500, seed=46)
+    print(f"\nspecies matrix, level 20 +-3, 500 samples per cell "
+          f"({rates.rates.size * 500:,} battles): {time.perf_counter() - t0:.2f} s")
+    t0 = time.perf_counter()
+    rates = trainer_matrix(tables, ["Sproutkit", "Bubphin", "Cinderillo"], range(5, 61, 5),
+                           level_spread=2, samples=500, items=(3, 1, 1), seed=46)
+    print(f"trainer matrix, Sproutkit/Bubphin/Cinderillo at levels 5-60, 3 Heal Potions: "
+          f"{time.perf_counter() - t0:.2f} s")
+    print(rates.format())
+
+
+if __name__ == "__main__":
+    main()
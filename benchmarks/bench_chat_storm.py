@@ -0,0 +1,75 @@
+'''
+Benchmark: chat storm
+
+Every bot of the swarm chats 1.5 times a second, just under the chat_send rate
+limit, on each channel in turn (a fresh server.py per channel). From the
+server's metrics and the bots' report:
+- chat messages stored and chat_update frames the server sent
+- per message broadcast: what sending every message to every connected
+  client on arrival would have cost (messages x clients)
+- chat_update frames each bot received per second and the chat round trip,
+  which now includes the wait for the next broadcast tick
+- python benchmarks/bench_chat_storm.py --clients 100 --duration 8
+'''
+import argparse
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from server import botSwarm
+from server.metrics import parse_text
+
+
+def scrape(port: int) -> dict[str, float]:
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=2) as resp:
+        return parse_text(resp.read().decode("utf-8"))
+
+
+def run_channel(channel: str, args: argparse.Namespace) -> dict:
+    server = subprocess.Popen(
+        [sys.executable, "server.py", "--port", str(args.port), "--metrics-port", str(args.metrics_port)],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        time.sleep(1.5)
+        report = botSwarm.run(botSwarm.parse_args([
+            "--url", f"ws://127.0.0.1:{args.port}", "--clients", str(args.clients),
+            "--duration", str(args.duration), "--update-rate", "10", "--chat-rate", "1.5",
+            "--chat-channel", channel, "--save", str(ROOT / "saves" / "game0.json"),
+        ]))
+        metrics = scrape(args.metrics_port)
+    finally:
+        server.terminate()
+        server.wait()
+    return {"report": report, "metrics": metrics}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=8.0)
+    parser.add_argument("--port", type=int, default=18989)
+    parser.add_argument("--metrics-port", type=int, default=19100)
+    args = parser.parse_args()
+
+    print(f"{args.clients} bots, 1.5 chat messages/s each, {args.duration:.0f} s per channel")
+    print(f"{'channel':<8}{'messages':>10}{'per-message':>13}{'chat frames':>13}"
+          f"{'frames/bot/s':>14}{'chat p50 ms':>13}{'p99 ms':>9}")
+    for channel in ("global", "map", "near"):
+        result = run_channel(channel, args)
+        m, report = result["metrics"], result["report"]
+        messages = m.get("monstergo_chat_messages_total", 0)
+        frames = m.get("monstergo_chat_frames_total", 0)
+        received = report["counters"].get("recv_chat_update", 0)
+        latency = report["latency_ms"].get("chat", {"p50": float("nan"), "p99": float("nan")})
+        print(f"{channel:<8}{messages:>10.0f}{messages * args.clients:>13.0f}{frames:>13.0f}"
+              f"{received / args.clients / args.duration:>14.1f}{latency['p50']:>13.1f}{latency['p99']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
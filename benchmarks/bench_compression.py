@@ -0,0 +1,117 @@
+'''
+Benchmark: permessage-deflate on the players_update stream
+
+One client's view over 300 ticks (30% of the players walking), frames
+written by the real server code, pushed through the same extension objects
+server.py negotiates (server/compression.py). For each setting and number of
+players in view:
+- bytes on the wire per frame (payload, after deflate)
+- server CPU per frame per client (broadcast() deflates for every connection)
+  and what that is at 60 Hz, in % of one core per 100 clients
+- client CPU to inflate one frame
+- compressor memory per connection
+A last table sends the small frames of an empty view, to show what the
+threshold saves.
+- python benchmarks/bench_compression.py [players ...]
+'''
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from websockets.extensions.permessage_deflate import PerMessageDeflate
+from websockets.frames import Frame, Opcode
+
+from server.compression import PRESETS, CompressionSettings, ThresholdPerMessageDeflate
+from server.frameCache import players_frame
+from server.playerHandler import PlayerHandler
+
+TICKS = 300
+SETTINGS = {
+    **PRESETS,
+    "no takeover": CompressionSettings(context_takeover=False),
+    "level 1": CompressionSettings(level=1),
+    "window 13": CompressionSettings(window_bits=13),
+}
+
+
+def view_frames(n: int, rng: random.Random) -> list[bytes]:
+    """Frames one client at the centre of a crowd of n players receives"""
+    handler = PlayerHandler()
+    positions = {}
+    for _ in range(n):
+        pid = handler.register()
+        positions[pid] = [1280 + rng.uniform(-900, 900), 768 + rng.uniform(-500, 500)]
+        handler.update(pid, *positions[pid], "map.tmx", "down", False)
+    me = min(positions)
+    handler.update(me, 1280, 768, "map.tmx", "down", False)
+    walkers = rng.sample(sorted(positions), int(n * 0.3))
+    frames = []
+    for tick in range(TICKS):
+        for pid in walkers:
+            positions[pid][0] += 5.3
+            handler.update(pid, *positions[pid], "map.tmx", "right", True)
+        frames.append(players_frame(handler.encode_view(handler.view_of(me)), tick / 60).encode())
+    return frames
+
+
+def endpoints(settings: CompressionSettings) -> tuple[PerMessageDeflate, PerMessageDeflate]:
+    """Server-side encoder and client-side decoder as negotiated for these settings"""
+    no_takeover = not settings.context_takeover
+    server = ThresholdPerMessageDeflate(
+        False, no_takeover, settings.client_window_bits, settings.window_bits,
+        {"memLevel": settings.mem_level, "level": settings.level}, threshold=settings.threshold
+    )
+    client = PerMessageDeflate(no_takeover, False, settings.window_bits, settings.client_window_bits)
+    return server, client
+
+
+def measure(settings: CompressionSettings, frames: list[bytes]) -> tuple[float, float, float]:
+    """(bytes per frame, server us per frame, client us per frame)"""
+    if not settings.enabled:
+        return sum(map(len, frames)) / len(frames), 0.0, 0.0
+    server, client = endpoints(settings)
+    t0 = time.perf_counter()
+    out = [server.encode(Frame(Opcode.TEXT, data)) for data in frames]
+    t1 = time.perf_counter()
+    for frame in out:
+        client.decode(frame)
+    t2 = time.perf_counter()
+    return sum(len(f.data) for f in out) / len(out), (t1 - t0) / len(frames) * 1e6, (t2 - t1) / len(frames) * 1e6
+
+
+def memory_kib(settings: CompressionSettings) -> float:
+    if not settings.enabled:
+        return 0.0
+    return ((1 << (settings.window_bits + 2)) + (1 << (settings.mem_level + 9))) / 1024
+
+
+def main() -> None:
+    counts = [int(a) for a in sys.argv[1:]] or [5, 50, 200]
+    rng = random.Random(40)
+    print(f"{'setting':<12}{'players':>8}{'raw B':>9}{'wire B':>9}{'ratio':>7}"
+          f"{'server us':>11}{'% core/100':>12}{'client us':>11}{'mem KiB':>9}")
+    for n in counts:
+        frames = view_frames(n, rng)
+        raw = sum(map(len, frames)) / len(frames)
+        for name, settings in SETTINGS.items():
+            wire, server_us, client_us = measure(settings, frames)
+            core = server_us * 60 * 100 / 1e6 * 100
+            print(f"{name:<12}{n:>8}{raw:>9.0f}{wire:>9.0f}{raw / wire:>7.1f}"
+                  f"{server_us:>11.1f}{core:>12.1f}{client_us:>11.1f}{memory_kib(settings):>9.0f}")
+        print()
+
+    # An empty view: 60 small frames a second that all look alike
+    empty = [players_frame("{}", tick / 60).encode() for tick in range(TICKS)]
+    print(f"empty view ({len(empty[0])} B frames)")
+    for threshold in (0, 128):
+        settings = CompressionSettings(threshold=threshold)
+        wire, server_us, _ = measure(settings, empty)
+        print(f"  threshold {threshold:>4}: {wire:>5.0f} B on the wire, {server_us:.1f} us server CPU per frame")
+
+
+if __name__ == "__main__":
+    main()
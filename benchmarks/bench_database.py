@@ -0,0 +1,142 @@
+'''
+Benchmark: static game database lookups
+
+The shipped monsters.json / items.json, and the same data scaled up to
+2000 species and 1000 items. Microseconds per call, for:
+- item price by display name: ShopWindow.get_item_price's scan over
+  item_database vs GameDatabase.item_by_name
+- monster stats: Monster.recalculate_stats' formulas over the species dict
+  vs the precomputed per-level table
+- heal a bag of 600 monsters: Nurse.heal_team's max HP formula per monster
+  vs the table
+- species of one type: a scan over monster_database vs species_by_type
+- evolution chain of a species: following "evolution" from the root found
+  by scanning for parents vs evolution_chains
+- python benchmarks/bench_database.py
+'''
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from src.data.database import DEFAULT_TYPE, GameDatabase
+from src.utils import Logger
+
+
+def legacy_item_price(item_database: dict, item_name: str) -> int:
+    for key, data in item_database.items():
+        if data["name"] == item_name:
+            return data.get("price", 1)
+    return 0
+
+
+def legacy_stats(species_data: dict, level: int) -> tuple[int, int, int]:
+    base_hp = species_data.get("base_hp", 50)
+    base_atk = species_data.get("base_attack", 10)
+    base_dfn = species_data.get("base_defense", 10)
+    max_hp = int(base_hp * (1 + level * 0.05) + (level * 2))
+    attack = int(base_atk * (1 + level * 0.05) + (level * 0.5))
+    defense = int(base_dfn * (1 + level * 0.05) + (level * 0.5))
+    return max_hp, attack, defense
+
+
+def legacy_heal(monster_database: dict, bag: list[dict]) -> None:
+    for m_data in bag:
+        db_data = monster_database.get(m_data.get("name"), {})
+        base_hp = db_data.get("base_hp", 40)
+        m_data["hp"] = int(base_hp * (1 + m_data.get("level", 1) * 0.05) + (m_data.get("level", 1) * 2))
+
+
+def new_heal(db: GameDatabase, bag: list[dict]) -> None:
+    for m_data in bag:
+        m_data["hp"] = db.max_hp(m_data.get("name"), m_data.get("level", 1), default_base_hp=40)
+
+
+def legacy_chain(monster_database: dict, species: str) -> tuple[str, ...]:
+    root = species
+    while True:
+        parent = next((name for name, data in monster_database.items()
+                       if (data.get("evolution") or {}).get("next_id") == root), None)
+        if parent is None:
+            break
+        root = parent
+    chain = [root]
+    while (nxt := (monster_database.get(chain[-1], {}).get("evolution") or {}).get("next_id")) in monster_database:
+        chain.append(nxt)
+    return tuple(chain)
+
+
+def scaled(monsters: dict, items: dict, n_species: int, n_items: int) -> tuple[dict, dict]:
+    """Copies of the real entries with numbered ids, evolution lines kept inside each copy"""
+    big_monsters, big_items = {}, {}
+    for copy in range(n_species // len(monsters) + 1):
+        for sid, data in monsters.items():
+            entry = dict(data, name=f"{data['name']}{copy}")
+            if data.get("evolution"):
+                entry["evolution"] = dict(data["evolution"], next_id=f"{data['evolution']['next_id']}{copy}")
+            big_monsters[f"{sid}{copy}"] = entry
+    for copy in range(n_items // len(items) + 1):
+        for iid, data in items.items():
+            big_items[f"{iid}{copy}"] = dict(data, name=f"{data['name']} {copy}")
+    return dict(list(big_monsters.items())[:n_species]), dict(list(big_items.items())[:n_items])
+
+
+def us(fn, calls: int = 2000, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        best = min(best, time.perf_counter() - t0)
+    return best / calls * 1e6
+
+
+def report(label: str, monsters: dict, items: dict) -> None:
+    db = GameDatabase(monsters, items, {})
+    species_ids = list(monsters)
+    last_item = list(items.values())[-1]["name"]
+    species = species_ids[len(species_ids) // 2]
+    end_of_line = next(sid for sid in reversed(species_ids) if not monsters[sid].get("evolution"))
+    a_type = monsters[species].get("type", DEFAULT_TYPE)
+    bag = [{"name": species_ids[i % len(species_ids)], "level": 1 + i % 60, "hp": 0} for i in range(600)]
+
+    assert legacy_item_price(items, last_item) == db.item_price(last_item)
+    assert legacy_stats(monsters[species], 37) == tuple(db.stats(species, 37))
+    assert legacy_chain(monsters, end_of_line) == db.evolution_chains[end_of_line]
+
+    rows = [
+        ("item price by name", lambda: legacy_item_price(items, last_item), lambda: db.item_price(last_item)),
+        ("monster stats", lambda: legacy_stats(monsters[species], 37), lambda: db.stats(species, 37)),
+        ("heal 600 monsters", lambda: legacy_heal(monsters, bag), lambda: new_heal(db, bag)),
+        ("species of a type", lambda: [n for n, d in monsters.items() if d.get("type") == a_type],
+         lambda: db.species_by_type[a_type]),
+        ("evolution chain", lambda: legacy_chain(monsters, end_of_line), lambda: db.evolution_chains[end_of_line]),
+    ]
+    print(f"{label}: {len(monsters)} species, {len(items)} items")
+    print(f"  {'lookup':<20}{'before us':>12}{'database us':>13}")
+    for name, before, after in rows:
+        calls = 20 if "chain" in name and len(monsters) > 100 else 2000
+        calls = 50 if "heal" in name else calls
+        print(f"  {name:<20}{us(before, calls):>12.2f}{us(after, calls):>13.2f}")
+
+
+def main() -> None:
+    Logger.setLevel(logging.WARNING)
+    with open(ROOT / "src" / "data" / "monsters.json", encoding="utf-8") as f:
+        monsters = json.load(f)
+    with open(ROOT / "src" / "data" / "items.json", encoding="utf-8") as f:
+        items = json.load(f)
+    report("shipped data", monsters, items)
+    t0 = time.perf_counter()
+    big_monsters, big_items = scaled(monsters, items, 2000, 1000)
+    GameDatabase(big_monsters, big_items, {})
+    print(f"\nbuilding the scaled database: {(time.perf_counter() - t0) * 1000:.1f} ms (once per process)")
+    report("scaled", big_monsters, big_items)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+'''
+Benchmark: wild encounter rolls
+
+The shipped monsters.json and the same species copied up to 2000 and 5000
+entries. Microseconds per wild encounter:
+- before: GameScene.update's loop over monster_database against the min
+  level table, random.choice, then a copy of the species dict
+- table: EncounterTables.roll (src/data/encounters.py) for the default
+  grass area, a prefix of the species sorted by min level, O(log n)
+Also the time to build a table, and how far apart the exact species
+distributions of the two are (total variation distance, 0 = the table
+picks every species exactly as often as the old loop did).
+- python benchmarks/bench_encounters.py
+'''
+import json
+import logging
+import random
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from src.data.database import GameDatabase
+from src.data.encounters import EncounterArea, EncounterTables
+from src.utils import Logger
+
+
+def generate_min_levels(db: dict) -> dict[str, int]:
+    """GameScene._generate_min_levels"""
+    min_levels = {name: 1 for name in db}
+    for name, data in db.items():
+        evo = data.get("evolution")
+        if evo and evo.get("next_id") and evo.get("level") and evo["next_id"] in min_levels:
+            min_levels[evo["next_id"]] = evo["level"]
+    return min_levels
+
+
+def legacy_roll(db: dict, min_levels: dict[str, int], rng: random.Random) -> dict:
+    encounter_level = rng.randint(2, 40)
+    valid_monsters = [name for name in db if encounter_level >= min_levels.get(name, 1)]
+    if not valid_monsters:
+        valid_monsters = list(db)
+    enemy_data = db[rng.choice(valid_monsters)].copy()
+    enemy_data["level"] = encounter_level
+    enemy_data.pop("current_hp", None)
+    enemy_data.pop("hp", None)
+    return enemy_data
+
+
+def scaled(monsters: dict, n: int) -> dict:
+    out = {}
+    for copy in range(n // len(monsters) + 1):
+        for sid, data in monsters.items():
+            entry = dict(data, name=f"{data['name']}{copy}")
+            if data.get("evolution"):
+                entry["evolution"] = dict(data["evolution"], next_id=f"{data['evolution']['next_id']}{copy}")
+            out[f"{sid}{copy}"] = entry
+    return dict(list(out.items())[:n])
+
+
+def us_per_call(fn, calls: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - t0) / calls * 1e6
+
+
+def legacy_distribution(db: dict, min_levels: dict[str, int]) -> Counter:
+    dist: Counter = Counter()
+    levels = range(2, 41)
+    for level in levels:
+        valid = [name for name in db if level >= min_levels.get(name, 1)] or list(db)
+        for name in valid:
+            dist[name] += 1 / len(levels) / len(valid)
+    return dist
+
+
+def table_distribution(table) -> Counter:
+    dist: Counter = Counter()
+    levels = len(table._eligible)
+    for k in table._eligible:
+        k = k or len(table.species)
+        total = table._cum_weights[k - 1]
+        previous = 0.0
+        for species, cum in zip(table.species[:k], table._cum_weights):
+            dist[species] += (cum - previous) / total / levels
+            previous = cum
+    return dist
+
+
+def distance(a: Counter, b: Counter) -> float:
+    return sum(abs(a[k] - b[k]) for k in a.keys() | b.keys()) / 2
+
+
+def main() -> None:
+    Logger.setLevel(logging.WARNING)
+    with open(ROOT / "src" / "data" / "monsters.json", encoding="utf-8") as f:
+        shipped = json.load(f)
+    area = EncounterArea()
+    print(f"{'species':>8}{'build ms':>10}{'before us':>11}{'table us':>10}{'TV distance':>13}")
+    for n in (len(shipped), 2000, 5000):
+        monsters = shipped if n == len(shipped) else scaled(shipped, n)
+        database = GameDatabase(monsters, {}, {})
+        t0 = time.perf_counter()
+        tables = EncounterTables(database, seed=45)
+        tables.build([area])
+        build_ms = (time.perf_counter() - t0) * 1000
+
+        min_levels = generate_min_levels(monsters)
+        rng = random.Random(45)
+        calls = 2000 if n > 100 else 20000
+        before = us_per_call(lambda: legacy_roll(monsters, min_levels, rng), calls)
+        after = us_per_call(lambda: tables.roll(area), calls)
+
+        tv = distance(legacy_distribution(monsters, min_levels), table_distribution(tables.table(area)))
+        print(f"{n:>8}{build_ms:>10.2f}{before:>11.2f}{after:>10.2f}{tv:>13.6f}")
+
+    # Same seed, same encounters
+    database = GameDatabase(shipped, {}, {})
+    a, b = EncounterTables(database, seed=7), EncounterTables(database, seed=7)
+    assert [a.roll(area) for _ in range(100)] == [b.roll(area) for _ in range(100)]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+'''
+Benchmark: one flooding client next to normal players
+
+Runs the bot swarm (100 normal clients) against server.py alone, next to a
+client sending 300 player_update per second (over the limit, so it gets
+dropped and coalesced), and next to one sending as fast as its socket
+accepts (gets disconnected). With the per-connection rate limits the normal
+clients should barely notice:
+- normal clients: position echo and ping latency, players_update received
+- server: broadcast tick time from /metrics
+- flooder: messages sent vs. dropped / coalesced by the server
+- python benchmarks/bench_flood.py --clients 100 --duration 10
+'''
+import argparse
+import asyncio
+import json
+import multiprocessing as mp
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from websockets.asyncio.client import connect
+from websockets.exceptions import ConnectionClosed
+
+from server import botSwarm
+from server.metrics import parse_text
+
+
+def flood(url: str, duration: float, rate: float, out: mp.Queue) -> None:
+    async def run() -> tuple[int, float | None]:
+        sent = 0
+        start = time.monotonic()
+        try:
+            async with connect(url, max_size=None) as ws:
+                await ws.recv()  # registered
+                x = 0.0
+                while time.monotonic() < start + duration:
+                    x += 1.0
+                    await ws.send(json.dumps({"type": "player_update", "x": x, "y": 640.0, "map": "map.tmx",
+                                              "direction": "right", "is_moving": True}))
+                    sent += 1
+                    if rate:
+                        await asyncio.sleep(1.0 / rate)
+                    if sent % 10 == 0:
+                        await ws.send(json.dumps({"type": "chat_send", "text": f"spam {sent}"}))
+                        sent += 1
+        except ConnectionClosed:
+            return sent, time.monotonic() - start
+        return sent, None
+
+    out.put(asyncio.run(run()))
+
+
+def scrape(port: int) -> dict[str, float]:
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=2) as resp:
+        return parse_text(resp.read().decode("utf-8"))
+
+
+def tick_quantile(sample: dict[str, float], q: float) -> float:
+    name = "monstergo_broadcast_tick_seconds"
+    total = sample[name + "_count"]
+    for key, value in sorted(((k, v) for k, v in sample.items() if k.startswith(name + "_bucket")),
+                             key=lambda kv: float(kv[0].split('le="')[1].rstrip('"}'))):
+        if value >= q * total:
+            return float(key.split('le="')[1].rstrip('"}'))
+    return float("nan")
+
+
+def run_phase(flood_rate: float | None, args: argparse.Namespace, port: int) -> dict:
+    metrics_port = port + 100
+    server = subprocess.Popen(
+        [sys.executable, "server.py", "--port", str(port), "--metrics-port", str(metrics_port)],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        time.sleep(1.5)
+        url = f"ws://127.0.0.1:{port}"
+        out: mp.Queue = mp.Queue()
+        flooder = None
+        if flood_rate is not None:
+            flooder = mp.Process(target=flood, args=(url, args.duration, flood_rate, out), daemon=True)
+            flooder.start()
+        swarm_args = botSwarm.parse_args([
+            "--url", url, "--clients", str(args.clients), "--duration", str(args.duration),
+            "--update-rate", "20", "--chat-rate", "0.05", "--save", str(ROOT / "saves" / "game0.json"),
+        ])
+        report = botSwarm.run(swarm_args)
+        flood_sent, kicked_after = out.get() if flooder else (0, None)
+        if flooder:
+            flooder.join()
+        metrics = scrape(metrics_port)
+    finally:
+        server.terminate()
+        server.wait()
+    return {"report": report, "metrics": metrics, "flood_sent": flood_sent, "kicked_after": kicked_after}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=18989)
+    args = parser.parse_args()
+
+    phases = {
+        "normal only": run_phase(None, args, args.port),
+        "+ 300 msg/s": run_phase(300.0, args, args.port + 10),
+        "+ flat out": run_phase(0.0, args, args.port + 20),
+    }
+
+    print(f"{args.clients} normal clients at 20 updates/s, {args.duration}s per run")
+    print(f"{'':14}{'echo p50':>10}{'echo p99':>10}{'ping p99':>10}{'frames/s':>10}{'tick p50':>10}{'tick p99':>10}")
+    for name, r in phases.items():
+        lat = r["report"]["latency_ms"]
+        frames = r["report"]["rates_per_s"].get("recv_players_update", 0.0)
+        print(f"{name:14}{lat['echo']['p50']:>10.1f}{lat['echo']['p99']:>10.1f}{lat['ping']['p99']:>10.1f}"
+              f"{frames:>10.0f}{tick_quantile(r['metrics'], .5) * 1e3:>10.1f}{tick_quantile(r['metrics'], .99) * 1e3:>10.1f}")
+
+    for name in ("+ 300 msg/s", "+ flat out"):
+        flooded = phases[name]
+        m = flooded["metrics"]
+        dropped = {k.split('"')[1]: v for k, v in m.items() if k.startswith("monstergo_messages_dropped_total")}
+        kicked = "not disconnected" if flooded["kicked_after"] is None else f"disconnected after {flooded['kicked_after']:.1f}s"
+        elapsed = flooded["kicked_after"] or args.duration
+        print(f"\nflooder {name[2:]}: sent {flooded['flood_sent']} messages "
+              f"({flooded['flood_sent'] / elapsed:.0f}/s), {kicked}")
+        print("  server dropped:", ", ".join(f"{k} {v:.0f}" for k, v in sorted(dropped.items())) or "none",
+              f"| coalesced updates: {m.get('monstergo_updates_coalesced_total', 0):.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+'''
+Benchmark: shared pre-serialized broadcast frames
+
+1000 clients spread over map.tmx; every tick a share of them moves. Encode
+CPU per broadcast tick for:
+- per client: every client's view encoded and UTF-8 encoded on its own
+- per view: one JSON text per distinct view (AOI grid), but still one
+  str -> bytes conversion per client inside websocket.send(str)
+- frame cache: server/frameCache.py, one bytes frame per view, cell rows
+  reused across ticks while nobody in the cell moves
+- python benchmarks/bench_frames.py [clients]
+'''
+import random
+import sys
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from server.frameCache import FrameCache, players_frame
+from server.playerHandler import PlayerHandler
+
+TILE_SIZE = 64
+TICKS = 60
+
+
+def map_size(path: Path) -> tuple[int, int]:
+    root = ET.parse(path).getroot()
+    return int(root.get("width")) * TILE_SIZE, int(root.get("height")) * TILE_SIZE
+
+
+def populate(n: int, width: int, height: int, rng: random.Random) -> tuple[PlayerHandler, list[int]]:
+    handler = PlayerHandler()
+    pids = []
+    for _ in range(n):
+        pid = handler.register()
+        handler.update(pid, rng.uniform(0, width), rng.uniform(0, height), "map.tmx", "down", False)
+        pids.append(pid)
+    return handler, pids
+
+
+def move(handler: PlayerHandler, pids: list[int], share: float, rng: random.Random) -> None:
+    for pid in rng.sample(pids, int(len(pids) * share)):
+        slot = handler._slots[pid]
+        handler.update(pid, handler._xs[slot] + rng.choice((-5.0, 5.0)), handler._ys[slot], "map.tmx", "right", True)
+
+
+def per_client(handler: PlayerHandler, pids: list[int], now: float) -> int:
+    total = 0
+    for view in handler.views_of(pids):
+        handler._fragments.clear()
+        total += len(players_frame(handler.encode_view(view), now).encode())
+    return total
+
+
+def per_view(handler: PlayerHandler, pids: list[int], now: float) -> int:
+    handler._fragments.clear()
+    views = handler.views_of(pids)
+    frames = {view: players_frame(text, now) for view, text in handler.encode_views(views).items()}
+    return sum(len(frames[view].encode()) for view in views)
+
+
+def frame_cache(cache: FrameCache, pids: list[int], now: float) -> int:
+    views = cache.player_handler.views_of(pids)
+    frames = cache.build(views, now)
+    return sum(len(frames[view]) for view in views)
+
+
+def run(step, handler: PlayerHandler, pids: list[int], share: float, seed: int) -> tuple[float, int]:
+    rng = random.Random(seed)
+    spent = 0.0
+    sent = 0
+    for _ in range(TICKS):
+        move(handler, pids, share, rng)
+        start = time.perf_counter()
+        sent += step(pids, time.time())
+        spent += time.perf_counter() - start
+    return spent / TICKS, sent // TICKS
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    width, height = map_size(ROOT / "assets" / "maps" / "map.tmx")
+
+    print(f"clients: {n} on map.tmx, {TICKS} ticks")
+    print(f"{'moving / tick':>14}{'per client ms':>16}{'per view ms':>14}{'frame cache ms':>17}{'KB / tick':>11}")
+    for share in (1.0, 0.25, 0.0):
+        results = []
+        for strategy in ("per_client", "per_view", "frame_cache"):
+            handler, pids = populate(n, width, height, random.Random(7))
+            if strategy == "per_client":
+                step = lambda p, now, h=handler: per_client(h, p, now)
+            elif strategy == "per_view":
+                step = lambda p, now, h=handler: per_view(h, p, now)
+            else:
+                cache = FrameCache(handler)
+                step = lambda p, now, c=cache: frame_cache(c, p, now)
+            results.append(run(step, handler, pids, share, seed=3))
+        print(f"{share:>14.0%}" + "".join(f"{ms * 1e3:>{w}.2f}" for (ms, _), w in zip(results, (16, 14, 17)))
+              + f"{results[-1][1] / 1024:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+'''
+Benchmark: server metrics endpoint during a bot run
+
+Starts server.py with --metrics-port, runs the bot swarm against it and
+scrapes /metrics once per second while the bots play:
+- per-second rates of messages, frames, bytes and chat taken from the scrapes
+- broadcast tick / encode time from the histograms
+- sanity checks: counters never go backwards, every bot shows up as a
+  connection, the histogram counts match the tick counter
+- cost of the disabled fast path (one attribute check per event)
+- python benchmarks/bench_metrics.py --clients 100 --duration 10
+'''
+import argparse
+import subprocess
+import sys
+import threading
+import time
+import timeit
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from server import botSwarm
+from server.metrics import ServerMetrics, parse_text
+
+
+def scrape(port: int) -> dict[str, float]:
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=2) as resp:
+        return parse_text(resp.read().decode("utf-8"))
+
+
+def histogram_quantile(sample: dict[str, float], name: str, q: float) -> float:
+    """Upper bound of the bucket holding quantile q"""
+    buckets = sorted(
+        (float(k.split('le="')[1].rstrip('"}')), v) for k, v in sample.items() if k.startswith(name + "_bucket")
+    )
+    total = sample.get(name + "_count", 0)
+    for bound, cumulative in buckets:
+        if total and cumulative >= q * total:
+            return bound
+    return float("nan")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=18989)
+    parser.add_argument("--metrics-port", type=int, default=19100)
+    args = parser.parse_args()
+
+    server = subprocess.Popen(
+        [sys.executable, "server.py", "--port", str(args.port), "--metrics-port", str(args.metrics_port)],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    failures: list[str] = []
+    try:
+        time.sleep(1.5)
+        swarm_args = botSwarm.parse_args([
+            "--url", f"ws://127.0.0.1:{args.port}", "--clients", str(args.clients),
+            "--duration", str(args.duration), "--update-rate", "20", "--chat-rate", "0.2",
+            "--save", str(ROOT / "saves" / "game0.json"),
+        ])
+        report: dict = {}
+        bots = threading.Thread(target=lambda: report.update(botSwarm.run(swarm_args)))
+        bots.start()
+
+        scrapes: list[tuple[float, dict[str, float]]] = []
+        while bots.is_alive():
+            scrapes.append((time.monotonic(), scrape(args.metrics_port)))
+            time.sleep(1.0)
+        bots.join()
+        scrapes.append((time.monotonic(), scrape(args.metrics_port)))
+    finally:
+        server.terminate()
+        server.wait()
+
+    # Counters must be monotonic between scrapes
+    for (_, a), (_, b) in zip(scrapes, scrapes[1:]):
+        for key, value in a.items():
+            if key.split("{")[0].endswith("_total") and b.get(key, 0) < value:
+                failures.append(f"{key} went backwards")
+
+    (t0, first), (t1, last) = scrapes[0], scrapes[-1]
+    peak_clients = max(s["monstergo_connected_clients"] for _, s in scrapes)
+    if last["monstergo_connections_total"] < args.clients:
+        failures.append(f"only {last['monstergo_connections_total']:.0f} connections for {args.clients} bots")
+    if last["monstergo_broadcast_tick_seconds_count"] != last["monstergo_broadcast_ticks_total"]:
+        failures.append("tick histogram count != tick counter")
+
+    def rate(key: str) -> float:
+        return (last.get(key, 0) - first.get(key, 0)) / (t1 - t0)
+
+    print(f"scrapes: {len(scrapes)}  peak connected clients: {peak_clients:.0f}")
+    for key in (
+        'monstergo_messages_received_total{type="player_update"}',
+        "monstergo_broadcast_ticks_total",
+        "monstergo_broadcast_frames_total",
+        "monstergo_broadcast_bytes_total",
+        "monstergo_chat_messages_total",
+    ):
+        print(f"  {key:58}{rate(key):>14.1f} /s")
+    for name in ("monstergo_broadcast_tick_seconds", "monstergo_broadcast_encode_seconds"):
+        mean = last[name + "_sum"] / max(1, last[name + "_count"])
+        print(f"  {name:58} mean {mean * 1e3:.2f} ms  p50 <= {histogram_quantile(last, name, .5) * 1e3:.2f} ms"
+              f"  p99 <= {histogram_quantile(last, name, .99) * 1e3:.2f} ms")
+    print(f"bots saw: {report['counters'].get('recv_players_update', 0)} players_update, "
+          f"{report['counters'].get('dropped', 0)} dropped")
+
+    metrics = ServerMetrics()
+    n = 1_000_000
+    guard = min(timeit.repeat("if m.enabled: m.chat_messages.inc()", globals={"m": metrics}, number=n, repeat=5))
+    metrics.enabled = True
+    inc = min(timeit.repeat("if m.enabled: m.chat_messages.inc()", globals={"m": metrics}, number=n, repeat=5))
+    print(f"per event: disabled {guard / n * 1e9:.0f} ns, enabled counter {inc / n * 1e9:.0f} ns")
+
+    if failures:
+        print("FAILED:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
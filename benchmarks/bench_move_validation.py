@@ -0,0 +1,143 @@
+'''
+Benchmark: server-side movement validation
+
+1000 players walk BFS paths over the real maps (server/mapGrid.py) at
+Player.speed, one update per 60 Hz tick each, through MoveValidator.check():
+- microseconds per validated update, and the share of one core needed
+  for 1000 players at 60 Hz
+- legit moves must never be rejected
+- cheats must be: speed hack, walking through a wall, switching map away
+  from a teleporter, landing away from the teleporter's arrival point,
+  jumping away from a shard handoff's landing, NaN / infinite coordinates
+- python benchmarks/bench_move_validation.py [players] [ticks]
+'''
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from server.mapGrid import TILE_SIZE, load_world
+from server.moveValidator import (PLAYER_SPEED, RETURN_OFFSETS, MoveValidator, REJECT_LANDING, REJECT_POSITION,
+                                  REJECT_SPEED, REJECT_TELEPORT, REJECT_WALL)
+
+TICK = 1 / 60
+
+
+class Walker:
+    def __init__(self, grid, rng: random.Random):
+        self.rng = rng
+        self.map_name = grid.name
+        tx, ty = grid.random_walkable(rng)
+        self.x, self.y = float(tx * TILE_SIZE), float(ty * TILE_SIZE)
+        self.path: list[tuple[int, int]] = []
+        self.exits: dict[str, tuple[float, float]] = {}
+
+    def step(self, world) -> None:
+        grid = world[self.map_name]
+        if not self.path:
+            tile = (int(self.x // TILE_SIZE), int(self.y // TILE_SIZE))
+            self.path = grid.find_path(tile, grid.random_walkable(self.rng), limit=2000)
+            return
+        tx, ty = self.path[0]
+        gx, gy = tx * TILE_SIZE, ty * TILE_SIZE
+        dx, dy = gx - self.x, gy - self.y
+        dist = (dx * dx + dy * dy) ** 0.5
+        move = PLAYER_SPEED * TICK
+        if dist <= move:
+            self.x, self.y = float(gx), float(gy)
+            self.path.pop(0)
+            destination = grid.teleporters.get((tx, ty))
+            if destination:
+                # Same as GameManager.try_switch_map: back where it left a map it has been on, else its spawn
+                self.exits[self.map_name] = (self.x, self.y)
+                if destination in self.exits:
+                    dx, dy = RETURN_OFFSETS.get(destination, (0.0, 0.0))
+                    x, y = self.exits[destination][0] + dx, self.exits[destination][1] + dy
+                else:
+                    x, y = world[destination].spawn[0] * TILE_SIZE, world[destination].spawn[1] * TILE_SIZE
+                self.map_name, self.x, self.y, self.path = destination, float(x), float(y), []
+        else:
+            self.x += dx / dist * move
+            self.y += dy / dist * move
+
+
+def cheats(world) -> list[tuple[str, str, str]]:
+    """(name, expected reason, actual reason)"""
+    results = []
+    grid = world["map.tmx"]
+    sx, sy = grid.spawn[0] * TILE_SIZE, grid.spawn[1] * TILE_SIZE
+    v = MoveValidator(world)
+
+    v.check(1, sx, sy, "map.tmx", 0.0)
+    results.append(("speed hack (+10 tiles in one tick)", REJECT_SPEED,
+                    v.check(1, sx + 10 * TILE_SIZE, sy, "map.tmx", TICK)))
+
+    # Find a wall tile next to a free one and step into it
+    for i, blocked in enumerate(grid.blocked):
+        tx, ty = i % grid.width, i // grid.width
+        if blocked and not grid.is_blocked(tx - 1, ty) and not grid.is_blocked(tx - 1, ty - 1) \
+                and not grid.is_blocked(tx - 1, ty + 1):
+            v.forget(2)
+            v.check(2, (tx - 1) * TILE_SIZE, ty * TILE_SIZE, "map.tmx", 0.0)
+            results.append(("walk into a wall", REJECT_WALL,
+                            v.check(2, (tx - 1) * TILE_SIZE + 4, ty * TILE_SIZE, "map.tmx", 1.0)))
+            break
+
+    v.check(3, sx, sy, "map.tmx", 0.0)
+    results.append(("switch map far from a teleporter", REJECT_TELEPORT, v.check(3, 0, 0, "gym.tmx", 1.0)))
+    # Step on the door to the gym, but come out on some other free tile of the gym
+    door = next((tx, ty) for (tx, ty), target in grid.teleporters.items() if target == "gym.tmx")
+    gym = world["gym.tmx"]
+    far = max(gym.walkable_tiles(), key=lambda t: abs(t[0] - gym.spawn[0]) + abs(t[1] - gym.spawn[1]))
+    v.check(5, door[0] * TILE_SIZE, door[1] * TILE_SIZE, "map.tmx", 0.0)
+    results.append(("teleport, land far from the arrival", REJECT_LANDING,
+                    v.check(5, far[0] * TILE_SIZE, far[1] * TILE_SIZE, "gym.tmx", TICK)))
+    # Handed over by another shard, then the first move is somewhere else
+    v.place(6, sx, sy, "map.tmx", 0.0)
+    results.append(("jump away from a handoff landing", REJECT_SPEED,
+                    v.check(6, sx + 10 * TILE_SIZE, sy, "map.tmx", TICK)))
+    results.append(("NaN position", REJECT_POSITION, v.check(4, float("nan"), sy, "map.tmx", 0.0)))
+    results.append(("infinite position", REJECT_POSITION, v.check(1, sx, float("inf"), "map.tmx", 1.0)))
+    return results
+
+
+def main() -> None:
+    players = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    ticks = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    world = load_world(ROOT / "saves" / "game0.json", ROOT / "assets" / "maps")
+    rng = random.Random(5)
+    names = sorted(world)
+    walkers = [Walker(world[rng.choice(names)], rng) for _ in range(players)]
+    validator = MoveValidator(world)
+
+    spent = 0.0
+    checks = 0
+    rejected: dict[str, int] = {}
+    for tick in range(ticks):
+        now = tick * TICK
+        for w in walkers:
+            w.step(world)
+        start = time.perf_counter()
+        for pid, w in enumerate(walkers):
+            reason = validator.check(pid, w.x, w.y, w.map_name, now)
+            if reason:
+                rejected[reason] = rejected.get(reason, 0) + 1
+        spent += time.perf_counter() - start
+        checks += players
+
+    per_update = spent / checks
+    print(f"players: {players}, ticks: {ticks} ({ticks * TICK:.0f}s of play), updates: {checks}")
+    print(f"validation: {per_update * 1e6:.2f} us / update, {spent / ticks * 1e3:.2f} ms / tick, "
+          f"{per_update * players * 60:.1%} of one core at 60 Hz")
+    print(f"legit moves rejected: {sum(rejected.values())} {rejected or ''}")
+    print("cheats:")
+    for name, expected, actual in cheats(world):
+        print(f"  {name:38} {'rejected (' + actual + ')' if actual else 'ACCEPTED'}"
+              f"{'' if actual == expected else '  <- expected ' + expected}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+'''
+Benchmark: OnlineManager under simulated network conditions
+
+Runs server.py behind server/netSim.py and drives two OnlineManagers the way
+GameScene does (60 updates per second from the main thread):
+- effective update latency: mover calls update(x) -> observer sees x
+  in get_list_players(), for several link profiles
+- reconnect behavior: the link is cut and new connections are refused
+  for a while; reports when OnlineManager._ws_main() retried, how long it
+  took to reconnect once the link came back, and whether the session was
+  resumed (same id, no ghost left in the observer's player list)
+- python benchmarks/bench_netsim.py
+'''
+import asyncio
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from server.netSim import NetConditions, NetSimProxy
+from src.utils import GameSettings
+
+SERVER_PORT = 18990
+PROXY_PORT = 18991
+PROFILES = {
+    "localhost": NetConditions(),
+    "wifi": NetConditions(latency=0.015, jitter=0.010),
+    "mobile": NetConditions(latency=0.060, jitter=0.040, bandwidth=64_000),
+    "bad": NetConditions(latency=0.150, jitter=0.100, bandwidth=16_000),
+}
+
+
+def percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else float("nan")
+
+
+def measure_latency(mover, observer, seconds: float) -> list[float]:
+    sent_at: dict[float, float] = {}
+    latencies: list[float] = []
+    end = time.monotonic() + seconds
+    step = 0
+    while time.monotonic() < end:
+        # Pace back and forth next to the observer (same AOI cell), every x distinct
+        step += 1
+        x = 100.0 + step % 256 + step * 1e-6
+        observer.update(100.0, 100.0, "map.tmx", "down", False)
+        if mover.update(x, 100.0, "map.tmx", "right", True):
+            sent_at[x] = time.monotonic()
+        for p in observer.get_list_players():
+            if p["id"] == mover.player_id and p["x"] in sent_at:
+                latencies.append(time.monotonic() - sent_at.pop(p["x"]))
+        time.sleep(1 / 60)
+    return latencies
+
+
+def wait_registered(manager, timeout: float) -> None:
+    end = time.monotonic() + timeout
+    while manager.player_id == -1 and time.monotonic() < end:
+        time.sleep(0.01)
+
+
+def wait_reconnected(proxy: NetSimProxy, connections: int, timeout: float) -> float | None:
+    start = time.monotonic()
+    while time.monotonic() - start < timeout:
+        if len(proxy.accepted) >= connections:
+            return time.monotonic() - start
+        time.sleep(0.01)
+    return None
+
+
+def main() -> None:
+    server = subprocess.Popen([sys.executable, "server.py", "--port", str(SERVER_PORT)], cwd=ROOT,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    loop = asyncio.new_event_loop()
+    proxy = NetSimProxy(PROXY_PORT, "127.0.0.1", SERVER_PORT, seed=1)
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    try:
+        time.sleep(1.5)
+        asyncio.run_coroutine_threadsafe(proxy.start(), loop).result()
+
+        from src.core.managers.online_manager import OnlineManager
+        GameSettings.ONLINE_SERVER_URL = f"http://127.0.0.1:{PROXY_PORT}"
+        mover, observer = OnlineManager(), OnlineManager()
+        mover.start()
+        observer.start()
+        wait_registered(mover, 10)
+        wait_registered(observer, 10)
+
+        print(f"{'profile':12}{'samples':>9}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}")
+        for name, conditions in PROFILES.items():
+            proxy.conditions = conditions
+            measure_latency(mover, observer, 1.0)  # let queues settle
+            lat = measure_latency(mover, observer, 5.0)
+            print(f"{name:12}{len(lat):>9}{percentile(lat, .5) * 1e3:>9.1f}"
+                  f"{percentile(lat, .9) * 1e3:>9.1f}{percentile(lat, .99) * 1e3:>9.1f}")
+
+        # Reconnect: cut the link and refuse connections for a while
+        proxy.conditions = NetConditions(refuse=True)
+        previous_id = mover.player_id
+        accepted = len(proxy.accepted)
+        cut = time.monotonic()
+        loop.call_soon_threadsafe(proxy.disconnect_all)
+        time.sleep(6)
+        proxy.set(refuse=False)
+        restored = wait_reconnected(proxy, accepted + 2, 40)
+        measure_latency(mover, observer, 1.0)
+        ghosts = [p["id"] for p in observer.get_list_players() if p["id"] != mover.player_id]
+
+        attempts = [t - cut for t in proxy.refused]
+        print("\nreconnect attempts while refused, both clients (s after cut):", " ".join(f"{a:.1f}" for a in attempts))
+        rounds = sorted({round(a, 1) for a in attempts})
+        print("gaps between retry rounds (s):", " ".join(f"{b - a:.1f}" for a, b in zip(rounds, rounds[1:])))
+        print("reconnected after link restored:", "never" if restored is None else f"{restored:.1f}s")
+        print(f"session resumed: {'yes' if mover.player_id == previous_id else 'no'} "
+              f"(id {previous_id} -> {mover.player_id}), ghosts seen by observer: {ghosts}")
+
+        mover.stop()
+        observer.stop()
+    finally:
+        asyncio.run_coroutine_threadsafe(proxy.stop(), loop).result(5)
+        loop.call_soon_threadsafe(loop.stop)
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+'''
+Benchmark: server player storage
+
+Compares the columnar PlayerHandler against the previous layout
+(a dict of @dataclass Player objects) at 10k players:
+- memory per player
+- list_players() snapshot build time
+- snapshot JSON encoding time
+- inactivity scan time
+- python benchmarks/bench_player_store.py [players]
+'''
+import json
+import random
+import sys
+import time
+import timeit
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from server.playerHandler import PlayerHandler, TIMEOUT_TIME
+
+MAPS = ["map.tmx", "gym.tmx", "store.tmx", "center.tmx"]
+DIRECTIONS = ["down", "up", "left", "right"]
+
+
+# Previous layout, kept here only as the baseline
+@dataclass
+class LegacyPlayer:
+    id: int
+    x: float
+    y: float
+    map: str
+    last_update: float
+    direction: str = "down"
+    is_moving: bool = False
+
+
+class LegacyHandler:
+    def __init__(self):
+        self.players = {}
+        self._next_id = 0
+
+    def register(self) -> int:
+        pid = self._next_id
+        self._next_id += 1
+        self.players[pid] = LegacyPlayer(pid, 0.0, 0.0, "", time.monotonic())
+        return pid
+
+    def update(self, pid, x, y, map_name, direction, is_moving) -> None:
+        p = self.players[pid]
+        p.x, p.y, p.map, p.direction, p.is_moving = x, y, map_name, direction, is_moving
+
+    def list_players(self) -> dict:
+        return {
+            p.id: {"id": p.id, "x": p.x, "y": p.y, "map": p.map,
+                   "direction": p.direction, "is_moving": p.is_moving}
+            for p in self.players.values()
+        }
+
+    def inactive(self, now: float) -> list[int]:
+        return [pid for pid, p in self.players.items() if now - p.last_update >= TIMEOUT_TIME]
+
+
+def populate(handler, n: int, rng: random.Random) -> None:
+    for _ in range(n):
+        pid = handler.register()
+        handler.update(
+            pid, rng.uniform(0, 4000), rng.uniform(0, 2500),
+            rng.choice(MAPS), rng.choice(DIRECTIONS), rng.random() < 0.5
+        )
+
+
+def measure_memory(factory, n: int) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    handler = factory()
+    populate(handler, n, random.Random(1))
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / n
+
+
+def best_of(func, repeat: int = 7) -> float:
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+
+    legacy = LegacyHandler()
+    populate(legacy, n, random.Random(1))
+    columnar = PlayerHandler()
+    populate(columnar, n, random.Random(1))
+    now = time.monotonic()
+
+    rows = [
+        ("bytes / player", measure_memory(LegacyHandler, n), measure_memory(PlayerHandler, n), "{:10.0f}"),
+        ("list_players() ms", best_of(legacy.list_players) * 1e3, best_of(columnar.list_players) * 1e3, "{:10.2f}"),
+        ("snapshot JSON ms", best_of(lambda: json.dumps(legacy.list_players())) * 1e3,
+         best_of(columnar.encode_players) * 1e3, "{:10.2f}"),
+        ("inactivity scan ms", best_of(lambda: legacy.inactive(now)) * 1e3,
+         best_of(lambda: columnar._inactive_slots(now)) * 1e3, "{:10.3f}"),
+    ]
+
+    print(f"players: {n}")
+    print(f"{'':22}{'dataclass':>10}{'columnar':>10}")
+    for name, old, new, fmt in rows:
+        print(f"{name:22}{fmt.format(old)}{fmt.format(new)}")
+
+
+if __name__ == "__main__":
+    main()
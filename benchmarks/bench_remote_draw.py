@@ -0,0 +1,115 @@
+'''
+Benchmark: drawing remote players
+
+50 and 200 remote players around the local player, about a quarter of them
+on screen. Per frame:
+- before: GameScene.draw() looped over every online player on the map and
+  drew every remote Entity inside that loop, O(n^2) blits
+- manager: RemotePlayerManager.draw(), each player once, off-screen skipped
+Also the cost of players joining and leaving (10% of them replaced per
+update): a new Entity (load, cut and scale the sprite sheet) per join vs
+RemotePlayerManager's pool.
+- SDL_VIDEODRIVER=dummy python benchmarks/bench_remote_draw.py
+'''
+import os
+import random
+import sys
+import time
+from pathlib import Path
+from types import MappingProxyType
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+os.chdir(ROOT)
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame as pg
+
+from src.utils import GameSettings
+
+FRAMES = 120
+CHURN_UPDATES = 60
+
+
+def make_players(ids: range | list[int], map_name: str, cx: float, cy: float, rng: random.Random) -> dict:
+    from src.core.managers.online_manager import RemotePlayer
+    # Spread over 2x2 screens around the camera centre: roughly 1/4 visible
+    w, h = GameSettings.SCREEN_WIDTH, GameSettings.SCREEN_HEIGHT
+    return {
+        pid: RemotePlayer(pid, cx + rng.uniform(-w, w), cy + rng.uniform(-h, h), map_name, "down", False)
+        for pid in ids
+    }
+
+
+def legacy_draw(screen: pg.Surface, camera, snapshot, remote_players: dict, map_name: str) -> None:
+    for player in snapshot.players.values():
+        if player.map == map_name:
+            for entity in remote_players.values():
+                entity.draw(screen, camera)
+
+
+def main() -> None:
+    pg.init()
+    screen = pg.display.set_mode((GameSettings.SCREEN_WIDTH, GameSettings.SCREEN_HEIGHT))
+
+    from src.core import GameManager
+    from src.core.managers.online_manager import PlayersSnapshot
+    from src.entities.remote_player_manager import RemotePlayerManager
+
+    game_manager = GameManager.load("saves/game0.json")
+    map_name = game_manager.current_map.path_name
+    camera = game_manager.player.camera
+    cx, cy = game_manager.player.position.x, game_manager.player.position.y
+    rng = random.Random(37)
+
+    print(f"draw ms per frame ({FRAMES} frames)")
+    print(f"{'players':>8} {'visible':>8} {'before':>9} {'manager':>9}")
+    for n in (50, 200):
+        snapshot = PlayersSnapshot(1, MappingProxyType(make_players(range(1, n + 1), map_name, cx, cy, rng)))
+        manager = RemotePlayerManager(game_manager)
+        manager.sync(snapshot, map_name, 0)
+        view = pg.Rect(camera.x, camera.y, screen.get_width(), screen.get_height())
+        visible = sum(view.colliderect(e.animation.rect) for e in manager.entities.values())
+
+        t0 = time.perf_counter()
+        for _ in range(FRAMES):
+            legacy_draw(screen, camera, snapshot, manager.entities, map_name)
+        before = (time.perf_counter() - t0) / FRAMES
+
+        t0 = time.perf_counter()
+        for _ in range(FRAMES):
+            manager.draw(screen, camera)
+        after = (time.perf_counter() - t0) / FRAMES
+        print(f"{n:>8} {visible:>8} {before * 1000:>9.3f} {after * 1000:>9.3f}")
+
+    print(f"\njoin/leave, 10% of players replaced per update, ms per update ({CHURN_UPDATES} updates)")
+    print(f"{'players':>8} {'new Entity':>11} {'pool':>9}")
+    for n in (50, 200):
+        churn = max(1, n // 10)
+        results = []
+        for pooled in (False, True):
+            players = make_players(range(1, n + 1), map_name, cx, cy, rng)
+            next_id = n + 1
+            manager = RemotePlayerManager(game_manager)
+            manager.sync(PlayersSnapshot(1, MappingProxyType(dict(players))), map_name, 0)
+            spent = 0.0
+            for version in range(2, CHURN_UPDATES + 2):
+                for pid in rng.sample(sorted(players), churn):
+                    del players[pid]
+                players.update(make_players(range(next_id, next_id + churn), map_name, cx, cy, rng))
+                next_id += churn
+                snapshot = PlayersSnapshot(version, MappingProxyType(dict(players)))
+                if not pooled:
+                    manager._pool.clear()
+                t0 = time.perf_counter()
+                manager.sync(snapshot, map_name, 0)
+                spent += time.perf_counter() - t0
+            results.append(spent / CHURN_UPDATES)
+        print(f"{n:>8} {results[0] * 1000:>11.3f} {results[1] * 1000:>9.3f}")
+
+    pg.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+'''
+Benchmark: remote player sync on the game thread
+
+200 remote players on the current map, one players_update per frame (the
+server broadcasts at 60 Hz). Main-thread time per frame spent bringing
+GameScene.remote_players in line with what the WebSocket thread received:
+- before: get_list_players() copies the list of dicts under the lock, and
+  every frame re-applies position, direction and animation of every player
+- snapshot: RemotePlayerManager.sync() reads players_snapshot without a
+  lock and only reconciles when its version changed; between versions only
+  the moving players' animations are advanced
+Two workloads: everybody standing still (identical frames) and 25% walking.
+Message parsing happens on the WebSocket thread and is not counted.
+- SDL_VIDEODRIVER=dummy python benchmarks/bench_remote_sync.py [players]
+'''
+import asyncio
+import json
+import os
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+os.chdir(ROOT)
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame as pg
+
+from src.utils import GameSettings, Direction
+from src.entities.entity import Entity
+
+FRAMES = 600
+DT = 1 / GameSettings.FPS
+
+
+def legacy_parse(data: dict, own_id: int) -> list[dict]:
+    """What OnlineManager stored per players_update before the snapshot"""
+    filtered = []
+    for pid_str, player_data in data["players"].items():
+        pid = int(pid_str)
+        if pid != own_id:
+            filtered.append({
+                "id": pid,
+                "x": float(player_data.get("x", 0)),
+                "y": float(player_data.get("y", 0)),
+                "map": str(player_data.get("map", "")),
+                "direction": str(player_data.get("direction", "down")),
+                "is_moving": bool(player_data.get("is_moving", False)),
+            })
+    return filtered
+
+
+def legacy_sync(scene, remote_players: dict, shared: dict, lock: threading.Lock, dt: float) -> None:
+    """GameScene's per-frame loop before the snapshot"""
+    with lock:
+        list_online = list(shared["players"])
+    current_map_name = scene.game_manager.current_map.path_name
+    valid_ids = set()
+    for p_data in list_online:
+        if p_data["map"] != current_map_name:
+            continue
+        pid = p_data["id"]
+        valid_ids.add(pid)
+        if pid not in remote_players:
+            remote_players[pid] = Entity(p_data["x"], p_data["y"], scene.game_manager, "character/ow1.png")
+        remote_ent = remote_players[pid]
+        remote_ent.position.x = p_data["x"]
+        remote_ent.position.y = p_data["y"]
+        d_str = p_data.get("direction", "down")
+        if d_str == "up": remote_ent.direction = Direction.UP
+        elif d_str == "down": remote_ent.direction = Direction.DOWN
+        elif d_str == "left": remote_ent.direction = Direction.LEFT
+        elif d_str == "right": remote_ent.direction = Direction.RIGHT
+        if p_data.get("is_moving", False):
+            remote_ent.update(dt)
+        else:
+            remote_ent.update(0)
+            remote_ent.animation.accumulator = 0
+    for pid in list(remote_players.keys()):
+        if pid not in valid_ids:
+            del remote_players[pid]
+
+
+def make_frames(n: int, map_name: str, moving_share: float, rng: random.Random) -> list[str]:
+    players = {
+        str(pid): {"x": rng.uniform(0, 3000), "y": rng.uniform(0, 3000), "map": map_name,
+                   "direction": rng.choice(("up", "down", "left", "right")), "is_moving": False}
+        for pid in range(1, n + 1)
+    }
+    walkers = rng.sample(sorted(players), int(n * moving_share))
+    for pid in walkers:
+        players[pid]["is_moving"] = True
+    frames = []
+    for i in range(FRAMES):
+        for pid in walkers:
+            players[pid]["x"] += 5.3
+        frames.append(json.dumps({"type": "players_update", "players": players, "timestamp": i * DT}))
+    return frames
+
+
+def run_snapshot(scene, frames: list[str], loop: asyncio.AbstractEventLoop) -> tuple[float, int]:
+    online = scene.online_manager
+    map_name = scene.game_manager.current_map.path_name
+    # Warm up: the Entities exist before the timed frames, like in run_legacy
+    loop.run_until_complete(online._handle_message(frames[0]))
+    scene.remote_players.clear()
+    scene.remote_players.sync(online.players_snapshot, map_name, DT)
+    start_version = online.players_snapshot.version
+    spent = 0.0
+    for message in frames:
+        # Stands in for the WebSocket thread
+        loop.run_until_complete(online._handle_message(message))
+        t0 = time.perf_counter()
+        scene.remote_players.sync(online.players_snapshot, map_name, DT)
+        spent += time.perf_counter() - t0
+    return spent / len(frames), online.players_snapshot.version - start_version
+
+
+def run_legacy(scene, remote_players: dict, frames: list[str], own_id: int) -> float:
+    shared = {"players": []}
+    lock = threading.Lock()
+    spent = 0.0
+    for message in frames:
+        shared["players"] = legacy_parse(json.loads(message), own_id)
+        t0 = time.perf_counter()
+        legacy_sync(scene, remote_players, shared, lock, DT)
+        spent += time.perf_counter() - t0
+    return spent / len(frames)
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    GameSettings.IS_ONLINE = True
+    pg.init()
+    pg.display.set_mode((GameSettings.SCREEN_WIDTH, GameSettings.SCREEN_HEIGHT))
+
+    from src.scenes.game_scene import GameScene
+    scene = GameScene()
+    online = scene.online_manager
+    online.player_id = 0
+    map_name = scene.game_manager.current_map.path_name
+    loop = asyncio.new_event_loop()
+    rng = random.Random(36)
+
+    print(f"{n} remote players on {map_name}, {FRAMES} frames, main-thread ms per frame")
+    print(f"{'workload':<12} {'before':>9} {'snapshot':>9} {'versions':>9}")
+    for label, share in (("idle", 0.0), ("25% moving", 0.25)):
+        frames = make_frames(n, map_name, share, rng)
+        # Warm up: create the Entities once so both runs measure steady state
+        remote_players: dict = {}
+        run_legacy(scene, remote_players, frames[:5], online.player_id)
+        before = run_legacy(scene, remote_players, frames, online.player_id)
+        after, versions = run_snapshot(scene, frames, loop)
+        print(f"{label:<12} {before * 1000:>9.3f} {after * 1000:>9.3f} {versions:>9}")
+
+    t0 = time.perf_counter()
+    for _ in range(1000):
+        online.get_list_players()
+    print(f"get_list_players() copy: {(time.perf_counter() - t0):.3f} ms per call")
+    loop.close()
+    pg.quit()
+
+
+if __name__ == "__main__":
+    main()
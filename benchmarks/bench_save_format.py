@@ -0,0 +1,100 @@
+'''
+Benchmark: JSON vs binary save files
+
+saves/game0.json with its bag grown to 600 monsters and 300 items (the
+monsters with a few moves each), written to a temporary directory as:
+- JSON: what GameManager.save writes for a .json path (indent=2)
+- binary: src/utils/save_format.py, what it writes for a .sav path
+For each, the file size, the time to write it, and the time to load it:
+- before: GameManager.load's old read (f.read() to check for an empty file,
+  seek, json.load)
+- read_file: one read; the binary loader checks every section's crc32
+Last, a flipped byte in the binary file has to be caught.
+- python benchmarks/bench_save_format.py [monsters] [items]
+'''
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from src.utils.codec import get_codec
+from src.utils.save_format import SaveFormatError, dumps, read_file
+
+REPEAT = 20
+
+
+def legacy_load(path: str) -> dict:
+    with open(path, "r") as f:
+        content = f.read()
+        if not content.strip():
+            raise json.JSONDecodeError("Empty file", "", 0)
+        f.seek(0)
+        return json.load(f)
+
+
+def big_save(monsters: int, items: int) -> dict:
+    with open(ROOT / "saves" / "game0.json") as f:
+        data = json.load(f)
+    with open(ROOT / "src" / "data" / "monsters.json", encoding="utf-8") as f:
+        names = list(json.load(f))
+    data["bag"]["monsters"] = [
+        {"name": names[i % len(names)], "level": 5 + i % 60, "hp": 40 + i % 90, "max_hp": 130,
+         "exp": i * 37, "sprite_path": f"menu_sprites/menusprite{1 + i % 16}.png",
+         "moves": ["Tackle", "Vine Whip", "Growl"][: 1 + i % 3]}
+        for i in range(monsters)
+    ]
+    data["bag"]["items"] = [
+        {"name": f"Item {i}", "count": 1 + i % 99, "sprite_path": "ingame_ui/potion.png"}
+        for i in range(items)
+    ]
+    return data
+
+
+def best_ms(fn) -> float:
+    best = float("inf")
+    for _ in range(REPEAT):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def main() -> None:
+    monsters = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+    items = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    data = big_save(monsters, items)
+    print(f"{monsters} monsters, {items} items, JSON codec for binary sections: {get_codec().name}")
+    print(f"{'format':<8}{'size KiB':>10}{'write ms':>10}{'load before ms':>16}{'read_file ms':>14}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, suffix, binary in (("JSON", ".json", False), ("binary", ".sav", True)):
+            path = os.path.join(tmp, "game0" + suffix)
+
+            def write() -> None:
+                with open(path, "wb") as f:
+                    f.write(dumps(data, binary))
+
+            write_ms = best_ms(write)
+            assert read_file(path) == data
+            before = f"{best_ms(lambda: legacy_load(path)):>16.2f}" if not binary else f"{'-':>16}"
+            print(f"{name:<8}{os.path.getsize(path) / 1024:>10.1f}{write_ms:>10.2f}{before}"
+                  f"{best_ms(lambda: read_file(path)):>14.2f}")
+
+        path = os.path.join(tmp, "game0.sav")
+        blob = bytearray(Path(path).read_bytes())
+        blob[len(blob) // 2] ^= 0x40
+        Path(path).write_bytes(bytes(blob))
+        try:
+            read_file(path)
+            print("corrupted binary save: NOT detected")
+        except SaveFormatError as e:
+            print(f"corrupted binary save: {e}")
+
+
+if __name__ == "__main__":
+    main()
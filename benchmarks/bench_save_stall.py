@@ -0,0 +1,120 @@
+'''
+Benchmark: main-thread stall of GameManager.save
+
+saves/game0.json with its bag grown to 600 monsters and 300 items, saved to a
+temporary directory twice a second from a 60 FPS loop that does 4 ms of work
+per frame. For each variant:
+- time the save() call itself keeps the main thread busy (median, max)
+- the longest frame of the run, which also shows the time the save thread
+  takes the GIL away from the game loop
+- before: json.dump(indent=2) + remove + rename on the main thread
+- after: to_dict() on the main thread, the rest on SaveManager's thread,
+  with fsync and os.replace
+Then 20 saves in one frame, to show that they are written once.
+- SDL_VIDEODRIVER=dummy python benchmarks/bench_save_stall.py [monsters] [items]
+'''
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+os.chdir(ROOT)
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame as pg
+
+from src.utils import Logger
+
+FRAMES = 300
+SAVE_EVERY = 30
+FRAME_WORK = 0.004
+
+
+def legacy_save(gm, path: str) -> None:
+    """GameManager.save before SaveManager"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(gm.to_dict(), f, indent=2)
+    if os.path.exists(path):
+        os.remove(path)
+    os.rename(tmp_path, path)
+
+
+def grow_bag(gm, monsters: int, items: int) -> None:
+    names = list(gm.monster_database) or ["Sproutkit"]
+    gm.bag._monsters_data = [
+        {"name": names[i % len(names)], "level": 5 + i % 60, "hp": 40 + i % 90, "max_hp": 130,
+         "exp": i * 37, "sprite_path": f"menu_sprites/menusprite{1 + i % 16}.png"}
+        for i in range(monsters)
+    ]
+    gm.bag._items_data = [
+        {"name": f"Item {i}", "count": 1 + i % 99, "sprite_path": "ingame_ui/potion.png"}
+        for i in range(items)
+    ]
+
+
+def run(save, done) -> tuple[list[float], float]:
+    """Per-save main-thread times and the longest frame"""
+    calls: list[float] = []
+    worst = 0.0
+    last = time.perf_counter()
+    for frame in range(FRAMES):
+        end = time.perf_counter() + FRAME_WORK
+        while time.perf_counter() < end:
+            pass
+        if frame % SAVE_EVERY == 0:
+            t0 = time.perf_counter()
+            save()
+            calls.append(time.perf_counter() - t0)
+        now = time.perf_counter()
+        worst = max(worst, now - last)
+        last = now
+    done()
+    return calls, worst
+
+
+def main() -> None:
+    monsters = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+    items = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    pg.init()
+    pg.display.set_mode((1, 1))
+    Logger.setLevel(logging.WARNING)
+
+    from src.core import GameManager
+    from src.core.services import save_manager
+    gm = GameManager.load("saves/game0.json")
+    grow_bag(gm, monsters, items)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "game0.json")
+        legacy_save(gm, path)
+        print(f"{monsters} monsters, {items} items, {os.path.getsize(path) / 1024:.0f} KiB save, "
+              f"{FRAMES // SAVE_EVERY} saves in {FRAMES} frames of {FRAME_WORK * 1000:.0f} ms work")
+        print(f"{'variant':<8}{'save() p50 ms':>15}{'max ms':>9}{'worst frame ms':>16}")
+        variants = [
+            ("before", lambda: legacy_save(gm, path), lambda: None),
+            ("after", lambda: gm.save(path), save_manager.flush),
+        ]
+        for name, save, done in variants:
+            calls, worst = run(save, done)
+            print(f"{name:<8}{statistics.median(calls) * 1000:>15.2f}{max(calls) * 1000:>9.2f}{worst * 1000:>16.2f}")
+
+        with open(path) as f:
+            assert len(json.load(f)["bag"]["monsters"]) == monsters
+
+        written = save_manager.saves_written
+        for _ in range(20):
+            gm.save(path)
+        save_manager.flush()
+        print(f"20 saves in one frame: {save_manager.saves_written - written} written")
+
+
+if __name__ == "__main__":
+    main()
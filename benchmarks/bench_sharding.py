@@ -0,0 +1,117 @@
+'''
+Benchmark: sharded server capacity
+
+Starts server.py in single-process mode and with several map shards, and runs
+the same bot swarm (server/botSwarm.py) against each at several client counts,
+with bots teleporting between all maps. players_update frames/s is capped by
+the fixed 60 Hz broadcast tick, so it says nothing about CPU. Instead:
+- server CPU: user + system time of the server and all its worker processes
+  (read from /proc, Linux only), per player_update the bots sent, and in cores
+  busy over the run
+- echo p99: player_update sent -> own position seen in players_update; it
+  grows once the processes that own the players run out of CPU
+- capacity: the most clients with echo p99 under --max-echo, per shard count
+Whether sharding scales across cores shows in the capacity column, and only on
+a host with more free cores than shards (the bots need CPU too, --bot-procs).
+- python benchmarks/bench_sharding.py --shards 0 1 2 4 --clients 100 200 400 800
+'''
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from server import botSwarm
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+def tree_cpu_seconds(root_pid: int) -> float:
+    """user + system CPU seconds of a process and all its descendants"""
+    stats: dict[int, tuple[int, float]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "rb") as f:
+                data = f.read().decode()
+        except OSError:
+            continue
+        fields = data[data.rindex(")") + 2:].split()
+        stats[int(entry)] = (int(fields[1]), (int(fields[11]) + int(fields[12])) / CLOCK_TICKS)
+    tree = {root_pid}
+    grew = True
+    while grew:
+        children = {pid for pid, (ppid, _) in stats.items() if ppid in tree and pid not in tree}
+        tree |= children
+        grew = bool(children)
+    return sum(stats[pid][1] for pid in tree if pid in stats)
+
+
+def run_once(shards: int, port: int, clients: int, bot_procs: int, rate: float, duration: float) -> dict:
+    server = subprocess.Popen(
+        [sys.executable, "server.py", "--port", str(port), "--shards", str(shards)],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        time.sleep(1.5 + 0.5 * shards)
+        args = botSwarm.parse_args([
+            "--url", f"ws://127.0.0.1:{port}", "--clients", str(clients), "--procs", str(bot_procs),
+            "--update-rate", str(rate), "--duration", str(duration), "--chat-rate", "0",
+            "--teleport-chance", "0.3", "--save", str(ROOT / "saves" / "game0.json"),
+        ])
+        cpu_before = tree_cpu_seconds(server.pid)
+        start = time.monotonic()
+        report = botSwarm.run(args)
+        report["server_cpu_s"] = tree_cpu_seconds(server.pid) - cpu_before
+        report["wall_s"] = time.monotonic() - start
+        return report
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, nargs="+", default=[100, 200, 400])
+    parser.add_argument("--shards", type=int, nargs="+", default=[0, 1, 2, 4])
+    parser.add_argument("--bot-procs", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--rate", type=float, default=20.0, help="player_update per second per client")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--max-echo", type=float, default=100.0, help="echo p99 bound in ms for the capacity")
+    parser.add_argument("--port", type=int, default=18989)
+    args = parser.parse_args()
+    if not os.path.isdir("/proc"):
+        raise SystemExit("needs /proc to read the server's CPU time")
+
+    print(f"cores: {os.cpu_count()}  bot processes: {args.bot_procs}  "
+          f"update rate: {args.rate:g}/s per client  bound: echo p99 <= {args.max_echo:g} ms")
+    print(f"{'shards':>8}{'clients':>9}{'updates/s':>11}{'CPU us/upd':>12}{'CPU cores':>11}"
+          f"{'echo p50':>10}{'echo p99':>10}{'dropped':>9}")
+    capacity: dict[int, int] = {}
+    run = 0
+    for shards in args.shards:
+        capacity[shards] = 0
+        for clients in args.clients:
+            r = run_once(shards, args.port + run * 10, clients, args.bot_procs, args.rate, args.duration)
+            run += 1
+            sent = r["counters"].get("sent_player_update", 0)
+            echo = r["latency_ms"].get("echo", {})
+            p50, p99 = echo.get("p50", float("nan")), echo.get("p99", float("nan"))
+            dropped = r["counters"].get("dropped", 0) + r["counters"].get("connect_errors", 0)
+            print(f"{shards:>8}{clients:>9}{sent / args.duration:>11.0f}"
+                  f"{r['server_cpu_s'] / max(sent, 1) * 1e6:>12.1f}{r['server_cpu_s'] / r['wall_s']:>11.2f}"
+                  f"{p50:>10.1f}{p99:>10.1f}{dropped:>9}")
+            if p99 <= args.max_echo and not dropped:
+                capacity[shards] = max(capacity[shards], clients)
+    print("\ncapacity (most clients within the bound, 0 = none of the tried counts)")
+    for shards, clients in capacity.items():
+        print(f"  {shards} shards: {clients}")
+
+
+if __name__ == "__main__":
+    main()
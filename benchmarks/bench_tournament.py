@@ -0,0 +1,51 @@
+'''
+Benchmark: parallel round-robin tournament
+
+Every trainer in trainers.json plus the player's bag from saves/game0.json,
+every ordered pair, 20000 games per matchup with a +-2 level spread.
+For 0 workers (in-process, no pool) and 1, 2, 4 ... up to os.cpu_count()
+worker processes:
+- wall seconds, including starting the pool and building StatTables
+  in every worker
+- battles/s, and battles/s per core (the scaling efficiency)
+The merged win counts have to be identical for every worker count and task
+size, since each matchup is seeded on its own.
+- python benchmarks/bench_tournament.py
+'''
+import logging
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+os.chdir(ROOT)
+
+from src.battle.tournament import player_entrant, run_tournament, trainer_entrants
+from src.utils import Logger
+
+GAMES = 20_000
+
+
+def main() -> None:
+    Logger.setLevel(logging.WARNING)
+    entrants = trainer_entrants() + [player_entrant("saves/game0.json")]
+    cores = os.cpu_count() or 1
+    counts = [0] + sorted({min(2 ** k, cores) for k in range(cores.bit_length() + 1)})
+    print(f"{len(entrants)} entrants, {GAMES} games per matchup, {cores} core(s)")
+    print(f"{'workers':>8}{'chunk':>7}{'battles':>11}{'wall s':>9}{'battles/s':>13}{'per core':>12}")
+    reference = None
+    for workers in counts:
+        for chunk in (1, 8):
+            result = run_tournament(entrants, GAMES, spread=2, seed=47, workers=workers, chunk=chunk)
+            rate = result.battles / result.wall_seconds
+            print(f"{workers:>8}{chunk:>7}{result.battles:>11,}{result.wall_seconds:>9.2f}"
+                  f"{rate:>13,.0f}{rate / result.workers:>12,.0f}")
+            if reference is None:
+                reference = result.wins
+            assert (result.wins == reference).all(), "results depend on the scheduling"
+    print("merged results identical for every worker count and chunk size")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,42 @@
+import argparse
 import asyncio
+import dataclasses
+import functools
 import json
+import math
 import time
 import threading
-from typing import Set, Any
-from server.playerHandler import PlayerHandler
+from typing import Callable, Dict, Any
+from server.chatChannels import GLOBAL_SCOPE, ChatBatcher, ChatScope, scope_for
+from server.compression import DEFAULT_PRESET, PRESETS, CompressionSettings, serve_options
+from server.frameCache import FrameCache
+from server.metrics import METRICS
+from server.moveValidator import MoveValidator
+from server.playerHandler import DIRECTIONS, PlayerHandler
+from server.rateLimit import MAX_MESSAGE_SIZE, MAX_QUEUE, ConnectionLimiter
+from server.sessions import SESSION_GRACE, SessionTokens
+from server.shardManager import ShardContext, ShardSupervisor, discover_maps, handoff_message, query_param
 
-from websockets.asyncio.server import serve
+from websockets.asyncio.server import broadcast, serve
 
 PORT = 8989
 
-PLAYER_HANDLER = PlayerHandler()
+# Only the maps in assets/maps get a map code; other names from clients are ignored
+PLAYER_HANDLER = PlayerHandler(discover_maps() or None)
 PLAYER_HANDLER.start()
+FRAMES = FrameCache(PLAYER_HANDLER)
+# Chat waiting for the next broadcast tick
+CHAT_BATCH = ChatBatcher(PLAYER_HANDLER)
+
+# Clients that have this much unsent data are skipped for a tick instead of
+# letting broadcast() pile more frames into their write buffer
+MAX_WRITE_BUFFER = 1 << 20
+
+# Set in shard worker processes (python server.py --shards N)
+SHARD: ShardContext | None = None
+SESSIONS = SessionTokens()
+# Loaded in main() unless the server runs with --trust-clients
+VALIDATOR: MoveValidator | None = None
 
 # ------------------------------
 # Simple in-memory chat storage
@@ -19,37 +45,53 @@ class ChatStore:
     def __init__(self) -> None:
         self._lock = threading.Lock()
         self._next_id = 1
-        self._messages: list[dict] = []
+        # (message, who may read it)
+        self._messages: list[tuple[dict, ChatScope]] = []
 
-    def add(self, sender_id: int, text: str) -> dict:
+    def add(self, sender_id: int, text: str, scope: ChatScope = GLOBAL_SCOPE) -> dict:
         # Sanitize
         t = (text or "").strip()
         if len(t) > 200:
             t = t[:200]
         if not t:
+            if METRICS.enabled:
+                METRICS.chat_rejected.inc()
             raise ValueError("empty")
+        if METRICS.enabled:
+            METRICS.chat_messages.inc()
+            METRICS.chat_bytes.inc(amount=len(t))
         with self._lock:
             msg = {
                 "id": self._next_id,
                 "from": sender_id,
                 "text": t,
                 "ts": time.time(),
+                "channel": scope.channel,
             }
-            self._messages.append(msg)
+            self._messages.append((msg, scope))
             self._next_id += 1
             # Keep only the last N to avoid unbounded growth
             if len(self._messages) > 1000:
                 self._messages = self._messages[-800:]
             return msg
 
-    def list_since(self, since_id: int) -> list[dict]:
+    def append(self, msg: dict, scope: ChatScope = GLOBAL_SCOPE) -> None:
+        """Store a message that already has an id (relayed from the front door in sharded mode)"""
+        with self._lock:
+            self._messages.append((msg, scope))
+            self._next_id = max(self._next_id, int(msg.get("id", 0)) + 1)
+            if len(self._messages) > 1000:
+                self._messages = self._messages[-800:]
+
+    def list_since(self, since_id: int, can_read: Callable[[ChatScope], bool] | None = None) -> list[dict]:
         with self._lock:
+            messages = [m for m, scope in self._messages if can_read is None or can_read(scope)]
             if since_id <= 0:
-                return list(self._messages[-100:])  # cap response size
+                return messages[-100:]  # cap response size
             # Find first index with id > since_id
             # Messages are appended in increasing id order
             out: list[dict] = []
-            for m in self._messages:
+            for m in messages:
                 if int(m.get("id", 0)) > since_id:
                     out.append(m)
             # Cap size
@@ -59,59 +101,236 @@ class ChatStore:
 
 CHAT = ChatStore()
 
-# Track connected clients
-CONNECTED_CLIENTS: Set[Any] = set()
+# Track connected clients (websocket -> player id)
+CONNECTED_CLIENTS: Dict[Any, int] = {}
 CLIENTS_LOCK = asyncio.Lock()
 
+# Which connection currently owns a player id; a resumed session takes it over
+PLAYER_OWNERS: dict[int, Any] = {}
+# Players whose connection dropped, waiting SESSION_GRACE seconds for a resume
+DETACHED: dict[int, asyncio.TimerHandle] = {}
+# Latest player_update per player, written to PLAYER_HANDLER once per tick
+PENDING_UPDATES: dict[int, tuple] = {}
+# When each player was last told to move back to its validated position
+LAST_CORRECTION: dict[int, float] = {}
+CORRECTION_INTERVAL = 0.25
+
+METRICS.gauge("monstergo_connected_clients", "Open WebSocket connections", lambda: len(CONNECTED_CLIENTS))
+METRICS.gauge("monstergo_players", "Registered players", PLAYER_HANDLER.count)
+
+
+async def relay_chat(msg: dict, scope: ChatScope) -> None:
+    """Chat from the front door (shard mode)"""
+    CHAT.append(msg, scope)
+    CHAT_BATCH.queue(msg, scope)
+
+
+def place_of(player_id: int) -> tuple[str, int]:
+    """(map name, AOI cell) of a player, ("", 0) before its first position"""
+    view = PLAYER_HANDLER.view_of(player_id)
+    if view is None:
+        return "", 0
+    return PLAYER_HANDLER.map_name(view[0]), view[1]
+
+
+def deliver_chat(groups: dict[Any, list], lagging: list[tuple[Any, Any]]) -> int:
+    """Send the chat queued since the last tick, one frame per view; returns the frames sent"""
+    chat_frames = CHAT_BATCH.build([*groups, *(view for _, view in lagging)])
+    sent = 0
+    for view, group in groups.items():
+        frame = chat_frames[view]
+        if frame is not None:
+            broadcast(group, frame, text=True)
+            sent += len(group)
+    # Clients skipped for position updates still get their chat
+    for client, view in lagging:
+        frame = chat_frames[view]
+        if frame is not None:
+            broadcast([client], frame, text=True)
+            sent += 1
+    return sent
+
+
+def send_correction(player_id: int, now: float) -> None:
+    """Tell a client whose move was rejected where the server thinks it is"""
+    last = VALIDATOR.last_position(player_id)
+    websocket = PLAYER_OWNERS.get(player_id)
+    if last is None or websocket is None or now - LAST_CORRECTION.get(player_id, 0.0) < CORRECTION_INTERVAL:
+        return
+    LAST_CORRECTION[player_id] = now
+    x, y, map_name = last
+    broadcast([websocket], json.dumps({
+        "type": "position_correction",
+        "x": x,
+        "y": y,
+        "map": map_name
+    }))
+
+
+def apply_update(player_id: int, update: tuple, now: float) -> None:
+    x, y, map_name, direction, is_moving = update
+    if VALIDATOR is not None:
+        reason = VALIDATOR.check(player_id, x, y, map_name, now)
+        if reason:
+            if METRICS.enabled:
+                METRICS.moves_rejected.inc(reason)
+            send_correction(player_id, now)
+            return
+    PLAYER_HANDLER.update(player_id, x, y, map_name, direction, is_moving)
+
+
+def apply_pending_updates() -> None:
+    updates = list(PENDING_UPDATES.items())
+    PENDING_UPDATES.clear()
+    now = time.monotonic()
+    for player_id, update in updates:
+        # One bad update must not stop the broadcast tick for everyone
+        try:
+            apply_update(player_id, update, now)
+        except Exception as e:
+            if METRICS.enabled:
+                METRICS.message_errors.inc("exception")
+            print(f"[Server] Dropped update of player {player_id}: {e!r}")
+
+
+def validate_handoff(player_id: int, x: float, y: float, map_name: str) -> bool:
+    """Check a move into another shard's map against this shard's track of the player"""
+    if VALIDATOR is None:
+        return True
+    now = time.monotonic()
+    # Positions still waiting for the tick come first, the teleporter has to be in reach of the last one
+    pending = PENDING_UPDATES.pop(player_id, None)
+    if pending is not None:
+        apply_update(player_id, pending, now)
+    reason = VALIDATOR.check(player_id, x, y, map_name, now)
+    if reason:
+        if METRICS.enabled:
+            METRICS.moves_rejected.inc(reason)
+        send_correction(player_id, now)
+        return False
+    return True
+
+
+def forget_player(player_id: int) -> None:
+    PENDING_UPDATES.pop(player_id, None)
+    LAST_CORRECTION.pop(player_id, None)
+    if VALIDATOR is not None:
+        VALIDATOR.forget(player_id)
+
 
 async def broadcast_player_update():
     """Broadcast player list to all connected clients periodically"""
     while True:
         await asyncio.sleep(0.0167)  # 60 updates per second
-        players = PLAYER_HANDLER.list_players()
-        message = {
-            "type": "players_update",
-            "players": players,
-            "timestamp": time.time()
-        }
-        msg_json = json.dumps(message)
-        # Broadcast to all connected clients
-        disconnected = set()
+        apply_pending_updates()
+        measure = METRICS.enabled
+        if measure:
+            tick_start = time.perf_counter()
         async with CLIENTS_LOCK:
-            for client in CONNECTED_CLIENTS:
-                try:
-                    await client.send(msg_json)
-                except Exception:
-                    disconnected.add(client)
-            # Remove disconnected clients
-            CONNECTED_CLIENTS.difference_update(disconnected)
+            clients = list(CONNECTED_CLIENTS.items())
+        # Each client only gets the players in the grid cells around it.
+        # Clients sharing a view (same map and cell) share one encoded frame.
+        views = PLAYER_HANDLER.views_of([player_id for _, player_id in clients])
+        frames = FRAMES.build(views, time.time())
+        if measure:
+            METRICS.encode_duration.observe(time.perf_counter() - tick_start)
+
+        groups: dict[Any, list] = {}
+        lagging: list[tuple[Any, Any]] = []
+        for (client, _), view in zip(clients, views):
+            transport = client.transport
+            if transport is not None and transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+                lagging.append((client, view))
+                continue
+            groups.setdefault(view, []).append(client)
+        for view, group in groups.items():
+            broadcast(group, frames[view], text=True)
+        chat_sent = deliver_chat(groups, lagging) if CHAT_BATCH else 0
+        skipped = len(lagging)
+
+        if measure:
+            METRICS.broadcast_ticks.inc()
+            METRICS.broadcast_frames.inc(amount=len(clients) - skipped)
+            METRICS.broadcast_bytes.inc(amount=sum(len(frames[view]) * len(group) for view, group in groups.items()))
+            METRICS.broadcast_skipped.inc(amount=skipped)
+            METRICS.chat_frames.inc(amount=chat_sent)
+            METRICS.broadcast_duration.observe(time.perf_counter() - tick_start)
+
+
+def message_label(msg_type: Any) -> str:
+    """Metric label for a client message type; anything unknown is "other" so clients cannot add labels"""
+    return msg_type if msg_type in ("player_update", "chat_send") else "other"
+
+
+def expire_session(player_id: int) -> None:
+    """Grace window over and nobody resumed the session"""
+    DETACHED.pop(player_id, None)
+    if player_id not in PLAYER_OWNERS:
+        forget_player(player_id)
+        PLAYER_HANDLER.unregister(player_id)
 
 
 async def handle_client(websocket: Any):
     """Handle a WebSocket client connection"""
     player_id = -1
-    
-    async with CLIENTS_LOCK:
-        CONNECTED_CLIENTS.add(websocket)
+    handed_off = False
+    limiter = ConnectionLimiter()
+    resume_id = SESSIONS.verify(query_param(websocket, "token"))
+
+    if SHARD is not None and resume_id is None:
+        # Shard workers only accept players handed over by the front door
+        await websocket.send(json.dumps({"type": "handoff", "url": SHARD.front_url(websocket)}))
+        await websocket.close()
+        return
     
     try:
-        # Register player on connection - server assigns ID
-        player_id = PLAYER_HANDLER.register()
+        # Register player on connection - server assigns ID, unless the client
+        # resumes a session this server still knows (or was handed over to us)
+        resumed = resume_id is not None and (resume_id in DETACHED or resume_id in PLAYER_OWNERS)
+        if resumed or (SHARD is not None and resume_id is not None):
+            player_id = PLAYER_HANDLER.register(resume_id)
+            timer = DETACHED.pop(player_id, None)
+            if timer is not None:
+                timer.cancel()
+        else:
+            player_id = PLAYER_HANDLER.register()
+        previous = PLAYER_OWNERS.get(player_id)
+        PLAYER_OWNERS[player_id] = websocket
+        if VALIDATOR is not None and not resumed:
+            # A resumed session keeps its track: the first move has to start where the
+            # server last saw the player. A shard handoff brings the landing the old shard
+            # accepted; only a fresh login is checked for walls alone
+            landing = SESSIONS.verify_landing(player_id, query_param(websocket, "landing"))
+            if landing is not None:
+                VALIDATOR.place(player_id, *landing, time.monotonic())
+            else:
+                VALIDATOR.forget(player_id)
+        if previous is not None:
+            # The old connection is dead but the server has not noticed yet
+            asyncio.create_task(previous.close())
+        async with CLIENTS_LOCK:
+            CONNECTED_CLIENTS[websocket] = player_id
+        if METRICS.enabled:
+            METRICS.connections.inc()
+            if resumed:
+                METRICS.sessions_resumed.inc()
+        # A client holding a valid token only needs the chat it missed
+        chat_since = query_param(websocket, "chat_since") if resume_id is not None else None
+        chat_since = int(chat_since) if chat_since and chat_since.isdigit() else 0
         await websocket.send(json.dumps({
             "type": "registered",
-            "id": player_id
+            "id": player_id,
+            "token": SESSIONS.issue(player_id),
+            "resumed": resumed,
+            "chat_since": chat_since
         }))
         
         # Send initial player list
-        players = PLAYER_HANDLER.list_players()
-        await websocket.send(json.dumps({
-            "type": "players_update",
-            "players": players,
-            "timestamp": time.time()
-        }))
+        await websocket.send(FRAMES.frame(PLAYER_HANDLER.view_of(player_id)), text=True)
         
-        # Send recent chat messages
-        recent_chat = CHAT.list_since(0)
+        # Send recent chat messages, the ones this player could have read
+        place = place_of(player_id)
+        recent_chat = CHAT.list_since(chat_since, lambda scope: scope.reaches(*place))
         await websocket.send(json.dumps({
             "type": "chat_update",
             "messages": recent_chat
@@ -120,80 +339,202 @@ async def handle_client(websocket: Any):
         # Handle incoming messages
         async for message in websocket:
             try:
+                # Flooded frames are dropped before paying for json.loads
+                if not limiter.allow_frame():
+                    if METRICS.enabled:
+                        METRICS.messages_dropped.inc("frame")
+                    if limiter.flooding():
+                        if METRICS.enabled:
+                            METRICS.flood_disconnects.inc()
+                        # A flooder usually is not reading either, so waiting for
+                        # the closing handshake would keep it around for close_timeout
+                        websocket.transport.abort()
+                        break
+                    continue
                 data = json.loads(message)
                 msg_type = data.get("type")
-                
+                if METRICS.enabled:
+                    METRICS.messages_in.inc(message_label(msg_type))
+                if not limiter.allow(msg_type):
+                    if METRICS.enabled:
+                        METRICS.messages_dropped.inc(message_label(msg_type))
+                    if msg_type == "chat_send" and limiter.notice_due():
+                        await websocket.send(json.dumps({
+                            "type": "error",
+                            "message": "rate_limited"
+                        }))
+                    continue
                 
                 if msg_type == "player_update":
                     # Update player position - use server-assigned ID, ignore client ID
                     x = float(data.get("x", 0))
                     y = float(data.get("y", 0))
                     map_name = str(data.get("map", ""))
+                    # json.loads accepts NaN / Infinity, which no tile or AOI cell can hold
+                    if not (math.isfinite(x) and math.isfinite(y)):
+                        if METRICS.enabled:
+                            METRICS.message_errors.inc("invalid_position")
+                        await websocket.send(json.dumps({
+                            "type": "error",
+                            "message": "invalid_position"
+                        }))
+                        continue
 
                     # checkpoint 3-3: Online Interaction 讀取方向和移動狀態
                     direction = str(data.get("direction", "down"))
                     is_moving = bool(data.get("is_moving", False))
+                    if direction not in DIRECTIONS:
+                        if METRICS.enabled:
+                            METRICS.message_errors.inc("invalid_direction")
+                        await websocket.send(json.dumps({
+                            "type": "error",
+                            "message": "invalid_direction"
+                        }))
+                        continue
+
+                    # Shard mode: the new map lives in another worker, hand the player over.
+                    # The teleporter and landing checks for the map change happen here, before
+                    # the handoff; the receiving worker starts its track at the landing.
+                    if SHARD is not None and not SHARD.owns(map_name):
+                        if not validate_handoff(player_id, x, y, map_name):
+                            continue
+                        landing = VALIDATOR.last_position(player_id) if VALIDATOR is not None else None
+                        await websocket.send(handoff_message(
+                            SHARD.url_for_map(websocket, map_name), SESSIONS.issue(player_id),
+                            SESSIONS.issue_landing(player_id, *landing) if landing is not None else None))
+                        await websocket.close()
+                        handed_off = True
+                        break
                     
                     # Use the server-assigned player_id, not client-provided
                     # HINT: This part might be helpful for direction change
                     # Maybe you can add other parameters? 
-                    PLAYER_HANDLER.update(player_id, x, y, map_name, direction, is_moving)
+                    # Only the latest update before the next tick is applied
+                    if player_id in PENDING_UPDATES and METRICS.enabled:
+                        METRICS.updates_coalesced.inc()
+                    PENDING_UPDATES[player_id] = (x, y, map_name, direction, is_moving)
                     
                 elif msg_type == "chat_send":
                     # Send chat message - use server-assigned ID
                     text = str(data.get("text", ""))
                     if text:
                         try:
-                            msg = CHAT.add(player_id, text)  # Use server-assigned ID
-                            # Broadcast to all clients
-                            chat_msg = {
-                                "type": "chat_update",
-                                "messages": [msg]
-                            }
-                            chat_json = json.dumps(chat_msg)
-                            async with CLIENTS_LOCK:
-                                disconnected = set()
-                                for client in CONNECTED_CLIENTS:
-                                    try:
-                                        await client.send(chat_json)
-                                    except Exception:
-                                        disconnected.add(client)
-                                CONNECTED_CLIENTS.difference_update(disconnected)
+                            scope = scope_for(data.get("channel"), *place_of(player_id))
+                            if SHARD is not None:
+                                # The front door assigns the id and relays it to every shard
+                                if not text.strip():
+                                    raise ValueError("empty")
+                                SHARD.publish_chat(player_id, text, scope)
+                            else:
+                                msg = CHAT.add(player_id, text, scope)  # Use server-assigned ID
+                                # Delivered with the next broadcast tick
+                                CHAT_BATCH.queue(msg, scope)
                         except ValueError:
+                            if METRICS.enabled:
+                                METRICS.message_errors.inc("empty_message")
                             await websocket.send(json.dumps({
                                 "type": "error",
                                 "message": "empty_message"
                             }))
                             
             except json.JSONDecodeError:
+                if METRICS.enabled:
+                    METRICS.message_errors.inc("invalid_json")
                 await websocket.send(json.dumps({
                     "type": "error",
                     "message": "invalid_json"
                 }))
             except Exception as e:
+                if METRICS.enabled:
+                    METRICS.message_errors.inc("exception")
                 await websocket.send(json.dumps({
                     "type": "error",
                     "message": str(e)
                 }))
                 
-    except Exception:
+    except Exception as e:
         print(f"[Server] Client handler error: {e}")
     finally:
         # Unregister player on disconnect
-        if player_id >= 0:
+        if player_id < 0 or PLAYER_OWNERS.get(player_id) is not websocket:
+            # A newer connection for the same id already took over
+            pass
+        elif handed_off:
+            PLAYER_OWNERS.pop(player_id, None)
+            forget_player(player_id)
             PLAYER_HANDLER.unregister(player_id)
+        else:
+            # Keep the player around for a while in case the client comes back
+            PLAYER_OWNERS.pop(player_id, None)
+            pending = PENDING_UPDATES.pop(player_id, None)
+            if pending is not None:
+                apply_update(player_id, pending, time.monotonic())
+            PLAYER_HANDLER.halt(player_id)
+            DETACHED[player_id] = asyncio.get_running_loop().call_later(
+                SESSION_GRACE, expire_session, player_id)
         async with CLIENTS_LOCK:
-            CONNECTED_CLIENTS.discard(websocket)
+            CONNECTED_CLIENTS.pop(websocket, None)
 
 
-async def main():
-    print(f"[Server] Running WebSocket server on ws://0.0.0.0:{PORT}")
+async def main(port: int = PORT, metrics_port: int = 0, validate_moves: bool = True,
+               compression: CompressionSettings = PRESETS[DEFAULT_PRESET]):
+    global VALIDATOR
+    print(f"[Server] Running WebSocket server on ws://0.0.0.0:{port}")
+    if validate_moves:
+        VALIDATOR = MoveValidator.load()
+    if metrics_port:
+        await METRICS.start(metrics_port)
+    if SHARD is not None:
+        SHARD.start_relay(asyncio.get_running_loop(), relay_chat)
     # Start broadcast task
     asyncio.create_task(broadcast_player_update())
     # Start server
-    async with serve(handle_client, "0.0.0.0", PORT):
+    async with serve(handle_client, "0.0.0.0", port, max_size=MAX_MESSAGE_SIZE, max_queue=MAX_QUEUE,
+                     **serve_options(compression)):
         await asyncio.Future()  # run forever
 
 
+def run_shard(index: int, count: int, base_port: int, assignment: dict[str, int], conn: Any,
+              session_secret: bytes, metrics_port: int = 0, validate_moves: bool = True,
+              compression: CompressionSettings = PRESETS[DEFAULT_PRESET]) -> None:
+    """Entry point of a shard worker process"""
+    global SHARD, SESSIONS
+    SHARD = ShardContext(index, count, base_port, assignment, conn, session_secret)
+    SESSIONS = SHARD.sessions
+    SHARD.exit_with_parent()
+    try:
+        # Every worker exposes its own metrics, next to its WebSocket port
+        asyncio.run(main(SHARD.port, metrics_port + 1 + index if metrics_port else 0, validate_moves, compression))
+    except KeyboardInterrupt:
+        pass
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Monster Go multiplayer server")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--shards", type=int, default=0,
+                        help="run N map worker processes behind a front door (0 = single process)")
+    parser.add_argument("--metrics-port", type=int, default=0,
+                        help="serve Prometheus metrics on localhost (0 = off; shard N uses port + 1 + N)")
+    parser.add_argument("--trust-clients", action="store_true",
+                        help="skip server-side speed / wall / teleporter checks on player_update")
+    parser.add_argument("--compression", choices=sorted(PRESETS), default=DEFAULT_PRESET,
+                        help="permessage-deflate settings (see server/compression.py)")
+    parser.add_argument("--compression-threshold", type=int, default=None,
+                        help="send frames shorter than this many bytes uncompressed")
+    args = parser.parse_args()
+    compression = PRESETS[args.compression]
+    if args.compression_threshold is not None:
+        compression = dataclasses.replace(compression, threshold=args.compression_threshold)
+
+    if args.shards > 0:
+        worker = functools.partial(run_shard, metrics_port=args.metrics_port, validate_moves=not args.trust_clients,
+                                   compression=compression)
+        supervisor = ShardSupervisor(args.shards, args.port, worker, CHAT)
+        supervisor.start()
+        try:
+            asyncio.run(supervisor.serve())
+        finally:
+            supervisor.stop()
+    else:
+        asyncio.run(main(args.port, args.metrics_port, not args.trust_clients, compression))
\ No newline at end of file
@@ -0,0 +1,397 @@
+import argparse
+import asyncio
+import json
+import multiprocessing as mp
+import random
+import time
+from pathlib import Path
+
+from websockets.asyncio.client import connect
+from websockets.exceptions import ConnectionClosed
+
+from server.mapGrid import DEFAULT_SAVE, TILE_SIZE, MapGrid, load_world
+
+"""
+Load generator for server.py.
+
+Spawns N simulated clients (optionally over several processes). Each bot
+registers like OnlineManager does, walks BFS paths between random legal tiles
+of the real TMX maps at player speed, sometimes heads for a teleporter and
+switches map, and chats at a configurable rate. Bots follow handoff messages,
+so the sharded server can be loaded the same way.
+
+Measured per run:
+- ping RTT             websocket ping -> pong
+- position echo        player_update sent -> own position seen in players_update
+- chat RTT             chat_send -> own message back in chat_update
+- message rates, bytes, reconnects and dropped connections
+- position corrections (moves the server's validator rejected); the bot
+  jumps to the corrected position and plans a new path from there
+
+    python -m server.botSwarm --clients 200 --duration 30
+    python -m server.botSwarm --clients 1000 --procs 4 --json report.json
+"""
+
+PLAYER_SPEED = 5 * TILE_SIZE  # src.entities.player.Player.speed
+WANDER_RADIUS = 10
+MAX_SAMPLES = 20000
+
+
+class Stats:
+    def __init__(self):
+        self.counters: dict[str, int] = {}
+        self.samples: dict[str, list[float]] = {"ping": [], "echo": [], "chat": []}
+        self._seen: dict[str, int] = {"ping": 0, "echo": 0, "chat": 0}
+        self._rng = random.Random(0)
+
+    def inc(self, name: str, amount: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def sample(self, kind: str, value: float) -> None:
+        # Reservoir sampling keeps memory bounded on long runs
+        self._seen[kind] += 1
+        bucket = self.samples[kind]
+        if len(bucket) < MAX_SAMPLES:
+            bucket.append(value)
+        else:
+            j = self._rng.randrange(self._seen[kind])
+            if j < MAX_SAMPLES:
+                bucket[j] = value
+
+    def to_dict(self) -> dict:
+        return {"counters": self.counters, "samples": self.samples}
+
+
+class Bot:
+    def __init__(self, index: int, world: dict[str, MapGrid], args: argparse.Namespace, stats: Stats):
+        self.index = index
+        self.world = world
+        self.args = args
+        self.stats = stats
+        self.rng = random.Random(args.seed * 100003 + index)
+
+        self.map_name = args.start_map if args.start_map in world else next(iter(world))
+        grid = world[self.map_name]
+        self.tile = grid.random_walkable(self.rng)
+        self.x = float(self.tile[0] * TILE_SIZE)
+        self.y = float(self.tile[1] * TILE_SIZE)
+        self.direction = "down"
+        self.path: list[tuple[int, int]] = []
+
+        self.player_id = -1
+        self._sent_positions: dict[tuple[float, float], float] = {}  # in send order
+        self._pending_chat: dict[str, float] = {}
+        self._chat_seq = 0
+
+    # ------------------------------
+    # Movement
+    # ------------------------------
+    def _pick_target(self) -> None:
+        grid = self.world[self.map_name]
+        if grid.teleporters and self.rng.random() < self.args.teleport_chance:
+            target = self.rng.choice(list(grid.teleporters))
+        else:
+            tx, ty = self.tile
+            target = (tx + self.rng.randint(-WANDER_RADIUS, WANDER_RADIUS),
+                      ty + self.rng.randint(-WANDER_RADIUS, WANDER_RADIUS))
+            if grid.is_blocked(*target):
+                return
+        self.path = grid.find_path(self.tile, target)
+
+    def _step(self, dt: float) -> bool:
+        """Advance along the path; returns True while moving"""
+        if not self.path:
+            self._pick_target()
+            if not self.path:
+                return False
+        budget = PLAYER_SPEED * dt
+        while budget > 0 and self.path:
+            tx, ty = self.path[0]
+            gx, gy = tx * TILE_SIZE, ty * TILE_SIZE
+            dx, dy = gx - self.x, gy - self.y
+            if abs(dx) > abs(dy):
+                self.direction = "right" if dx > 0 else "left"
+            elif dy:
+                self.direction = "down" if dy > 0 else "up"
+            dist = abs(dx) + abs(dy)
+            if dist <= budget:
+                self.x, self.y = float(gx), float(gy)
+                self.tile = (tx, ty)
+                self.path.pop(0)
+                budget -= dist
+                self._maybe_teleport()
+            else:
+                self.x += budget if dx > 0 else -budget if dx < 0 else 0
+                self.y += budget if dy > 0 else -budget if dy < 0 else 0
+                budget = 0
+        return True
+
+    def _maybe_teleport(self) -> None:
+        destination = self.world[self.map_name].teleporters.get(self.tile)
+        if destination is None or destination not in self.world:
+            return
+        self.map_name = destination
+        self.tile = self.world[destination].spawn
+        self.x = float(self.tile[0] * TILE_SIZE)
+        self.y = float(self.tile[1] * TILE_SIZE)
+        self.path = []
+        self.stats.inc("teleports")
+
+    def _correct(self, x: float, y: float, map_name: str) -> None:
+        """The server rejected a move: continue from where it put us"""
+        if map_name in self.world:
+            self.map_name = map_name
+        self.x, self.y = x, y
+        self.tile = (round(x / TILE_SIZE), round(y / TILE_SIZE))
+        self.path = []
+        # Positions sent before the correction are never echoed
+        self._sent_positions.clear()
+        self.stats.inc("corrections")
+
+    # ------------------------------
+    # Connection
+    # ------------------------------
+    async def run(self, url: str, deadline: float) -> None:
+        backoff = 0.5
+        while time.monotonic() < deadline:
+            self.stats.inc("connects")
+            try:
+                async with connect(url, max_size=None, ping_interval=None, open_timeout=10) as ws:
+                    backoff = 0.5
+                    handoff = await self._session(ws, deadline)
+                if handoff:
+                    self.stats.inc("handoffs")
+                    url = handoff
+                    continue
+                if time.monotonic() < deadline:
+                    self.stats.inc("dropped")
+                    url = self.args.url
+            except ConnectionClosed:
+                self.stats.inc("dropped")
+                url = self.args.url
+            except Exception:
+                self.stats.inc("connect_errors")
+                url = self.args.url
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 10.0)
+
+    async def _session(self, ws, deadline: float) -> str | None:
+        self.player_id = -1
+        registered = asyncio.Event()
+        tasks = [
+            asyncio.create_task(self._walker(ws, registered)),
+            asyncio.create_task(self._chatter(ws, registered)),
+            asyncio.create_task(self._pinger(ws)),
+        ]
+        try:
+            async with asyncio.timeout(max(0.0, deadline - time.monotonic())):
+                async for message in ws:
+                    handoff = self._on_message(message, registered)
+                    if handoff:
+                        return handoff
+        except TimeoutError:
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        return None
+
+    def _on_message(self, message: str | bytes, registered: asyncio.Event) -> str | None:
+        now = time.monotonic()
+        self.stats.inc("bytes_in", len(message))
+        data = json.loads(message)
+        kind = data.get("type", "unknown")
+        self.stats.inc(f"recv_{kind}")
+
+        if kind == "registered":
+            self.player_id = int(data.get("id", -1))
+            registered.set()
+        elif kind == "handoff":
+            return str(data.get("url"))
+        elif kind == "position_correction":
+            self._correct(float(data["x"]), float(data["y"]), str(data.get("map", self.map_name)))
+        elif kind == "players_update":
+            me = data.get("players", {}).get(str(self.player_id))
+            pos = (me.get("x"), me.get("y")) if me is not None else None
+            sent_at = self._sent_positions.get(pos)
+            if sent_at is not None:
+                self.stats.sample("echo", now - sent_at)
+                # Older positions can no longer be echoed
+                for old in list(self._sent_positions):
+                    del self._sent_positions[old]
+                    if old == pos:
+                        break
+        elif kind == "chat_update":
+            for m in data.get("messages", []):
+                if m.get("from") == self.player_id:
+                    sent_at = self._pending_chat.pop(m.get("text"), None)
+                    if sent_at is not None:
+                        self.stats.sample("chat", now - sent_at)
+        return None
+
+    async def _send(self, ws, payload: dict) -> None:
+        text = json.dumps(payload)
+        self.stats.inc("bytes_out", len(text))
+        self.stats.inc(f"sent_{payload['type']}")
+        await ws.send(text)
+
+    async def _walker(self, ws, registered: asyncio.Event) -> None:
+        await registered.wait()
+        interval = 1.0 / self.args.update_rate
+        last = time.monotonic()
+        while True:
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            moving = self._step(now - last)
+            last = now
+            pos = (self.x, self.y)
+            if pos not in self._sent_positions:
+                self._sent_positions[pos] = now
+                if len(self._sent_positions) > 240:
+                    del self._sent_positions[next(iter(self._sent_positions))]
+            await self._send(ws, {
+                "type": "player_update",
+                "x": self.x,
+                "y": self.y,
+                "map": self.map_name,
+                "direction": self.direction,
+                "is_moving": moving,
+            })
+
+    async def _chatter(self, ws, registered: asyncio.Event) -> None:
+        if self.args.chat_rate <= 0:
+            return
+        await registered.wait()
+        while True:
+            await asyncio.sleep(self.rng.expovariate(self.args.chat_rate))
+            self._chat_seq += 1
+            text = f"bot{self.index} #{self._chat_seq}"
+            self._pending_chat[text] = time.monotonic()
+            await self._send(ws, {"type": "chat_send", "text": text, "channel": self.args.chat_channel})
+
+    async def _pinger(self, ws) -> None:
+        while True:
+            await asyncio.sleep(self.args.ping_interval)
+            start = time.monotonic()
+            pong = await ws.ping()
+            await pong
+            self.stats.sample("ping", time.monotonic() - start)
+
+
+# ------------------------------
+# Process / report
+# ------------------------------
+def _run_process(args: argparse.Namespace, first: int, count: int, out: "mp.Queue") -> None:
+    world = load_world(Path(args.save))
+    stats = Stats()
+
+    async def main() -> None:
+        deadline = time.monotonic() + args.duration
+        bots = [Bot(first + i, world, args, stats) for i in range(count)]
+        tasks = []
+        for bot in bots:
+            tasks.append(asyncio.create_task(bot.run(args.url, deadline)))
+            # Spread the connection storm a little
+            await asyncio.sleep(args.ramp / max(1, args.clients))
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    out.put(stats.to_dict())
+
+
+def _percentile(values: list[float], q: float) -> float:
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def summarize(results: list[dict], args: argparse.Namespace) -> dict:
+    counters: dict[str, int] = {}
+    samples: dict[str, list[float]] = {}
+    for r in results:
+        for k, v in r["counters"].items():
+            counters[k] = counters.get(k, 0) + v
+        for k, v in r["samples"].items():
+            samples.setdefault(k, []).extend(v)
+
+    report = {
+        "clients": args.clients,
+        "processes": args.procs,
+        "duration_s": args.duration,
+        "counters": counters,
+        "rates_per_s": {
+            k: v / args.duration for k, v in counters.items() if k.startswith(("sent_", "recv_", "bytes_"))
+        },
+        "latency_ms": {},
+    }
+    for kind, values in samples.items():
+        report["latency_ms"][kind] = {
+            "count": len(values),
+            "p50": _percentile(values, 0.50) * 1e3,
+            "p90": _percentile(values, 0.90) * 1e3,
+            "p99": _percentile(values, 0.99) * 1e3,
+            "max": max(values) * 1e3 if values else float("nan"),
+        }
+    return report
+
+
+def print_report(report: dict) -> None:
+    print(f"clients: {report['clients']}  processes: {report['processes']}  duration: {report['duration_s']}s")
+    print("\nrates (/s)")
+    for k, v in sorted(report["rates_per_s"].items()):
+        print(f"  {k:28}{v:14.1f}")
+    print("\nlatency (ms)")
+    print(f"  {'':10}{'count':>8}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}")
+    for kind, s in report["latency_ms"].items():
+        print(f"  {kind:10}{s['count']:>8}{s['p50']:>10.1f}{s['p90']:>10.1f}{s['p99']:>10.1f}{s['max']:>10.1f}")
+    c = report["counters"]
+    print("\nconnections")
+    for k in ("connects", "handoffs", "teleports", "corrections", "dropped", "connect_errors"):
+        print(f"  {k:28}{c.get(k, 0):>14}")
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Simulated clients for server.py")
+    parser.add_argument("--url", default="ws://localhost:8989")
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--procs", type=int, default=1, help="bot processes")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--ramp", type=float, default=2.0, help="seconds to connect all clients")
+    parser.add_argument("--update-rate", type=float, default=60.0, help="player_update per second per bot")
+    parser.add_argument("--chat-rate", type=float, default=0.05, help="chat messages per second per bot")
+    parser.add_argument("--chat-channel", default="map", choices=("global", "map", "near"),
+                        help="channel the bots chat on")
+    parser.add_argument("--teleport-chance", type=float, default=0.1, help="chance a new walk targets a teleporter")
+    parser.add_argument("--ping-interval", type=float, default=1.0)
+    parser.add_argument("--start-map", default="map.tmx")
+    parser.add_argument("--save", default=str(DEFAULT_SAVE), help="save file for maps and teleporters")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="also write the report to this file")
+    return parser.parse_args(argv)
+
+
+def run(args: argparse.Namespace) -> dict:
+    out: mp.Queue = mp.Queue()
+    per_proc = [args.clients // args.procs + (1 if i < args.clients % args.procs else 0) for i in range(args.procs)]
+    procs = []
+    first = 0
+    for count in per_proc:
+        procs.append(mp.Process(target=_run_process, args=(args, first, count, out), daemon=True))
+        first += count
+    for p in procs:
+        p.start()
+    results = [out.get() for _ in procs]
+    for p in procs:
+        p.join()
+    return summarize(results, args)
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    result = run(arguments)
+    print_report(result)
+    if arguments.json:
+        with open(arguments.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
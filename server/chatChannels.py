@@ -0,0 +1,102 @@
+import json
+from typing import Any, Iterable, NamedTuple
+
+from server.playerHandler import cells_adjacent
+
+"""
+Chat channels and per-tick chat delivery.
+
+A chat_send names a channel:
+- "global": every connected player
+- "map": players on the sender's map (the default)
+- "near": players who can see the sender, i.e. whose 3x3 block of AOI cells
+  contains the sender's cell (the same area as players_update)
+
+Messages are not sent when they arrive. They wait in a ChatBatcher until the
+next broadcast tick, which sends each client one chat_update frame holding
+every new message it may see. Like players_update frames, chat frames are
+built per view (map, AOI cell) and shared by every client with that view, so
+a chat storm costs ticks x clients sends instead of messages x clients.
+"""
+
+CHANNEL_GLOBAL = "global"
+CHANNEL_MAP = "map"
+CHANNEL_NEAR = "near"
+CHANNELS = (CHANNEL_GLOBAL, CHANNEL_MAP, CHANNEL_NEAR)
+DEFAULT_CHANNEL = CHANNEL_MAP
+
+
+class ChatScope(NamedTuple):
+    """Who may read a message: the channel and where the sender stood when sending it"""
+    channel: str
+    map_name: str = ""
+    cell: int = 0
+
+    def reaches(self, map_name: str, cell: int) -> bool:
+        if self.channel == CHANNEL_GLOBAL:
+            return True
+        if map_name != self.map_name:
+            return False
+        return self.channel == CHANNEL_MAP or cells_adjacent(self.cell, cell)
+
+
+GLOBAL_SCOPE = ChatScope(CHANNEL_GLOBAL)
+
+
+def scope_for(channel: Any, map_name: str, cell: int) -> ChatScope:
+    """Scope of a chat_send; unknown channels get the default, players without a map yet talk globally"""
+    if channel not in CHANNELS:
+        channel = DEFAULT_CHANNEL
+    if channel == CHANNEL_GLOBAL or not map_name:
+        return GLOBAL_SCOPE
+    return ChatScope(channel, map_name, cell)
+
+
+def chat_frame(messages: list[dict]) -> bytes:
+    return json.dumps({"type": "chat_update", "messages": messages}).encode()
+
+
+class ChatBatcher:
+    _pending: list[tuple[dict, ChatScope]]
+
+    def __init__(self, player_handler: Any):
+        self.player_handler = player_handler
+        self._pending = []
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def queue(self, msg: dict, scope: ChatScope) -> None:
+        self._pending.append((msg, scope))
+
+    def build(self, views: Iterable) -> dict[Any, bytes | None]:
+        """
+        Take the queued messages: one chat_update frame per view (None when
+        nothing reaches it). Views that end up with the same messages, e.g.
+        everybody for global chat, share one encoded frame.
+        """
+        pending, self._pending = self._pending, []
+        everywhere = [i for i, (_, scope) in enumerate(pending) if scope.channel == CHANNEL_GLOBAL]
+        scoped = [(i, scope) for i, (_, scope) in enumerate(pending) if scope.channel != CHANNEL_GLOBAL]
+
+        by_subset: dict[tuple[int, ...], bytes] = {}
+        out: dict[Any, bytes | None] = {}
+        for view in views:
+            if view in out:
+                continue
+            if view is None or not scoped:
+                subset = everywhere
+            else:
+                map_code, cell = view
+                map_name = self.player_handler.map_name(map_code)
+                reached = [i for i, scope in scoped if scope.reaches(map_name, cell)]
+                subset = sorted(everywhere + reached) if everywhere and reached else everywhere or reached
+            if not subset:
+                out[view] = None
+                continue
+            key = tuple(subset)
+            frame = by_subset.get(key)
+            if frame is None:
+                frame = by_subset[key] = chat_frame([pending[i][0] for i in subset])
+            out[view] = frame
+        return out
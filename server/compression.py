@@ -0,0 +1,93 @@
+from dataclasses import dataclass
+from typing import Any, Sequence
+
+from websockets.extensions.base import Extension, ExtensionParameter
+from websockets.extensions.permessage_deflate import PerMessageDeflate, ServerPerMessageDeflateFactory
+from websockets.frames import Frame, Opcode
+
+"""
+permessage-deflate settings for the broadcast stream.
+
+players_update frames repeat almost everything from one tick to the next, so
+with context takeover and a window that holds the previous frame, deflate
+turns them into little more than a diff (see benchmarks/bench_compression.py):
+a 4 KB frame of 50 players compresses to ~130 bytes with a 32 KB window and
+to ~1 KB with the 4 KB window websockets uses by default. The price is memory
+per connection, (1 << (window_bits + 2)) + (1 << (mem_level + 9)) bytes for
+the compressor, and CPU for every frame sent, since broadcast() compresses per
+connection.
+
+Frames shorter than the threshold are sent uncompressed (RFC 7692 allows
+mixing both on one connection): they gain a few dozen bytes and still cost a
+full deflate call per client.
+
+    python server.py --compression broadcast --compression-threshold 128
+"""
+
+
+@dataclass(frozen=True)
+class CompressionSettings:
+    enabled: bool = True
+    context_takeover: bool = True
+    window_bits: int = 15           # server -> client, 9..15
+    client_window_bits: int = 10    # client -> server: small player_update / chat_send messages
+    mem_level: int = 6
+    level: int = 6
+    threshold: int = 128            # bytes; shorter frames go out uncompressed
+
+
+PRESETS = {
+    "off": CompressionSettings(enabled=False),
+    # What websockets negotiates when serve() is left alone, for comparison
+    "default": CompressionSettings(window_bits=12, client_window_bits=12, mem_level=5, level=6, threshold=0),
+    "broadcast": CompressionSettings(),
+}
+DEFAULT_PRESET = "broadcast"
+
+
+class ThresholdPerMessageDeflate(PerMessageDeflate):
+    """PerMessageDeflate that leaves short single-frame messages uncompressed"""
+
+    def __init__(self, *args: Any, threshold: int = 0, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.threshold = threshold
+
+    def encode(self, frame: Frame) -> Frame:
+        # Without RSV1 the peer does not inflate it, and the shared context is untouched
+        if frame.fin and frame.opcode in (Opcode.TEXT, Opcode.BINARY) and len(frame.data) < self.threshold:
+            return frame
+        return super().encode(frame)
+
+
+class ThresholdDeflateFactory(ServerPerMessageDeflateFactory):
+    def __init__(self, settings: CompressionSettings):
+        super().__init__(
+            server_no_context_takeover=not settings.context_takeover,
+            server_max_window_bits=settings.window_bits,
+            client_max_window_bits=settings.client_window_bits,
+            compress_settings={"memLevel": settings.mem_level, "level": settings.level},
+        )
+        self.threshold = settings.threshold
+
+    def process_request_params(
+        self,
+        params: Sequence[ExtensionParameter],
+        accepted_extensions: Sequence[Extension],
+    ) -> tuple[list[ExtensionParameter], PerMessageDeflate]:
+        response, ext = super().process_request_params(params, accepted_extensions)
+        return response, ThresholdPerMessageDeflate(
+            ext.remote_no_context_takeover,
+            ext.local_no_context_takeover,
+            ext.remote_max_window_bits,
+            ext.local_max_window_bits,
+            ext.compress_settings,
+            threshold=self.threshold,
+        )
+
+
+def serve_options(settings: CompressionSettings) -> dict[str, Any]:
+    """Keyword arguments for websockets serve()"""
+    if not settings.enabled:
+        return {"compression": None}
+    # compression=None stops serve() from adding its own default deflate factory
+    return {"compression": None, "extensions": [ThresholdDeflateFactory(settings)]}
@@ -0,0 +1,45 @@
+from typing import Any, Iterable
+
+"""
+players_update frames of the current broadcast tick.
+
+Clients are grouped by view (map, AOI cell). Each distinct view is encoded
+once per tick, straight to UTF-8 bytes, and every client with that view is
+sent the same bytes object with websockets.broadcast(..., text=True), so the
+library never re-encodes a str per connection either. Encoding cost grows
+with the number of distinct views, not with the number of clients.
+"""
+
+
+def players_frame(players_json: str, timestamp: float) -> str:
+    return '{"type": "players_update", "players": %s, "timestamp": %r}' % (players_json, timestamp)
+
+
+class FrameCache:
+    tick: int
+    timestamp: float
+    _frames: dict[Any, bytes]
+
+    def __init__(self, player_handler: Any):
+        self.player_handler = player_handler
+        self.tick = 0
+        self.timestamp = 0.0
+        self._frames = {}
+
+    def build(self, views: Iterable, timestamp: float) -> dict[Any, bytes]:
+        """Start a new tick: one encoded frame per distinct view"""
+        self.tick += 1
+        self.timestamp = timestamp
+        self._frames = {
+            view: players_frame(players_json, timestamp).encode()
+            for view, players_json in self.player_handler.encode_views(views).items()
+        }
+        return self._frames
+
+    def frame(self, view: Any) -> bytes:
+        """Frame of the current tick for a view, encoded on first use (e.g. a client that just joined)"""
+        data = self._frames.get(view)
+        if data is None:
+            data = players_frame(self.player_handler.encode_view(view), self.timestamp).encode()
+            self._frames[view] = data
+        return data
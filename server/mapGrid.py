@@ -0,0 +1,137 @@
+import json
+import random
+import xml.etree.ElementTree as ET
+from collections import deque
+from pathlib import Path
+
+"""
+Compact, pygame-free view of the TMX maps.
+
+Map._create_collision_map builds one pg.Rect per blocked tile; here the same
+layers (visible tile layers whose name contains "collision" or "house") become
+one byte per tile. Teleporters and spawn points come from a save file, the same
+way GameManager.from_dict reads them. Used by server-side tools that need to
+know where a player can stand without loading any images.
+"""
+
+MAPS_DIR = Path("assets/maps")
+DEFAULT_SAVE = Path("saves/game0.json")
+TILE_SIZE = 64
+
+_STEPS = ((0, -1), (0, 1), (-1, 0), (1, 0))
+
+
+def _layer_tiles(layer: ET.Element, width: int, height: int) -> list[int]:
+    data = layer.find("data")
+    if data is None or data.get("encoding") != "csv":
+        raise ValueError(f"Layer {layer.get('name')!r}: only CSV tile data is supported")
+    gids = [int(v) for v in data.text.replace("\n", "").split(",") if v.strip()]
+    if len(gids) != width * height:
+        raise ValueError(f"Layer {layer.get('name')!r}: expected {width * height} tiles, got {len(gids)}")
+    return gids
+
+
+class MapGrid:
+    name: str
+    width: int
+    height: int
+    blocked: bytearray
+    grass: bytearray
+    teleporters: dict[tuple[int, int], str]
+    spawn: tuple[int, int]
+
+    def __init__(self, name: str, width: int, height: int, blocked: bytearray, grass: bytearray):
+        self.name = name
+        self.width = width
+        self.height = height
+        self.blocked = blocked
+        self.grass = grass
+        self.teleporters = {}
+        self.spawn = (0, 0)
+
+    @classmethod
+    def load(cls, name: str, maps_dir: Path = MAPS_DIR) -> "MapGrid":
+        root = ET.parse(maps_dir / name).getroot()
+        width, height = int(root.get("width")), int(root.get("height"))
+        blocked = bytearray(width * height)
+        grass = bytearray(width * height)
+
+        for layer in root.iter("layer"):
+            if layer.get("visible") == "0":
+                continue
+            layer_name = (layer.get("name") or "").lower()
+            if "collision" in layer_name or "house" in layer_name:
+                target = blocked
+            elif "bush" in layer_name:
+                target = grass
+            else:
+                continue
+            for i, gid in enumerate(_layer_tiles(layer, width, height)):
+                if gid:
+                    target[i] = 1
+        return cls(name, width, height, blocked, grass)
+
+    def in_bounds(self, tx: int, ty: int) -> bool:
+        return 0 <= tx < self.width and 0 <= ty < self.height
+
+    def is_blocked(self, tx: int, ty: int) -> bool:
+        """Out-of-bounds tiles count as blocked"""
+        if not (0 <= tx < self.width and 0 <= ty < self.height):
+            return True
+        return self.blocked[ty * self.width + tx] == 1
+
+    def is_walkable(self, tx: int, ty: int) -> bool:
+        # Teleporters may sit on a door tile or just outside the map edge
+        return not self.is_blocked(tx, ty) or (tx, ty) in self.teleporters
+
+    def walkable_tiles(self) -> list[tuple[int, int]]:
+        w = self.width
+        return [(i % w, i // w) for i, b in enumerate(self.blocked) if not b]
+
+    def random_walkable(self, rng: random.Random) -> tuple[int, int]:
+        for _ in range(1000):
+            tx, ty = rng.randrange(self.width), rng.randrange(self.height)
+            if not self.is_blocked(tx, ty):
+                return tx, ty
+        return self.spawn
+
+    def find_path(self, start: tuple[int, int], goal: tuple[int, int], limit: int = 5000) -> list[tuple[int, int]]:
+        """BFS over walkable tiles, same 4-neighborhood as Player._bfs_find_path"""
+        if start == goal:
+            return []
+        if not self.is_walkable(*goal):
+            return []
+        parents: dict[tuple[int, int], tuple[int, int]] = {start: start}
+        queue = deque([start])
+        while queue and len(parents) < limit:
+            cx, cy = queue.popleft()
+            for dx, dy in _STEPS:
+                nxt = (cx + dx, cy + dy)
+                if nxt in parents or not self.is_walkable(*nxt):
+                    continue
+                parents[nxt] = (cx, cy)
+                if nxt == goal:
+                    path = [nxt]
+                    while path[-1] != start:
+                        path.append(parents[path[-1]])
+                    path.pop()
+                    path.reverse()
+                    return path
+                # Do not walk through a teleporter on the way somewhere else
+                if nxt not in self.teleporters:
+                    queue.append(nxt)
+        return []
+
+
+def load_world(save_path: Path = DEFAULT_SAVE, maps_dir: Path = MAPS_DIR) -> dict[str, MapGrid]:
+    """Every map referenced by a save, with its teleporters and spawn point"""
+    with open(save_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    world: dict[str, MapGrid] = {}
+    for entry in data["map"]:
+        grid = MapGrid.load(entry["path"], maps_dir)
+        grid.teleporters = {(int(t["x"]), int(t["y"])): t["destination"] for t in entry.get("teleport", [])}
+        player = entry.get("player") or {}
+        grid.spawn = (int(player.get("x", 0)), int(player.get("y", 0)))
+        world[grid.name] = grid
+    return world
@@ -0,0 +1,190 @@
+import math
+
+from server.mapGrid import TILE_SIZE, MapGrid, load_world
+
+"""
+Server-side movement checks for player_update.
+
+Uses the pygame-free collision grids from server/mapGrid.py and mirrors what
+Player.update allows on the client:
+- speed: at most Player.speed (5 tiles/s) since the last accepted position,
+  with a small movement budget so that updates bunched up by the network
+  are not punished, plus half a tile for _snap_to_grid after a collision
+- walls: the player's 64x64 rect may not overlap a collision/house tile,
+  at the new position or anywhere along the straight line to it
+- map changes: only through a teleporter of the old map that leads to the
+  new one and is within reach, landing where GameManager.try_switch_map puts
+  the player: back where it left that map (one tile lower on the overworld)
+  or on the map's spawn point. A landing anywhere else moves the track to
+  that arrival point, and the player is corrected onto it
+
+A fresh login's first position is only checked for walls, since there is
+nothing to compare it with. A resumed session keeps its track (server.py
+forgets it only when the session expires), and a shard handoff seeds the new
+shard's track with the landing the old shard accepted (place()). A map change
+into another shard is checked by the shard the player leaves, before the
+handoff. NaN / infinite coordinates are always rejected.
+"""
+
+PLAYER_SPEED = 5 * TILE_SIZE          # src.entities.player.Player.speed
+SPEED_TOLERANCE = 1.1
+MAX_BUDGET = PLAYER_SPEED * 0.5       # pixels of movement that can be saved up
+SNAP_SLACK = TILE_SIZE / 2            # Entity._snap_to_grid rounds to the nearest tile
+PATH_STEP = TILE_SIZE / 2
+
+OK = ""
+REJECT_SPEED = "speed"
+REJECT_WALL = "wall"
+REJECT_TELEPORT = "teleport"
+REJECT_MAP = "map"
+REJECT_POSITION = "position"
+REJECT_LANDING = "landing"
+
+# GameManager.try_switch_map: back on the overworld the player steps one tile down, off the door
+RETURN_OFFSETS = {"map.tmx": (0.0, float(TILE_SIZE))}
+
+
+def _tile_span(x: float, y: float) -> tuple[int, int, int, int]:
+    """Tiles overlapped by the half-open rect [x, x + 64) x [y, y + 64), like pg.Rect.colliderect"""
+    return (int(x // TILE_SIZE), int(y // TILE_SIZE),
+            math.ceil((x + TILE_SIZE) / TILE_SIZE) - 1, math.ceil((y + TILE_SIZE) / TILE_SIZE) - 1)
+
+
+class _Track:
+    __slots__ = ("x", "y", "map_name", "stamp", "budget", "span", "exits")
+
+    def __init__(self, x: float, y: float, map_name: str, stamp: float):
+        self.x = x
+        self.y = y
+        self.map_name = map_name
+        self.stamp = stamp
+        self.budget = MAX_BUDGET
+        self.span = _tile_span(x, y)
+        self.exits: dict[str, tuple[float, float]] = {}     # where the player last left each map
+
+    def move_to(self, x: float, y: float, map_name: str, stamp: float, budget: float) -> None:
+        if map_name != self.map_name:
+            self.exits[self.map_name] = (self.x, self.y)
+            self.map_name = map_name
+        self.x, self.y, self.stamp, self.budget = x, y, stamp, budget
+        self.span = _tile_span(x, y)
+
+
+class MoveValidator:
+    world: dict[str, MapGrid]
+    _tracks: dict[int, _Track]
+
+    def __init__(self, world: dict[str, MapGrid]):
+        self.world = world
+        self._tracks = {}
+
+    @classmethod
+    def load(cls) -> "MoveValidator":
+        return cls(load_world())
+
+    def last_position(self, pid: int) -> tuple[float, float, str] | None:
+        track = self._tracks.get(pid)
+        return None if track is None else (track.x, track.y, track.map_name)
+
+    def forget(self, pid: int) -> None:
+        self._tracks.pop(pid, None)
+
+    def place(self, pid: int, x: float, y: float, map_name: str, now: float) -> None:
+        """Start a track at a position vouched for elsewhere (the landing of a shard handoff)"""
+        self._tracks[pid] = _Track(x, y, map_name, now)
+
+    def _arrivals(self, track: _Track, map_name: str) -> list[tuple[float, float]]:
+        """Where the client can land on map_name, the one it would pick first"""
+        sx, sy = self.world[map_name].spawn
+        spawn = (float(sx * TILE_SIZE), float(sy * TILE_SIZE))
+        left = track.exits.get(map_name)
+        if left is None:
+            return [spawn]
+        dx, dy = RETURN_OFFSETS.get(map_name, (0.0, 0.0))
+        return [(left[0] + dx, left[1] + dy), spawn]
+
+    def _span_clear(self, grid: MapGrid, span: tuple[int, int, int, int]) -> bool:
+        tx0, ty0, tx1, ty1 = span
+        width = grid.width
+        if 0 <= tx0 and tx1 < width and 0 <= ty0 and ty1 < grid.height:
+            # Inside the map: read the bytes directly, only blocked tiles need the teleporter lookup
+            blocked = grid.blocked
+            for ty in range(ty0, ty1 + 1):
+                row = ty * width
+                for tx in range(tx0, tx1 + 1):
+                    if blocked[row + tx] and (tx, ty) not in grid.teleporters:
+                        return False
+            return True
+        for ty in range(ty0, ty1 + 1):
+            for tx in range(tx0, tx1 + 1):
+                if not grid.is_walkable(tx, ty):
+                    return False
+        return True
+
+    def _rect_clear(self, grid: MapGrid, x: float, y: float) -> bool:
+        return self._span_clear(grid, _tile_span(x, y))
+
+    def _path_clear(self, grid: MapGrid, x0: float, y0: float, x1: float, y1: float, distance: float) -> bool:
+        steps = int(distance // PATH_STEP)
+        for i in range(1, steps + 1):
+            t = i / (steps + 1)
+            if not self._rect_clear(grid, x0 + (x1 - x0) * t, y0 + (y1 - y0) * t):
+                return False
+        return self._rect_clear(grid, x1, y1)
+
+    def _teleporter_in_reach(self, track: _Track, grid: MapGrid, destination: str, reach: float) -> bool:
+        for (tx, ty), target in grid.teleporters.items():
+            if target != destination:
+                continue
+            # Distance the player rect still has to move to overlap the teleporter tile
+            dx = max(0.0, abs(track.x - tx * TILE_SIZE) - (TILE_SIZE - 1))
+            dy = max(0.0, abs(track.y - ty * TILE_SIZE) - (TILE_SIZE - 1))
+            if math.hypot(dx, dy) <= reach:
+                return True
+        return False
+
+    def check(self, pid: int, x: float, y: float, map_name: str, now: float) -> str:
+        """Validate a move and remember it if it is fine. Returns OK ("") or the reason it was rejected"""
+        if not (math.isfinite(x) and math.isfinite(y)):
+            return REJECT_POSITION
+        grid = self.world.get(map_name)
+        if grid is None:
+            return REJECT_MAP
+
+        track = self._tracks.get(pid)
+        if track is None:
+            if not self._rect_clear(grid, x, y):
+                return REJECT_WALL
+            self._tracks[pid] = _Track(x, y, map_name, now)
+            return OK
+
+        budget = min(MAX_BUDGET, track.budget + (now - track.stamp) * PLAYER_SPEED * SPEED_TOLERANCE)
+
+        if map_name != track.map_name:
+            old_grid = self.world.get(track.map_name)
+            if old_grid is None or not self._teleporter_in_reach(track, old_grid, map_name, budget + SNAP_SLACK):
+                return REJECT_TELEPORT
+            arrivals = self._arrivals(track, map_name)
+            if all(math.hypot(x - ax, y - ay) > SNAP_SLACK for ax, ay in arrivals):
+                # The teleport itself was fine: the player belongs on the arrival point, not here
+                ax, ay = arrivals[0]
+                track.move_to(ax, ay, map_name, now, budget)
+                return REJECT_LANDING
+            if not self._rect_clear(grid, x, y):
+                return REJECT_WALL
+            track.move_to(x, y, map_name, now, budget)
+            return OK
+
+        distance = math.hypot(x - track.x, y - track.y)
+        if distance > budget + SNAP_SLACK:
+            return REJECT_SPEED
+        span = _tile_span(x, y)
+        if distance >= PATH_STEP:
+            if not self._path_clear(grid, track.x, track.y, x, y, distance):
+                return REJECT_WALL
+        elif span != track.span and not self._span_clear(grid, span):
+            # Short step: only the end position matters, and only if it touches new tiles
+            return REJECT_WALL
+        track.x, track.y, track.stamp, track.span = x, y, now, span
+        track.budget = max(0.0, budget - distance)
+        return OK
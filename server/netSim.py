@@ -0,0 +1,213 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+from dataclasses import dataclass, fields
+
+"""
+Network condition simulator for local multiplayer testing.
+
+A TCP proxy that sits between OnlineManager (or the bot swarm) and server.py
+and delays, throttles or cuts the byte stream. It works below the WebSocket
+layer, so neither side needs to know it is there: point the client at the
+proxy port instead of the server port.
+
+Conditions can be changed while connections are open, either from code
+(proxy.set(latency=0.2), proxy.disconnect_all()) or from a script of timed
+steps:
+
+    [
+        {"at": 0,  "latency": 0.05, "jitter": 0.01},
+        {"at": 10, "bandwidth": 16000},
+        {"at": 20, "disconnect": true},
+        {"at": 21, "refuse": true},
+        {"at": 30, "refuse": false}
+    ]
+
+    python -m server.netSim --listen 8990 --upstream localhost:8989 --latency 100 --jitter 20
+    python -m server.netSim --listen 8990 --upstream localhost:8989 --script steps.json
+"""
+
+CHUNK_SIZE = 16384
+
+
+@dataclass
+class NetConditions:
+    latency: float = 0.0     # one-way delay in seconds
+    jitter: float = 0.0      # extra random delay, uniform in [0, jitter]
+    bandwidth: float = 0.0   # bytes per second per direction, 0 = unlimited
+    stall: bool = False      # hold all traffic without closing (black hole)
+    refuse: bool = False     # reject new connections
+
+
+class _Pipe:
+    """One direction of one connection"""
+
+    def __init__(self, proxy: "NetSimProxy", reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.proxy = proxy
+        self.reader = reader
+        self.writer = writer
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self._last_delivery = 0.0
+        self._link_free_at = 0.0
+
+    def _delivery_time(self, size: int) -> float:
+        c = self.proxy.conditions
+        now = time.monotonic()
+        # Serialization delay on a capped link
+        start = max(now, self._link_free_at)
+        if c.bandwidth > 0:
+            self._link_free_at = start + size / c.bandwidth
+            start = self._link_free_at
+        deliver = start + c.latency + (self.proxy.rng.uniform(0.0, c.jitter) if c.jitter > 0 else 0.0)
+        # TCP never reorders, so jitter can only push later chunks back
+        self._last_delivery = max(deliver, self._last_delivery)
+        return self._last_delivery
+
+    async def pump(self, source: asyncio.StreamReader) -> None:
+        try:
+            while data := await source.read(CHUNK_SIZE):
+                await self.queue.put((self._delivery_time(len(data)), data))
+        finally:
+            await self.queue.put((0.0, b""))
+
+    async def deliver(self) -> None:
+        while True:
+            at, data = await self.queue.get()
+            if not data:
+                break
+            delay = at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            while self.proxy.conditions.stall:
+                await asyncio.sleep(0.05)
+            self.writer.write(data)
+            await self.writer.drain()
+            self.proxy.bytes_forwarded += len(data)
+        self.writer.close()
+
+
+class NetSimProxy:
+    def __init__(self, listen_port: int, upstream_host: str, upstream_port: int,
+                 conditions: NetConditions | None = None, listen_host: str = "127.0.0.1", seed: int | None = None):
+        self.listen_host = listen_host
+        self.listen_port = listen_port
+        self.upstream_host = upstream_host
+        self.upstream_port = upstream_port
+        self.conditions = conditions or NetConditions()
+        self.rng = random.Random(seed)
+
+        self.accepted: list[float] = []   # monotonic time of every accepted connection
+        self.refused: list[float] = []    # ... and of every refused one
+        self.bytes_forwarded = 0
+        self._server: asyncio.AbstractServer | None = None
+        self._connections: set[tuple[asyncio.StreamWriter, asyncio.StreamWriter]] = set()
+
+    async def __aenter__(self) -> "NetSimProxy":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.stop()
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.listen_host, self.listen_port)
+
+    async def stop(self) -> None:
+        self.disconnect_all()
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def set(self, **changes) -> None:
+        for key, value in changes.items():
+            if not hasattr(self.conditions, key):
+                raise ValueError(f"Unknown condition: {key}")
+            setattr(self.conditions, key, value)
+
+    def disconnect_all(self) -> None:
+        """Cut every open connection, like a dropped link"""
+        for client_writer, server_writer in list(self._connections):
+            for w in (client_writer, server_writer):
+                transport = w.transport
+                if transport is not None:
+                    transport.abort()
+        self._connections.clear()
+
+    async def run_script(self, steps: list[dict]) -> None:
+        start = time.monotonic()
+        for step in sorted(steps, key=lambda s: s.get("at", 0)):
+            delay = start + float(step.get("at", 0)) - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            changes = {k: v for k, v in step.items() if k not in ("at", "disconnect")}
+            self.set(**changes)
+            if step.get("disconnect"):
+                self.disconnect_all()
+
+    async def _handle(self, client_reader: asyncio.StreamReader, client_writer: asyncio.StreamWriter) -> None:
+        if self.conditions.refuse:
+            self.refused.append(time.monotonic())
+            client_writer.transport.abort()
+            return
+        self.accepted.append(time.monotonic())
+        try:
+            server_reader, server_writer = await asyncio.open_connection(self.upstream_host, self.upstream_port)
+        except OSError:
+            client_writer.close()
+            return
+
+        pair = (client_writer, server_writer)
+        self._connections.add(pair)
+        up = _Pipe(self, client_reader, server_writer)
+        down = _Pipe(self, server_reader, client_writer)
+        try:
+            await asyncio.gather(
+                up.pump(client_reader), up.deliver(),
+                down.pump(server_reader), down.deliver(),
+                return_exceptions=True
+            )
+        finally:
+            self._connections.discard(pair)
+            for w in pair:
+                w.close()
+
+
+def _parse_bandwidth(text: str) -> float:
+    text = text.strip().lower()
+    scale = {"k": 1e3, "m": 1e6}.get(text[-1:], 1.0)
+    return float(text[:-1] if scale != 1.0 else text) * scale
+
+
+async def _main(args: argparse.Namespace) -> None:
+    host, _, port = args.upstream.rpartition(":")
+    conditions = NetConditions(
+        latency=args.latency / 1000.0,
+        jitter=args.jitter / 1000.0,
+        bandwidth=_parse_bandwidth(args.bandwidth),
+    )
+    async with NetSimProxy(args.listen, host or "localhost", int(port), conditions, args.host, args.seed) as proxy:
+        print(f"[NetSim] ws://{args.host}:{args.listen} -> {args.upstream}  "
+              + ", ".join(f"{f.name}={getattr(conditions, f.name)}" for f in fields(conditions)))
+        if args.script:
+            with open(args.script, "r", encoding="utf-8") as f:
+                await proxy.run_script(json.load(f))
+        await asyncio.Future()  # run forever
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latency / bandwidth / disconnect proxy for server.py")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--listen", type=int, default=8990)
+    parser.add_argument("--upstream", default="localhost:8989")
+    parser.add_argument("--latency", type=float, default=0.0, help="one-way ms")
+    parser.add_argument("--jitter", type=float, default=0.0, help="ms")
+    parser.add_argument("--bandwidth", default="0", help="bytes/s per direction, e.g. 64k (0 = unlimited)")
+    parser.add_argument("--script", help="JSON list of timed condition steps")
+    parser.add_argument("--seed", type=int)
+    try:
+        asyncio.run(_main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -1,65 +1,123 @@
+import json
+import math
 import threading
 import time
-from dataclasses import dataclass
-from typing import Dict
+from array import array
+from typing import Dict, Iterable
 
-from src.utils import Direction
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 TIMEOUT_TIME = 60.0
 CHECK_INTERVAL_TIME = 10.0
 
 """
-TODO:
-In this file, you'll probably need to add more parameters for the direction change of other players.
-We recommend you not change any part unless there is a 'HINT' above it.
+Player state is stored column-wise: one compact array per field, indexed by a
+slot number. A player id maps to a slot, and freed slots are recycled through a
+free-list, so the arrays never shrink and never need compaction.
+
+Compared to a dict of dataclasses this keeps every player to roughly half the memory,
+and lets whole-table passes (snapshot, inactivity check) walk flat memory
+instead of chasing one Python object per player.
 """
 
-# HINT: This class is used to store player information. Since you'll probably need to deal with direction, etc.
-# You can add other parameters if you need to.
-@dataclass
-class Player:
-    id: int
-    x: float
-    y: float
-    map: str
-    last_update: float
-    
-    # checkpoint 3-3: Online Interaction
-    direction: str = "down"
-    is_moving: bool = False
-
-    # HINT: This part might be helpful for direction change
-    # Maybe you can add other parameters? 
-    def update(self, x: float, y: float, map: str, direction: str = "down", is_moving: bool = False) -> None:
-        if x != self.x or y != self.y or map != self.map:
-            self.last_update = time.monotonic()
-        self.x = x
-        self.y = y
-        self.map = map
-        self.direction = direction
-        self.is_moving = is_moving
-
-    def is_inactive(self) -> bool:
-        now = time.monotonic()
-        return (now - self.last_update) >= TIMEOUT_TIME
+# Direction and map name are stored as small integer codes
+DIRECTIONS = ("down", "up", "left", "right")
+_DIRECTION_CODES = {name: code for code, name in enumerate(DIRECTIONS)}
+_DIRECTIONS_JSON = tuple(json.dumps(d) for d in DIRECTIONS)
+_BOOL_JSON = ("false", "true")
+
+# Map names come from clients, so the name table is closed: only the maps of the
+# world (known_maps), or at most MAX_MAP_NAMES names when the world is not given.
+# Codes live in an array("H") column, which must never see more than 65536 of them.
+MAX_MAP_NAMES = 1024
+
+# Bit flags
+FLAG_ACTIVE = 1
+FLAG_MOVING = 2
+
+# Area of interest: a grid cell is half a screen plus one 64 px sprite (11 x 7
+# tiles on a 1280 x 720 window). The camera is centered on the player's position
+# and not clamped to the map (Entity.camera), so it shows positions up to half a
+# screen away, and a sprite whose top-left is up to 64 px further left / up can
+# still be partly on screen. With the extra sprite in the cell size, the 3x3
+# block of cells around the player's cell covers all of them.
+AOI_CELL_WIDTH = 11 * 64
+AOI_CELL_HEIGHT = 7 * 64
+_CELL_OFFSET = 1 << 15
+_CELL_STRIDE = 1 << 16
+_NEIGHBOR_OFFSETS = tuple(dx * _CELL_STRIDE + dy for dx in (-1, 0, 1) for dy in (-1, 0, 1))
+
+
+def cell_of(x: float, y: float) -> int:
+    """Pack the grid cell of a pixel position into one int"""
+    cx = min(max(int(x // AOI_CELL_WIDTH), -_CELL_OFFSET), _CELL_OFFSET - 1)
+    cy = min(max(int(y // AOI_CELL_HEIGHT), -_CELL_OFFSET), _CELL_OFFSET - 1)
+    return (cx + _CELL_OFFSET) * _CELL_STRIDE + (cy + _CELL_OFFSET)
+
+
+def cells_adjacent(a: int, b: int) -> bool:
+    """Whether two packed cells are the same or touch, i.e. b is in the 3x3 block around a"""
+    return abs(a // _CELL_STRIDE - b // _CELL_STRIDE) <= 1 and abs(a % _CELL_STRIDE - b % _CELL_STRIDE) <= 1
 
 
 class PlayerHandler:
     _lock: threading.Lock
     _stop_event: threading.Event
     _thread: threading.Thread | None
-    
-    players: Dict[int, Player]
+
+    # Columns (one entry per slot)
+    _ids: array
+    _xs: array
+    _ys: array
+    _dirs: array
+    _flags: array
+    _maps: array
+    _last_update: array
+    _cells: array
+
+    # map code -> cell -> slots in that cell
+    _grid: Dict[int, Dict[int, set[int]]]
+    # (map code, cell) -> JSON rows of its players, dropped when any of them changes
+    _fragments: Dict[tuple[int, int], str]
+    _slots: Dict[int, int]      # player id -> slot
+    _free: list[int]            # recycled slots
+    _map_names: list[str]       # map code -> map name
+    _map_codes: Dict[str, int]  # map name -> map code
+    _map_json: list[str]        # map code -> JSON-quoted map name
+    _map_names_closed: bool     # True: unknown names are rejected instead of added
     _next_id: int
 
-    def __init__(self):
+    def __init__(self, known_maps: Iterable[str] | None = None):
         self._lock = threading.Lock()
         self._stop_event = threading.Event()
         self._thread = None
-        
-        self.players = {}
+
+        self._ids = array("q")
+        self._xs = array("d")
+        self._ys = array("d")
+        self._dirs = array("B")
+        self._flags = array("B")
+        self._maps = array("H")
+        self._last_update = array("d")
+        self._cells = array("q")
+        self._grid = {}
+        self._fragments = {}
+
+        self._slots = {}
+        self._free = []
+        self._map_names = [""]
+        self._map_codes = {"": 0}
+        self._map_json = ['""']
+        self._map_names_closed = False
         self._next_id = 0
-        
+        if known_maps is not None:
+            for name in known_maps:
+                self._map_code(str(name))
+            self._map_names_closed = True
+
     # Threading
     def start(self) -> None:
         if self._thread and self._thread.is_alive():
@@ -75,56 +133,257 @@ class PlayerHandler:
 
     def _cleaner(self) -> None:
         while not self._stop_event.wait(CHECK_INTERVAL_TIME):
-            now = time.monotonic()
-            to_remove: list[int] = []
             with self._lock:
-                for pid, p in list(self.players.items()):
-                    if now - p.last_update >= TIMEOUT_TIME:
-                        to_remove.append(pid)
-                for pid in to_remove:
-                    _ = self.players.pop(pid, None)
-                    
+                for slot in self._inactive_slots(time.monotonic()):
+                    self._release(slot)
+
+    def _inactive_slots(self, now: float) -> list[int]:
+        """Slots of active players whose last movement is older than TIMEOUT_TIME"""
+        if np is not None and self._flags:
+            # Zero-copy views over the columns; they are dropped before returning
+            # so the arrays can grow again.
+            flags = np.frombuffer(self._flags, dtype=np.uint8)
+            last = np.frombuffer(self._last_update, dtype=np.float64)
+            mask = ((flags & FLAG_ACTIVE) != 0) & ((now - last) >= TIMEOUT_TIME)
+            slots = np.flatnonzero(mask).tolist()
+            del flags, last, mask
+            return slots
+        return [
+            slot for slot, (flags, last) in enumerate(zip(self._flags, self._last_update))
+            if flags & FLAG_ACTIVE and now - last >= TIMEOUT_TIME
+        ]
+
+    # Slot management (caller holds the lock)
+    def _allocate(self, pid: int, now: float) -> int:
+        if self._free:
+            slot = self._free.pop()
+            self._ids[slot] = pid
+            self._xs[slot] = 0.0
+            self._ys[slot] = 0.0
+            self._dirs[slot] = 0
+            self._flags[slot] = FLAG_ACTIVE
+            self._maps[slot] = 0
+            self._last_update[slot] = now
+            self._cells[slot] = cell_of(0.0, 0.0)
+        else:
+            slot = len(self._ids)
+            self._ids.append(pid)
+            self._xs.append(0.0)
+            self._ys.append(0.0)
+            self._dirs.append(0)
+            self._flags.append(FLAG_ACTIVE)
+            self._maps.append(0)
+            self._last_update.append(now)
+            self._cells.append(cell_of(0.0, 0.0))
+        self._slots[pid] = slot
+        self._grid_add(slot)
+        return slot
+
+    def _release(self, slot: int) -> None:
+        pid = self._ids[slot]
+        self._grid_remove(slot)
+        self._flags[slot] = 0
+        self._ids[slot] = -1
+        self._slots.pop(pid, None)
+        self._free.append(slot)
+
+    def _grid_add(self, slot: int) -> None:
+        self._fragments.pop((self._maps[slot], self._cells[slot]), None)
+        cells = self._grid.setdefault(self._maps[slot], {})
+        cells.setdefault(self._cells[slot], set()).add(slot)
+
+    def _grid_remove(self, slot: int) -> None:
+        self._fragments.pop((self._maps[slot], self._cells[slot]), None)
+        cells = self._grid.get(self._maps[slot])
+        if cells is None:
+            return
+        members = cells.get(self._cells[slot])
+        if members is not None:
+            members.discard(slot)
+            if not members:
+                del cells[self._cells[slot]]
+
+    def _map_code(self, map_name: str) -> int | None:
+        """Code of a map name, None for a name that is not accepted"""
+        code = self._map_codes.get(map_name)
+        if code is None:
+            if self._map_names_closed or len(self._map_names) >= MAX_MAP_NAMES:
+                return None
+            code = len(self._map_names)
+            self._map_names.append(map_name)
+            self._map_codes[map_name] = code
+            self._map_json.append(json.dumps(map_name))
+        return code
+
     # API
-    def register(self) -> int:
+    def register(self, pid: int | None = None) -> int:
+        """Register a new player. An explicit pid is used when a player is handed over from another shard"""
         with self._lock:
-            pid = self._next_id
-            self._next_id += 1
-            # HINT: This part might be helpful for direction change
-            # Maybe you can add other parameters? 
-            self.players[pid] = Player(pid, 0.0, 0.0, "", time.monotonic())
+            if pid is None:
+                pid = self._next_id
+                self._next_id += 1
+            elif pid in self._slots:
+                return pid
+            else:
+                self._next_id = max(self._next_id, pid + 1)
+            self._allocate(pid, time.monotonic())
             return pid
 
     def unregister(self, pid: int) -> bool:
         """Remove a player from the system"""
         with self._lock:
-            if pid in self.players:
-                del self.players[pid]
-                return True
-            return False
+            slot = self._slots.get(pid)
+            if slot is None:
+                return False
+            self._release(slot)
+            return True
 
     def update(self, pid: int, x: float, y: float, map_name: str, direction: str = "down", is_moving: bool = False) -> bool:
         with self._lock:
-            p = self.players.get(pid)
-            if not p:
+            slot = self._slots.get(pid)
+            if slot is None:
                 return False
-            else:
-                # HINT: This part might be helpful for direction change
-                # Maybe you can add other parameters? 
-                p.update(float(x), float(y), str(map_name), str(direction), bool(is_moving))
-                return True
+            x = float(x)
+            y = float(y)
+            if not (math.isfinite(x) and math.isfinite(y)):
+                return False
+            direction_code = _DIRECTION_CODES.get(str(direction))
+            if direction_code is None:
+                return False
+            map_code = self._map_code(str(map_name))
+            if map_code is None:
+                return False
+            # Only real movement keeps the player alive, same as before
+            if x != self._xs[slot] or y != self._ys[slot] or map_code != self._maps[slot]:
+                self._last_update[slot] = time.monotonic()
+                # Move between grid cells only when the cell actually changes
+                cell = cell_of(x, y)
+                if cell != self._cells[slot] or map_code != self._maps[slot]:
+                    self._grid_remove(slot)
+                    self._maps[slot] = map_code
+                    self._cells[slot] = cell
+                    self._grid_add(slot)
+            flags = FLAG_ACTIVE | FLAG_MOVING if is_moving else FLAG_ACTIVE
+            if (x != self._xs[slot] or y != self._ys[slot]
+                    or direction_code != self._dirs[slot] or flags != self._flags[slot]):
+                # Standing still keeps the cached rows of the cell valid
+                self._fragments.pop((self._maps[slot], self._cells[slot]), None)
+                self._xs[slot] = x
+                self._ys[slot] = y
+                self._dirs[slot] = direction_code
+                self._flags[slot] = flags
+            return True
+
+    def halt(self, pid: int) -> bool:
+        """Show a player standing still (its connection dropped, the session may still resume)"""
+        with self._lock:
+            slot = self._slots.get(pid)
+            if slot is None:
+                return False
+            if self._flags[slot] & FLAG_MOVING:
+                self._fragments.pop((self._maps[slot], self._cells[slot]), None)
+                self._flags[slot] &= ~FLAG_MOVING
+            return True
+
+    def count(self) -> int:
+        with self._lock:
+            return len(self._slots)
+
+    def _columns(self) -> tuple[list, ...]:
+        # tolist() unboxes each column in C, which beats indexing the arrays
+        return (self._ids.tolist(), self._xs.tolist(), self._ys.tolist(),
+                self._dirs.tolist(), self._flags.tolist(), self._maps.tolist())
 
     def list_players(self) -> dict:
         with self._lock:
+            map_names = self._map_names
             player_list = {}
-            for p in self.players.values():
-                # HINT: This part might be helpful for direction change
-                # Maybe you can add other parameters? 
-                player_list[p.id] = {
-                    "id": p.id,
-                    "x": p.x,
-                    "y": p.y,
-                    "map": p.map,
-                    "direction": p.direction,
-                    "is_moving": p.is_moving
+            for pid, x, y, d, flags, m in zip(*self._columns()):
+                if not flags & FLAG_ACTIVE:
+                    continue
+                player_list[pid] = {
+                    "id": pid,
+                    "x": x,
+                    "y": y,
+                    "map": map_names[m],
+                    "direction": DIRECTIONS[d],
+                    "is_moving": bool(flags & FLAG_MOVING)
                 }
-            return player_list
\ No newline at end of file
+            return player_list
+
+    def view_of(self, pid: int) -> tuple[int, int] | None:
+        """(map code, cell) a player is looking at, used to share one snapshot per view"""
+        with self._lock:
+            slot = self._slots.get(pid)
+            if slot is None:
+                return None
+            return self._maps[slot], self._cells[slot]
+
+    def map_name(self, map_code: int) -> str:
+        """Name behind a map code of view_of(); codes are only meaningful inside this process"""
+        return self._map_names[map_code]
+
+    def views_of(self, pids: list[int]) -> list[tuple[int, int] | None]:
+        with self._lock:
+            slots = self._slots
+            maps, cells = self._maps, self._cells
+            return [(maps[slot], cells[slot]) if (slot := slots.get(pid)) is not None else None for pid in pids]
+
+    def _encode_row(self, slot: int) -> str:
+        pid = self._ids[slot]
+        return '"%d": {"id": %d, "x": %r, "y": %r, "map": %s, "direction": %s, "is_moving": %s}' % (
+            pid, pid, self._xs[slot], self._ys[slot], self._map_json[self._maps[slot]],
+            _DIRECTIONS_JSON[self._dirs[slot]], _BOOL_JSON[self._flags[slot] >> 1 & 1]
+        )
+
+    def encode_views(self, views) -> dict:
+        """
+        JSON text of the players in the 3x3 cells around each view.
+        Every cell is encoded once and the fragments are shared between the
+        views that overlap it, so the cost stays close to one row per player.
+        Fragments are kept until a player in the cell changes, so cells where
+        nobody moved cost nothing on the next tick.
+        """
+        out: dict = {}
+        with self._lock:
+            fragments = self._fragments
+            for view in views:
+                if view in out:
+                    continue
+                if view is None:
+                    out[view] = "{}"
+                    continue
+                map_code, cell = view
+                cells = self._grid.get(map_code, {})
+                parts = []
+                for offset in _NEIGHBOR_OFFSETS:
+                    key = cell + offset
+                    members = cells.get(key)
+                    if not members:
+                        continue
+                    fragment = fragments.get((map_code, key))
+                    if fragment is None:
+                        fragment = ", ".join(self._encode_row(slot) for slot in members)
+                        fragments[(map_code, key)] = fragment
+                    parts.append(fragment)
+                out[view] = "{" + ", ".join(parts) + "}"
+        return out
+
+    def encode_view(self, view: tuple[int, int] | None) -> str:
+        """JSON text of the players in the 3x3 cells around a view"""
+        return self.encode_views((view,))[view]
+
+    def encode_players(self) -> str:
+        """
+        JSON text of list_players(), written straight from the columns.
+        Skips building one dict per player just to throw it away in json.dumps.
+        """
+        with self._lock:
+            map_json = self._map_json
+            parts = [
+                '"%d": {"id": %d, "x": %r, "y": %r, "map": %s, "direction": %s, "is_moving": %s}'
+                % (pid, pid, x, y, map_json[m], _DIRECTIONS_JSON[d], _BOOL_JSON[flags >> 1 & 1])
+                for pid, x, y, d, flags, m in zip(*self._columns())
+                if flags & FLAG_ACTIVE
+            ]
+            return "{" + ", ".join(parts) + "}"
@@ -0,0 +1,95 @@
+import time
+
+"""
+Per-connection inbound rate limits.
+
+Every connection gets one token bucket for raw frames, checked before the frame
+is even parsed, and one per message type after parsing. A well-behaved client
+(OnlineManager sends at most 60 player_update per second and chat by hand)
+never gets near the limits; a flooding client has its excess dropped without
+touching the game state.
+
+Position updates are not applied when they arrive: the latest one per player
+is kept until the next broadcast tick (see server.py), so a burst of updates
+costs one write to the player table no matter how many frames it was.
+"""
+
+# message type -> (tokens per second, burst)
+FRAME_LIMIT = (150.0, 100.0)
+MESSAGE_LIMITS = {
+    "player_update": (90.0, 30.0),
+    "chat_send": (2.0, 5.0),
+}
+OTHER_LIMIT = (10.0, 20.0)
+
+# A client that keeps flooding after being limited is disconnected: this many
+# dropped frames within FLOOD_WINDOW seconds
+FLOOD_CLOSE_DROPS = 1000
+FLOOD_WINDOW = 5.0
+
+# Read buffering handed to websockets.serve(): frames larger than MAX_MESSAGE_SIZE
+# close the connection, and once MAX_QUEUE frames are waiting the server stops
+# reading the socket, so TCP pushes back on the sender
+MAX_MESSAGE_SIZE = 64 * 1024
+MAX_QUEUE = 16
+
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "stamp")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.stamp = time.monotonic()
+
+    def allow(self, now: float) -> bool:
+        tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        if tokens < 1.0:
+            self.tokens = tokens
+            return False
+        self.tokens = tokens - 1.0
+        return True
+
+
+class ConnectionLimiter:
+    def __init__(self):
+        self.frames = TokenBucket(*FRAME_LIMIT)
+        self._buckets: dict[str, TokenBucket] = {}
+        self.dropped = 0
+        self._last_notice = 0.0
+        self._window_start = time.monotonic()
+        self._window_drops = 0
+
+    def allow_frame(self) -> bool:
+        now = time.monotonic()
+        if self.frames.allow(now):
+            return True
+        self.dropped += 1
+        if now - self._window_start > FLOOD_WINDOW:
+            self._window_start = now
+            self._window_drops = 0
+        self._window_drops += 1
+        return False
+
+    def flooding(self) -> bool:
+        return self._window_drops >= FLOOD_CLOSE_DROPS
+
+    def allow(self, msg_type: str) -> bool:
+        key = msg_type if msg_type in MESSAGE_LIMITS else "other"
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(*MESSAGE_LIMITS.get(key, OTHER_LIMIT))
+        if bucket.allow(time.monotonic()):
+            return True
+        self.dropped += 1
+        return False
+
+    def notice_due(self) -> bool:
+        """Tell the client it is being limited at most once per second"""
+        now = time.monotonic()
+        if now - self._last_notice < 1.0:
+            return False
+        self._last_notice = now
+        return True
@@ -0,0 +1,59 @@
+import hashlib
+import hmac
+import math
+import os
+
+"""
+Resumable sessions.
+
+On "registered" the server hands the client a token, "<player id>.<signature>".
+A client that reconnects with ?token=... gets the same player id back, and if
+the old connection dropped less than SESSION_GRACE seconds ago, the same
+position too, instead of leaving a ghost behind until the 60 s timeout.
+?chat_since=<last chat id> limits the chat backlog to messages it has not seen.
+A shard handoff adds ?landing=<x>,<y>,<map>.<signature>, the position the old
+shard validated, so the new shard checks the first move against it.
+
+Tokens are stateless: the signature is an HMAC of the id with a secret that
+lives as long as the server process (shared by all shards). A server restart
+simply invalidates every token and clients register from scratch.
+"""
+
+SESSION_GRACE = 15.0
+_SIGNATURE_LENGTH = 32
+
+
+class SessionTokens:
+    def __init__(self, secret: bytes | None = None):
+        self.secret = secret or os.urandom(16)
+
+    def _sign(self, text: str) -> str:
+        return hmac.new(self.secret, text.encode(), hashlib.sha256).hexdigest()[:_SIGNATURE_LENGTH]
+
+    def issue(self, player_id: int) -> str:
+        return f"{player_id}.{self._sign(str(player_id))}"
+
+    def verify(self, token: str | None) -> int | None:
+        """Player id of a token we issued, None for anything else"""
+        pid_text, _, signature = (token or "").partition(".")
+        if not pid_text.isdigit():
+            return None
+        player_id = int(pid_text)
+        if not hmac.compare_digest(signature, self._sign(str(player_id))):
+            return None
+        return player_id
+
+    def issue_landing(self, player_id: int, x: float, y: float, map_name: str) -> str:
+        place = f"{x!r},{y!r},{map_name}"
+        return f"{place}.{self._sign(f'{player_id}@{place}')}"
+
+    def verify_landing(self, player_id: int, landing: str | None) -> tuple[float, float, str] | None:
+        """(x, y, map) of a landing we issued for this player, None for anything else"""
+        place, _, signature = (landing or "").rpartition(".")
+        if not place or not hmac.compare_digest(signature, self._sign(f"{player_id}@{place}")):
+            return None
+        x_text, y_text, map_name = place.split(",", 2)
+        x, y = float(x_text), float(y_text)
+        if not (math.isfinite(x) and math.isfinite(y)):
+            return None
+        return x, y, map_name
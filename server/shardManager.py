@@ -0,0 +1,256 @@
+import asyncio
+import json
+import multiprocessing as mp
+import os
+import threading
+import zlib
+from pathlib import Path
+from typing import Any, Callable
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+from websockets.asyncio.server import serve
+
+from server.rateLimit import MAX_MESSAGE_SIZE, MAX_QUEUE
+from server.sessions import SessionTokens
+
+"""
+Sharded server mode.
+
+The front door (ShardSupervisor) listens on the public port. It assigns the
+player id (or takes it back from a session token), waits for the client's
+first player_update to learn its map, then hands the client off to the worker
+process that owns that map. Handoff URLs carry the session token, so a worker
+only accepts players the front door (or another worker) sent to it. Each worker is
+a full copy of the single-process server listening on its own port
+(base_port + 1 + index), so maps spread across cores.
+
+When a player walks through a teleporter into a map owned by another worker,
+that worker sends another handoff. Chat goes through the front door so that
+every worker sees the same message ids in the same order.
+
+Messages on the worker <-> supervisor pipes are plain tuples:
+    worker -> supervisor: ("chat", sender_id, text, chat_scope)
+    supervisor -> worker: ("chat", message_dict, chat_scope)
+
+Scaling across cores has not been measured. benchmarks/bench_sharding.py
+reports server CPU per update and the most clients each shard count holds
+under an echo latency bound. So far it has only run on a single-core host,
+where every shard count tops out at the same client count and the bots use
+the CPU the shards would need. Every player still connects through the front
+door first, and chat is relayed through it. Run the benchmark on a host with
+more cores than shards + bot processes before relying on sharding for capacity.
+"""
+
+MAPS_DIR = Path("assets/maps")
+FIRST_UPDATE_TIMEOUT = 5.0
+
+
+def discover_maps() -> list[str]:
+    return sorted(p.name for p in MAPS_DIR.glob("*.tmx"))
+
+
+def assign_maps(map_names: list[str], shard_count: int) -> dict[str, int]:
+    """Round-robin the known maps over the shards"""
+    return {name: i % shard_count for i, name in enumerate(sorted(map_names))}
+
+
+def shard_for_map(map_name: str, assignment: dict[str, int], shard_count: int) -> int:
+    index = assignment.get(map_name)
+    if index is None:
+        # Maps we did not see at startup still land on a stable shard
+        index = zlib.crc32(map_name.encode("utf-8")) % shard_count
+    return index
+
+
+def query_param(websocket: Any, name: str) -> str | None:
+    values = parse_qs(urlsplit(websocket.request.path).query).get(name)
+    return values[0] if values else None
+
+
+def public_url(websocket: Any, port: int) -> str:
+    """Build a URL on the same host the client used to reach us"""
+    hostname = urlsplit("//" + websocket.request.headers.get("Host", "")).hostname or "localhost"
+    if ":" in hostname:
+        hostname = f"[{hostname}]"
+    return f"ws://{hostname}:{port}/"
+
+
+def handoff_message(url: str, token: str, landing: str | None = None) -> str:
+    query = {"token": token} if landing is None else {"token": token, "landing": landing}
+    return json.dumps({
+        "type": "handoff",
+        "url": f"{url}?{urlencode(query)}"
+    })
+
+
+class ShardContext:
+    """Worker-side view of the shard layout, plus the pipe to the front door"""
+    index: int
+    count: int
+    base_port: int
+    assignment: dict[str, int]
+
+    def __init__(self, index: int, count: int, base_port: int, assignment: dict[str, int], conn: Any,
+                 session_secret: bytes):
+        self.index = index
+        self.count = count
+        self.base_port = base_port
+        self.assignment = assignment
+        self.sessions = SessionTokens(session_secret)
+        self._conn = conn
+        self._send_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def port(self) -> int:
+        return self.base_port + 1 + self.index
+
+    def owns(self, map_name: str) -> bool:
+        # "" is what a freshly registered player reports before its first move
+        return not map_name or shard_for_map(map_name, self.assignment, self.count) == self.index
+
+    def url_for_map(self, websocket: Any, map_name: str) -> str:
+        index = shard_for_map(map_name, self.assignment, self.count)
+        return public_url(websocket, self.base_port + 1 + index)
+
+    def front_url(self, websocket: Any) -> str:
+        return public_url(websocket, self.base_port)
+
+    def publish_chat(self, sender_id: int, text: str, scope: Any) -> None:
+        with self._send_lock:
+            self._conn.send(("chat", sender_id, text, scope))
+
+    def start_relay(self, loop: asyncio.AbstractEventLoop, on_chat: Callable[[dict, Any], Any]) -> None:
+        """Forward chat relayed by the front door into the worker's event loop"""
+        def reader() -> None:
+            while True:
+                try:
+                    kind, *payload = self._conn.recv()
+                except (EOFError, OSError):
+                    return
+                if kind == "chat":
+                    asyncio.run_coroutine_threadsafe(on_chat(*payload), loop)
+
+        self._thread = threading.Thread(target=reader, name=f"ShardRelay{self.index}", daemon=True)
+        self._thread.start()
+
+    def exit_with_parent(self) -> None:
+        """A SIGTERM'd front door never reaches ShardSupervisor.stop(), so do not outlive it"""
+        parent = mp.parent_process()
+        if parent is None:
+            return
+
+        def watch() -> None:
+            parent.join()
+            os._exit(0)
+
+        threading.Thread(target=watch, name=f"ShardWatch{self.index}", daemon=True).start()
+
+
+class ShardSupervisor:
+    """Front door: spawns the map workers, hands clients off, relays chat"""
+
+    def __init__(self, shard_count: int, base_port: int, worker_target: Callable[..., None], chat_store: Any):
+        self.shard_count = shard_count
+        self.base_port = base_port
+        self.worker_target = worker_target
+        self.chat = chat_store
+        self.assignment = assign_maps(discover_maps(), shard_count)
+        self.sessions = SessionTokens()
+
+        self._processes: list[mp.Process] = []
+        self._conns: list[Any] = []
+        self._send_locks: list[threading.Lock] = []
+        self._id_lock = threading.Lock()
+        self._next_id = 0
+
+    def start(self) -> None:
+        for index in range(self.shard_count):
+            parent_conn, child_conn = mp.Pipe()
+            process = mp.Process(
+                target=self.worker_target,
+                args=(index, self.shard_count, self.base_port, self.assignment, child_conn, self.sessions.secret),
+                name=f"ShardWorker{index}",
+                daemon=True
+            )
+            process.start()
+            self._processes.append(process)
+            self._conns.append(parent_conn)
+            self._send_locks.append(threading.Lock())
+
+        for index, conn in enumerate(self._conns):
+            threading.Thread(target=self._relay, args=(conn,), name=f"ShardChat{index}", daemon=True).start()
+
+        for name, index in sorted(self.assignment.items()):
+            print(f"[Server] {name} -> shard {index} (port {self.base_port + 1 + index})")
+
+    def stop(self) -> None:
+        for process in self._processes:
+            process.terminate()
+        for process in self._processes:
+            process.join(timeout=2.0)
+
+    def _relay(self, conn: Any) -> None:
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                return
+            if message[0] != "chat":
+                continue
+            _, sender_id, text, scope = message
+            try:
+                msg = self.chat.add(sender_id, text, scope)
+            except ValueError:
+                continue
+            for out, lock in zip(self._conns, self._send_locks):
+                with lock:
+                    try:
+                        out.send(("chat", msg, scope))
+                    except (BrokenPipeError, OSError):
+                        pass
+
+    def _allocate_id(self) -> int:
+        with self._id_lock:
+            pid = self._next_id
+            self._next_id += 1
+            return pid
+
+    async def handle_client(self, websocket: Any) -> None:
+        # A client coming back with a valid token keeps its id
+        player_id = self.sessions.verify(query_param(websocket, "token"))
+        if player_id is None:
+            player_id = self._allocate_id()
+        else:
+            with self._id_lock:
+                self._next_id = max(self._next_id, player_id + 1)
+        token = self.sessions.issue(player_id)
+        await websocket.send(json.dumps({"type": "registered", "id": player_id, "token": token}))
+
+        # Wait for the first position so we know which shard owns the player
+        map_name = ""
+        try:
+            async with asyncio.timeout(FIRST_UPDATE_TIMEOUT):
+                async for message in websocket:
+                    try:
+                        data = json.loads(message)
+                    except json.JSONDecodeError:
+                        continue
+                    if data.get("type") == "player_update":
+                        map_name = str(data.get("map", ""))
+                        break
+        except TimeoutError:
+            pass
+
+        index = shard_for_map(map_name, self.assignment, self.shard_count) if map_name else 0
+        url = public_url(websocket, self.base_port + 1 + index)
+        try:
+            await websocket.send(handoff_message(url, token))
+            await websocket.close()
+        except Exception:
+            pass
+
+    async def serve(self) -> None:
+        print(f"[Server] Front door on ws://0.0.0.0:{self.base_port} with {self.shard_count} shards")
+        async with serve(self.handle_client, "0.0.0.0", self.base_port, max_size=MAX_MESSAGE_SIZE, max_queue=MAX_QUEUE):
+            await asyncio.Future()  # run forever
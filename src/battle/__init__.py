@@ -0,0 +1,2 @@
+from .rules import BattleState, ELEMENT_ADVANTAGE, calculate_damage
+from .engine import Action, Battle, Fighter, Side, attack_policy, potion_policy
@@ -0,0 +1,433 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from src.battle import rules
+from src.battle.engine import Action, Battle
+from src.utils import Logger
+
+'''
+敵方戰鬥 AI
+
+BattleScene / Battle.run 的敵方回合問 AI 要做什麼 (攻擊 / 換怪 / 藥水):
+- AttackAI: 一律攻擊 (原本的行為)
+- ExpectimaxAI: 在傷害模型上做 expectimax 搜尋。敵方選期望值最高的動作,
+  玩家當作機率節點 (PLAYER_WEIGHTS: 大多攻擊, 血少時常喝回復藥水)。
+  迭代加深, 每層都算完才採用; 超過時間預算就停, 用上一層的結果。
+  算過的 (狀態, 剩餘深度) 存在置換表, 下一回合、同一場戰鬥還能用。
+- IncrementalAI (預設): 在主執行緒每幀搜尋一小段 (frame_slice), 每幀成本固定。
+- ThreadedAI: 把搜尋放到背景執行緒, 搜尋每 CHECK_INTERVAL 個節點 sleep(0) 讓出 GIL;
+  多核心時主執行緒完全不用分時間給 AI, 但單核心時兩條執行緒搶同一顆 CPU, 畫面會變慢。
+兩者都是 begin() 後每幀 poll(), 主執行緒不會等; 時間到了還沒決定就用 best (最深一層算完的結果)。
+
+搜尋用的狀態是 tuple (SearchModel), 規則和 src/battle/engine.py 相同,
+benchmarks/bench_battle_ai.py 會逐步比對兩者。
+'''
+
+ACTIONS = (Action.ATTACK, Action.SWITCH, Action.HEAL, Action.STRENGTH, Action.DEFENSE)
+_ITEM_SLOT = {Action.HEAL: 0, Action.STRENGTH: 1, Action.DEFENSE: 2}
+
+# 玩家動作的機率權重 (血量低於 LOW_HP 時回復藥水改用 LOW_HP_HEAL_WEIGHT)
+PLAYER_WEIGHTS = {Action.ATTACK: 4.0, Action.SWITCH: 0.5, Action.HEAL: 1.0, Action.STRENGTH: 1.0, Action.DEFENSE: 1.0}
+LOW_HP = 0.3
+LOW_HP_HEAL_WEIGHT = 4.0
+
+WIN_SCORE = 100.0
+ITEM_SCORE = 0.05          # 手上每瓶藥水的價值, 比真正喝下去的效果小
+CHECK_INTERVAL = 64        # 每幾個節點檢查一次時間
+
+# apply 的結果
+CONTINUE = 0               # 換對方行動
+PLAYER_AGAIN = 1           # 敵方怪獸倒下、換上下一隻, 玩家再行動
+PLAYER_WON = 2
+ENEMY_WON = 3
+
+# 狀態: (玩家血量, 玩家場上, 玩家攻擊加成, 玩家防禦加成, 玩家藥水,
+#        敵方血量, 敵方場上, 敵方攻擊加成, 敵方防禦加成, 敵方藥水)
+State = tuple
+
+
+class SearchModel:
+    '''一場戰鬥的靜態資料 (能力值、屬性相剋) 與 tuple 狀態上的規則'''
+    __slots__ = ("p_max", "p_atk", "p_def", "e_max", "e_atk", "e_def", "p_mod", "e_mod", "p_total", "e_total", "key")
+
+    def __init__(self, battle: Battle):
+        player, enemy = battle.player.team, battle.enemy.team
+        self.p_max = tuple(f.max_hp for f in player)
+        self.p_atk = tuple(f.attack for f in player)
+        self.p_def = tuple(f.defense for f in player)
+        self.e_max = tuple(f.max_hp for f in enemy)
+        self.e_atk = tuple(f.attack for f in enemy)
+        self.e_def = tuple(f.defense for f in enemy)
+        # p_mod[i][j]: 玩家第 i 隻打敵方第 j 隻的相剋; e_mod[j][i] 反過來
+        self.p_mod = tuple(tuple(rules.type_modifier(p.type, e.type) for e in enemy) for p in player)
+        self.e_mod = tuple(tuple(rules.type_modifier(e.type, p.type) for p in player) for e in enemy)
+        self.p_total = max(1, sum(self.p_max))
+        self.e_total = max(1, sum(self.e_max))
+        self.key = (self.p_max, self.p_atk, self.p_def, self.e_max, self.e_atk, self.e_def, self.p_mod)
+
+    @staticmethod
+    def state(battle: Battle) -> State:
+        player, enemy = battle.player, battle.enemy
+        return (
+            tuple(f.hp for f in player.team), player.active, player.attack_boost, player.defense_boost,
+            tuple(battle.items.get(name, 0) for name in rules.POTIONS),
+            tuple(f.hp for f in enemy.team), enemy.active, enemy.attack_boost, enemy.defense_boost,
+            tuple(battle.enemy_items.get(name, 0) for name in rules.POTIONS),
+        )
+
+    @staticmethod
+    def _legal(hps: tuple, active: int, max_hp: int, items: tuple) -> list[Action]:
+        actions = [Action.ATTACK]
+        if rules.next_alive(hps, active) >= 0:
+            actions.append(Action.SWITCH)
+        if items[0] > 0 and hps[active] < max_hp: # 滿血喝回復藥水沒有意義, 不搜尋
+            actions.append(Action.HEAL)
+        if items[1] > 0:
+            actions.append(Action.STRENGTH)
+        if items[2] > 0:
+            actions.append(Action.DEFENSE)
+        return actions
+
+    def player_actions(self, s: State) -> list[Action]:
+        return self._legal(s[0], s[1], self.p_max[s[1]], s[4])
+
+    def enemy_actions(self, s: State) -> list[Action]:
+        return self._legal(s[5], s[6], self.e_max[s[6]], s[9])
+
+    def apply_player(self, s: State, action: Action) -> tuple[State, int]:
+        php, pa, pab, pdb, pit, ehp, ea, eab, edb, eit = s
+        if action is Action.ATTACK:
+            hp = ehp[ea] - _hit(self.p_atk[pa] + pab, self.e_def[ea] + edb, self.p_mod[pa][ea])
+            if hp > 0:
+                return (php, pa, pab, pdb, pit, ehp[:ea] + (hp,) + ehp[ea + 1:], ea, eab, edb, eit), CONTINUE
+            ehp = ehp[:ea] + (0,) + ehp[ea + 1:]
+            nxt = rules.first_alive(ehp)
+            if nxt < 0:
+                return (php, pa, pab, pdb, pit, ehp, ea, eab, edb, eit), PLAYER_WON
+            return (php, pa, pab, pdb, pit, ehp, nxt, 0, 0, eit), PLAYER_AGAIN
+        if action is Action.SWITCH:
+            return (php, rules.next_alive(php, pa), 0, 0, pit, ehp, ea, eab, edb, eit), CONTINUE
+        slot = _ITEM_SLOT[action]
+        pit = pit[:slot] + (pit[slot] - 1,) + pit[slot + 1:]
+        if action is Action.HEAL:
+            php = php[:pa] + (rules.heal(php[pa], self.p_max[pa]),) + php[pa + 1:]
+        elif action is Action.STRENGTH:
+            pab += rules.STRENGTH_BOOST
+        else:
+            pdb += rules.DEFENSE_BOOST
+        return (php, pa, pab, pdb, pit, ehp, ea, eab, edb, eit), CONTINUE
+
+    def apply_enemy(self, s: State, action: Action) -> tuple[State, int]:
+        php, pa, pab, pdb, pit, ehp, ea, eab, edb, eit = s
+        if action is Action.ATTACK:
+            hp = php[pa] - _hit(self.e_atk[ea] + eab, self.p_def[pa] + pdb, self.e_mod[ea][pa])
+            if hp > 0:
+                return (php[:pa] + (hp,) + php[pa + 1:], pa, pab, pdb, pit, ehp, ea, eab, edb, eit), CONTINUE
+            php = php[:pa] + (0,) + php[pa + 1:]
+            nxt = rules.first_alive(php)
+            if nxt < 0:
+                return (php, pa, pab, pdb, pit, ehp, ea, eab, edb, eit), ENEMY_WON
+            return (php, nxt, 0, 0, pit, ehp, ea, eab, edb, eit), CONTINUE
+        if action is Action.SWITCH:
+            return (php, pa, pab, pdb, pit, ehp, rules.next_alive(ehp, ea), 0, 0, eit), CONTINUE
+        slot = _ITEM_SLOT[action]
+        eit = eit[:slot] + (eit[slot] - 1,) + eit[slot + 1:]
+        if action is Action.HEAL:
+            ehp = ehp[:ea] + (rules.heal(ehp[ea], self.e_max[ea]),) + ehp[ea + 1:]
+        elif action is Action.STRENGTH:
+            eab += rules.STRENGTH_BOOST
+        else:
+            edb += rules.DEFENSE_BOOST
+        return (php, pa, pab, pdb, pit, ehp, ea, eab, edb, eit), CONTINUE
+
+    def evaluate(self, s: State) -> float:
+        '''敵方角度: 雙方剩餘血量比例的差, 加上一點加成與藥水的價值'''
+        php, pa, pab, pdb, pit, ehp, ea, eab, edb, eit = s
+        return (sum(ehp) / self.e_total - sum(php) / self.p_total
+                + (eab + edb - pab - pdb) * 0.002 + (sum(eit) - sum(pit)) * ITEM_SCORE)
+
+
+def _hit(attack: int, defense: int, modifier: int) -> int:
+    '''rules.damage 的合計'''
+    base = attack - defense
+    if base < 1:
+        base = 1
+    if modifier > 0:
+        half = base // 2
+        return base + (half if half > 1 else 1)
+    if modifier < 0:
+        return base - base // 2
+    return base
+
+
+class _Timeout(Exception):
+    pass
+
+
+class AttackAI:
+    name = "attack"
+
+    def choose(self, battle: Battle, abort: threading.Event | None = None) -> Action:
+        return Action.ATTACK
+
+    def start(self, battle: Battle) -> None:
+        pass
+
+    def advance(self, seconds: float, abort: threading.Event | None = None) -> bool:
+        return True
+
+    @property
+    def best(self) -> Action:
+        return Action.ATTACK
+
+    def reset(self) -> None:
+        pass
+
+    def __call__(self, battle: Battle) -> Action:
+        return self.choose(battle)
+
+
+class ExpectimaxAI:
+    name = "expectimax"
+    time_budget: float
+    max_depth: int
+    table: dict[tuple[State, int, bool], float]     # (狀態, 剩餘深度, 是否敵方) -> 期望值; 只用 hash 當 key 碰撞時會拿到別的狀態的值
+
+    def __init__(self, time_budget: float = 0.25, max_depth: int = 12, table_size: int = 200_000):
+        self.time_budget = time_budget
+        self.max_depth = max_depth
+        self.table_size = table_size
+        self.table = {}
+        self._model_key = None
+        self._model = None
+        self._abort = None
+        self._best = Action.ATTACK
+        self._done = True
+        # 最後一次決定的統計 (benchmark 用)
+        self.nodes = 0
+        self.depth = 0
+        self.elapsed = 0.0
+        self.table_hits = 0
+
+    def reset(self) -> None:
+        '''新的一場戰鬥'''
+        self.table.clear()
+        self._model_key = None
+
+    def __call__(self, battle: Battle) -> Action:
+        return self.choose(battle)
+
+    def choose(self, battle: Battle, abort: threading.Event | None = None) -> Action:
+        '''一次算完 (最多 time_budget 秒)'''
+        self.start(battle)
+        self.advance(self.time_budget, abort)
+        return self.best
+
+    def start(self, battle: Battle) -> None:
+        '''開始新的決定, 之後用 advance 分段搜尋'''
+        model = SearchModel(battle)
+        if model.key != self._model_key or len(self.table) > self.table_size:
+            self.table.clear()
+            self._model_key = model.key
+        self._model = model
+        self._state = model.state(battle)
+        self._actions = model.enemy_actions(self._state)
+        self._best = Action.ATTACK
+        self._next_depth = 1
+        self._done = len(self._actions) <= 1
+        self.nodes = self.table_hits = self.depth = 0
+        self.elapsed = 0.0
+
+    def advance(self, seconds: float, abort: threading.Event | None = None) -> bool:
+        '''
+        最多搜尋 seconds 秒 (整個決定合計不超過 time_budget), 回傳是否已經決定。
+        中途停下時這一層的結果不採用, 但算完的子樹都在置換表裡, 下次從同一層繼續很快就追上。
+        '''
+        if self._done:
+            return True
+        started = time.perf_counter()
+        self._deadline = started + min(seconds, self.time_budget - self.elapsed)
+        self._abort = abort
+        try:
+            while self._next_depth <= self.max_depth:
+                self._best, value = self._root(self._state, self._actions, self._next_depth, self._best)
+                self.depth = self._next_depth
+                self._next_depth += 1
+                if abs(value) >= WIN_SCORE: # 已經找到必勝 / 必敗的走法
+                    break
+            self._done = True
+        except _Timeout:
+            pass
+        self.elapsed += time.perf_counter() - started
+        if self.elapsed >= self.time_budget or (abort is not None and abort.is_set()):
+            self._done = True
+        if self._done:
+            self._model = self._abort = None
+        return self._done
+
+    @property
+    def best(self) -> Action:
+        '''目前最深一層算完的最佳動作'''
+        return self._best
+
+    def _tick(self) -> None:
+        self.nodes += 1
+        if self.nodes % CHECK_INTERVAL == 0:
+            if time.perf_counter() > self._deadline:
+                raise _Timeout
+            if self._abort is not None:
+                if self._abort.is_set():
+                    raise _Timeout
+                time.sleep(0) # 在背景執行緒時讓主執行緒拿到 GIL
+
+    def _root(self, state: State, actions: list[Action], depth: int, previous: Action) -> tuple[Action, float]:
+        # 上一層最好的先算; 同分時保留先算到的 (攻擊排在最前面)
+        ordered = [previous] + [a for a in actions if a is not previous] if previous in actions else actions
+        best, best_value = ordered[0], None
+        for action in ordered:
+            value = self._enemy_child(state, action, depth)
+            if best_value is None or value > best_value:
+                best, best_value = action, value
+        return best, best_value
+
+    def _enemy_child(self, state: State, action: Action, depth: int) -> float:
+        child, result = self._model.apply_enemy(state, action)
+        if result == ENEMY_WON:
+            return WIN_SCORE + depth
+        return self._chance(child, depth - 1)
+
+    def _max(self, state: State, depth: int) -> float:
+        '''敵方行動: 取最大'''
+        self._tick()
+        if depth <= 0:
+            return self._model.evaluate(state)
+        key = (state, depth, True)
+        value = self.table.get(key)
+        if value is not None:
+            self.table_hits += 1
+            return value
+        value = max(self._enemy_child(state, action, depth) for action in self._model.enemy_actions(state))
+        self.table[key] = value
+        return value
+
+    def _chance(self, state: State, depth: int) -> float:
+        '''玩家行動: 依 PLAYER_WEIGHTS 取期望值'''
+        self._tick()
+        model = self._model
+        if depth <= 0:
+            return model.evaluate(state)
+        key = (state, depth, False)
+        value = self.table.get(key)
+        if value is not None:
+            self.table_hits += 1
+            return value
+        low_hp = state[0][state[1]] < LOW_HP * model.p_max[state[1]]
+        total = expected = 0.0
+        for action in model.player_actions(state):
+            weight = LOW_HP_HEAL_WEIGHT if action is Action.HEAL and low_hp else PLAYER_WEIGHTS[action]
+            child, result = model.apply_player(state, action)
+            if result == PLAYER_WON:
+                value = -WIN_SCORE - depth
+            elif result == PLAYER_AGAIN:
+                value = self._chance(child, depth - 1)
+            else:
+                value = self._max(child, depth - 1)
+            total += weight
+            expected += weight * value
+        value = expected / total
+        self.table[key] = value
+        return value
+
+
+class IncrementalAI:
+    '''
+    在主執行緒分幀搜尋: begin() 只建立搜尋狀態, 之後每幀 poll() 搜尋 frame_slice 秒。
+    每幀的成本固定, 單核心的機器也不會掉幀; 決定要的總搜尋時間仍是 AI 的 time_budget。
+    '''
+    def __init__(self, ai: AttackAI | ExpectimaxAI, frame_slice: float = 0.003):
+        self.ai = ai
+        self.frame_slice = frame_slice
+        self.thinking = False
+
+    def reset(self) -> None:
+        self.cancel()
+        self.ai.reset()
+
+    def begin(self, battle: Battle) -> None:
+        self.ai.start(battle)
+        self.thinking = True
+
+    def poll(self) -> Action | None:
+        if not self.thinking:
+            return None
+        if self.ai.advance(self.frame_slice):
+            self.thinking = False
+            return self.ai.best
+        return None
+
+    def cancel(self) -> None:
+        self.thinking = False
+
+    @property
+    def best(self) -> Action:
+        return self.ai.best
+
+
+class ThreadedAI:
+    '''
+    在背景執行緒做決定: begin() 交出戰鬥快照後馬上返回, 之後每幀 poll()。
+    cancel() 讓還在跑的搜尋在下一次檢查時停下 (離開戰鬥、時間到了還沒算完)。
+    '''
+    _future: Future | None
+
+    def __init__(self, ai: AttackAI | ExpectimaxAI):
+        self.ai = ai
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="BattleAI")
+        self._future = None
+        self._abort = threading.Event()
+
+    @property
+    def thinking(self) -> bool:
+        return self._future is not None
+
+    def reset(self) -> None:
+        self.cancel()
+        self._executor.submit(self.ai.reset) # 和搜尋同一條執行緒, 不會在搜尋途中清置換表
+
+    def begin(self, battle: Battle) -> None:
+        '''battle 交出後不可再修改 (用 BattleScene 建的快照)'''
+        self.cancel()
+        self._abort = threading.Event()
+        self._future = self._executor.submit(self.ai.choose, battle, self._abort)
+
+    def poll(self) -> Action | None:
+        '''算好了就回傳動作, 還沒好回傳 None'''
+        if self._future is None or not self._future.done():
+            return None
+        future, self._future = self._future, None
+        try:
+            return future.result()
+        except Exception as e:
+            Logger.error(f"Battle AI failed: {e}")
+            return Action.ATTACK
+
+    def cancel(self) -> None:
+        if self._future is not None:
+            self._abort.set()
+            self._future = None
+
+    @property
+    def best(self) -> Action:
+        return self.ai.best
+
+
+AIS = {AttackAI.name: AttackAI, ExpectimaxAI.name: ExpectimaxAI}
+
+
+def make_ai(name: str, time_budget: float = 0.25) -> AttackAI | ExpectimaxAI:
+    if name not in AIS:
+        raise ValueError(f"Unknown battle AI {name!r}, expected one of {', '.join(AIS)}")
+    if name == AttackAI.name:
+        return AttackAI()
+    return AIS[name](time_budget=time_budget)
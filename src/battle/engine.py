@@ -0,0 +1,230 @@
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Callable, Iterable
+
+from src.battle import rules
+from src.battle.rules import BattleState
+from src.data.database import DEFAULT_TYPE, GameDatabase
+
+'''
+無畫面的戰鬥引擎
+
+和 BattleScene 相同的回合流程, 沒有延遲、沒有 pygame:
+- 玩家回合: 攻擊 / 換怪 / 喝藥水, 做不到的動作 (沒有藥水、沒有能換的怪) 不會結束回合
+- 敵方回合: 預設一律攻擊 (enemy_policy 可以換怪、喝藥水, 見 src/battle/ai.py);
+  玩家的怪獸倒下就換上隊伍中第一隻還有血的, 沒有就輸了
+- 敵方怪獸倒下時換上下一隻還有血的 (訓練家整隊), 全倒就贏了
+藥水的攻擊 / 防禦加成跟著場上那隻怪獸, 換下場就沒了 (BattleScene 換怪時重建 Monster)。
+
+policy 是 (Battle) -> Action 的函式, src/battle/simulator.py 的向量化模擬用的是 potion_policy。
+'''
+
+
+def species_type(database: GameDatabase, species: str) -> str:
+    '''和 Monster 一樣, 沒有設定屬性就當作 DEFAULT_TYPE'''
+    return database.raw_monsters.get(species, {}).get("type", DEFAULT_TYPE)
+
+
+class Action(Enum):
+    ATTACK = "attack"
+    SWITCH = "switch"
+    HEAL = rules.HEAL_POTION
+    STRENGTH = rules.STRENGTH_POTION
+    DEFENSE = rules.DEFENSE_POTION
+
+
+@dataclass(slots=True)
+class Fighter:
+    species: str
+    type: str
+    level: int
+    hp: int
+    max_hp: int
+    attack: int
+    defense: int
+
+    @classmethod
+    def create(cls, database: GameDatabase, species: str, level: int, hp: int | None = None) -> "Fighter":
+        '''依資料庫的等級能力表建立, 和 Monster.recalculate_stats 相同'''
+        max_hp, attack, defense = database.stats(species, level)
+        hp = max_hp if hp is None else max(0, min(hp, max_hp))
+        return cls(species, species_type(database, species), level, hp, max_hp, attack, defense)
+
+    def copy(self) -> "Fighter":
+        return Fighter(self.species, self.type, self.level, self.hp, self.max_hp, self.attack, self.defense)
+
+
+@dataclass(slots=True)
+class Side:
+    team: list[Fighter]
+    active: int = 0
+    attack_boost: int = 0
+    defense_boost: int = 0
+
+    @property
+    def fighter(self) -> Fighter:
+        return self.team[self.active]
+
+    @property
+    def attack(self) -> int:
+        return self.fighter.attack + self.attack_boost
+
+    @property
+    def defense(self) -> int:
+        return self.fighter.defense + self.defense_boost
+
+    @property
+    def type(self) -> str:
+        return self.fighter.type
+
+    def switch_to(self, index: int) -> None:
+        self.active = index
+        self.attack_boost = self.defense_boost = 0
+
+    def copy(self) -> "Side":
+        return Side([f.copy() for f in self.team], self.active, self.attack_boost, self.defense_boost)
+
+
+@dataclass(slots=True)
+class Battle:
+    player: Side
+    enemy: Side
+    items: dict[str, int] = field(default_factory=dict)
+    enemy_items: dict[str, int] = field(default_factory=dict)
+    state: BattleState = BattleState.PLAYER_TURN
+    turns: int = 0
+
+    @classmethod
+    def create(cls, player_team: Iterable[Fighter], enemy_team: Iterable[Fighter],
+               items: dict[str, int] | None = None, enemy_items: dict[str, int] | None = None) -> "Battle":
+        player = Side(list(player_team))
+        enemy = Side(list(enemy_team))
+        battle = cls(player, enemy, dict(items or {}), dict(enemy_items or {}))
+        # 和 BattleScene.enter 一樣從第一隻還有血的開始
+        start = rules.first_alive([f.hp for f in player.team])
+        if start < 0:
+            battle.state = BattleState.LOST
+        else:
+            player.active = start
+        return battle
+
+    def copy(self) -> "Battle":
+        '''比 copy.deepcopy 快很多, 重播每一場都要從開始狀態複製一份'''
+        return Battle(self.player.copy(), self.enemy.copy(), dict(self.items), dict(self.enemy_items),
+                      self.state, self.turns)
+
+    @property
+    def over(self) -> bool:
+        return self.state in (BattleState.WON, BattleState.LOST)
+
+    @staticmethod
+    def _can(side: Side, items: dict[str, int], action: Action) -> bool:
+        if action is Action.ATTACK:
+            return True
+        if action is Action.SWITCH:
+            return rules.next_alive([f.hp for f in side.team], side.active) >= 0
+        return items.get(action.value, 0) > 0
+
+    def can(self, action: Action) -> bool:
+        return self._can(self.player, self.items, action)
+
+    def enemy_can(self, action: Action) -> bool:
+        return self._can(self.enemy, self.enemy_items, action)
+
+    @staticmethod
+    def _act(side: Side, other: Side, items: dict[str, int], action: Action) -> bool:
+        '''執行動作, 回傳對方場上的怪獸是否倒下'''
+        if action is Action.ATTACK:
+            base_dmg, modifier = rules.damage(side.attack, other.defense, side.type, other.type)
+            target = other.fighter
+            target.hp = max(0, target.hp - (base_dmg + modifier))
+            return target.hp <= 0
+        if action is Action.SWITCH:
+            side.switch_to(rules.next_alive([f.hp for f in side.team], side.active))
+            return False
+        items[action.value] -= 1
+        if action is Action.HEAL:
+            side.fighter.hp = rules.heal(side.fighter.hp, side.fighter.max_hp)
+        elif action is Action.STRENGTH:
+            side.attack_boost += rules.STRENGTH_BOOST
+        else:
+            side.defense_boost += rules.DEFENSE_BOOST
+        return False
+
+    def player_turn(self, action: Action) -> bool:
+        '''執行玩家的動作, 動作做不到時回傳 False 且仍是玩家回合'''
+        if self.state is not BattleState.PLAYER_TURN or not self.can(action):
+            return False
+        if self._act(self.player, self.enemy, self.items, action):
+            # 下一隻上場後直接換玩家出手, 和玩家自動換怪後一樣
+            nxt = rules.first_alive([f.hp for f in self.enemy.team])
+            if nxt < 0:
+                self.state = BattleState.WON
+            else:
+                self.enemy.switch_to(nxt)
+                self.turns += 1
+            return True
+        self.state = BattleState.ENEMY_TURN
+        return True
+
+    def enemy_turn(self, action: Action = Action.ATTACK) -> None:
+        '''敵方的動作 (預設攻擊, src/battle/ai.py 可以選換怪或藥水), 做不到的動作改成攻擊'''
+        if self.state is not BattleState.ENEMY_TURN:
+            return
+        if not self.enemy_can(action):
+            action = Action.ATTACK
+        fainted = self._act(self.enemy, self.player, self.enemy_items, action)
+        self.state = BattleState.PLAYER_TURN
+        if fainted:
+            nxt = rules.first_alive([f.hp for f in self.player.team])
+            if nxt < 0:
+                self.state = BattleState.LOST
+            else:
+                self.player.switch_to(nxt)
+        self.turns += 1
+
+    def step(self, action: Action, enemy_policy: "Policy | None" = None) -> bool:
+        '''一整個回合: 玩家動作 + 敵方回應'''
+        if not self.player_turn(action):
+            return False
+        if self.state is BattleState.ENEMY_TURN:
+            self.enemy_turn(enemy_policy(self) if enemy_policy else Action.ATTACK)
+        return True
+
+    def run(self, policy: "Policy", max_turns: int = 2000, enemy_policy: "Policy | None" = None) -> BattleState:
+        '''打到分出勝負; 超過 max_turns 回合 (或 policy 選了做不到的動作) 算輸'''
+        while not self.over and self.turns < max_turns:
+            if not self.step(policy(self), enemy_policy):
+                break
+        if not self.over:
+            self.state = BattleState.LOST
+        return self.state
+
+    @property
+    def won(self) -> bool:
+        return self.state is BattleState.WON
+
+
+Policy = Callable[[Battle], Action]
+
+
+def attack_policy(battle: Battle) -> Action:
+    return Action.ATTACK
+
+
+def potion_policy(heal_below: float = 0.3, use_boosts: bool = True) -> Policy:
+    '''
+    血量低於 heal_below 比例就喝回復藥水; 否則 use_boosts 時先把攻擊、再把防禦藥水喝完; 其餘攻擊。
+    src/battle/simulator.py 用同一個規則做向量化模擬。
+    '''
+    def policy(battle: Battle) -> Action:
+        fighter = battle.player.fighter
+        if battle.items.get(rules.HEAL_POTION, 0) > 0 and fighter.hp < heal_below * fighter.max_hp:
+            return Action.HEAL
+        if use_boosts:
+            if battle.items.get(rules.STRENGTH_POTION, 0) > 0:
+                return Action.STRENGTH
+            if battle.items.get(rules.DEFENSE_POTION, 0) > 0:
+                return Action.DEFENSE
+        return Action.ATTACK
+    return policy
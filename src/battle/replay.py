@@ -0,0 +1,278 @@
+import argparse
+import os
+import time
+from dataclasses import astuple, dataclass, field
+from typing import Any, Callable, Sequence
+
+from src.battle.engine import Action, Battle, Fighter, Policy, Side
+from src.battle.rules import BattleState
+from src.utils import get_codec
+
+'''
+戰鬥重播紀錄
+
+BattleScene 每場戰鬥結束時寫一個 JSON 到 GameSettings.BATTLE_REPLAY_DIR (回報 bug 時附上),
+內容是開始時雙方的完整狀態、依序的每一個動作、和畫面上最後的結果:
+    {"version": 1, "kind": "trainer", "ai": "expectimax",
+     "player": {"team": [["Sproutkit", "grass", 12, 40, 52, 18, 14], ...], "active": 0, "boosts": [0, 0]},
+     "enemy": {...}, "items": {"Heal Potion": 2}, "enemy_items": {},
+     "actions": "aAhSaD...",
+     "end": "won", "result": {"player_hp": [...], "enemy_hp": [...], "items": {...}, "enemy_items": {...}}}
+怪獸存的是 Fighter 的每個欄位 (含能力值), 重播不需要資料庫, 資料庫改過數值也能重現舊的紀錄。
+actions 一個字元一個動作, 小寫是玩家、大寫是敵方 (a 攻擊 / s 換怪 / h p d 三種藥水)。
+
+戰鬥規則本身沒有亂數, 唯一不固定的是敵方 AI (依時間預算搜尋, 每次可能選不同的動作),
+所以記的是 AI 實際選的動作, 不是種子; 重播時照著動作走 src/battle/engine.py 的規則,
+最後的血量、藥水要和紀錄的結果一模一樣, 不一樣就是畫面和引擎的規則分岔了。
+
+重播沒有任何延遲, 一秒幾十萬回合, 存下來的紀錄也可以當引擎的效能回歸測資:
+    python -m src.battle.replay saves/replays                 # 檢查每一場
+    python -m src.battle.replay saves/replays/xxx.json -v     # 逐回合印出
+    python -m src.battle.replay saves/replays --repeat 200    # 回合數 / 秒
+'''
+
+VERSION = 1
+REPLAY_SUFFIX = ".json"
+
+CODES: dict[Action, str] = {
+    Action.ATTACK: "a",
+    Action.SWITCH: "s",
+    Action.HEAL: "h",
+    Action.STRENGTH: "p",
+    Action.DEFENSE: "d",
+}
+ACTIONS: dict[str, Action] = {code: action for action, code in CODES.items()}
+ENDS = ("won", "lost", "ran", "caught", "quit")
+
+
+class ReplayError(ValueError):
+    '''紀錄格式不對, 或紀錄的動作在引擎裡做不到'''
+
+
+def _side_to_dict(side: Side) -> dict[str, Any]:
+    return {"team": [list(astuple(f)) for f in side.team], "active": side.active,
+            "boosts": [side.attack_boost, side.defense_boost]}
+
+
+def _side_from_dict(data: dict[str, Any]) -> Side:
+    attack_boost, defense_boost = data.get("boosts", (0, 0))
+    return Side([Fighter(*row) for row in data["team"]], data.get("active", 0), attack_boost, defense_boost)
+
+
+def _potions(items: dict[str, int]) -> dict[str, int]:
+    '''背包用完的道具會整個移除, 引擎留著 0, 比較時都去掉'''
+    return {name: count for name, count in items.items() if count > 0}
+
+
+def outcome(battle: Battle) -> dict[str, Any]:
+    return {
+        "player_hp": [f.hp for f in battle.player.team],
+        "enemy_hp": [f.hp for f in battle.enemy.team],
+        "items": _potions(battle.items),
+        "enemy_items": _potions(battle.enemy_items),
+    }
+
+
+@dataclass(slots=True)
+class BattleLog:
+    start: Battle                   # 開始時的狀態 (複本, 之後不會變)
+    kind: str = ""                  # wild / trainer / sim
+    ai: str = ""                    # 敵方 AI 的名稱, 只是註記
+    actions: list[str] = field(default_factory=list)
+    end: str = ""
+    result: dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def begin(cls, battle: Battle, kind: str = "", ai: str = "") -> "BattleLog":
+        return cls(battle.copy(), kind, ai)
+
+    def player(self, action: Action) -> None:
+        self.actions.append(CODES[action])
+
+    def enemy(self, action: Action) -> None:
+        self.actions.append(CODES[action].upper())
+
+    def finish(self, end: str, battle: Battle) -> None:
+        '''end 是 ENDS 之一, battle 是結束時畫面上的戰況'''
+        self.end = end
+        self.result = outcome(battle)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "version": VERSION,
+            "kind": self.kind,
+            "ai": self.ai,
+            "player": _side_to_dict(self.start.player),
+            "enemy": _side_to_dict(self.start.enemy),
+            "items": _potions(self.start.items),
+            "enemy_items": _potions(self.start.enemy_items),
+            "actions": "".join(self.actions),
+            "end": self.end,
+            "result": self.result,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "BattleLog":
+        if data.get("version", 0) > VERSION:
+            raise ReplayError(f"Replay version {data['version']} is newer than supported ({VERSION})")
+        try:
+            start = Battle(_side_from_dict(data["player"]), _side_from_dict(data["enemy"]),
+                           dict(data.get("items", {})), dict(data.get("enemy_items", {})))
+            actions = list(data.get("actions", ""))
+        except (KeyError, TypeError, ValueError) as e:
+            raise ReplayError(f"Malformed replay: {e!r}") from None
+        unknown = set(code.lower() for code in actions) - ACTIONS.keys()
+        if unknown:
+            raise ReplayError(f"Unknown action codes {''.join(sorted(unknown))!r}")
+        return cls(start, data.get("kind", ""), data.get("ai", ""), actions, data.get("end", ""),
+                   data.get("result", {}))
+
+
+def record(battle: Battle, policy: Policy, enemy_policy: Policy | None = None,
+           max_turns: int = 2000, kind: str = "sim") -> BattleLog:
+    '''和 Battle.run 相同的流程, 順便記下每個動作 (benchmark 用來產生測資)'''
+    log = BattleLog.begin(battle, kind, getattr(enemy_policy, "name", ""))
+    while not battle.over and battle.turns < max_turns:
+        action = policy(battle)
+        if not battle.player_turn(action):
+            break
+        log.player(action)
+        if battle.state is BattleState.ENEMY_TURN:
+            action = enemy_policy(battle) if enemy_policy else Action.ATTACK
+            log.enemy(action)
+            battle.enemy_turn(action)
+    log.finish(battle.state.name.lower() if battle.over else "quit", battle)
+    return log
+
+
+Trace = Callable[[int, bool, Action, Battle], None]
+
+
+def replay(log: BattleLog, trace: Trace | None = None) -> Battle:
+    '''從開始狀態照著紀錄的動作打一遍; trace(第幾個動作, 是否敵方, 動作, 之後的戰況)'''
+    battle = log.start.copy()
+    for i, code in enumerate(log.actions):
+        is_enemy = code.isupper()
+        action = ACTIONS[code.lower()]
+        if is_enemy:
+            if battle.state is not BattleState.ENEMY_TURN:
+                raise ReplayError(f"Action {i}: enemy {action.value} during {battle.state.name}")
+            battle.enemy_turn(action)
+        elif not battle.player_turn(action):
+            raise ReplayError(f"Action {i}: player can't {action.value} during {battle.state.name}")
+        if trace is not None:
+            trace(i, is_enemy, action, battle)
+    return battle
+
+
+def verify(log: BattleLog, battle: Battle | None = None) -> list[str]:
+    '''重播的結果和紀錄不同的地方, 空的就是一致'''
+    try:
+        battle = battle or replay(log)
+    except ReplayError as e:
+        return [str(e)]
+    problems = []
+    if log.end in ("won", "lost"):
+        if battle.state.name.lower() != log.end:
+            problems.append(f"ended {battle.state.name.lower()}, recorded {log.end}")
+    elif battle.over:
+        problems.append(f"ended {battle.state.name.lower()}, recorded {log.end or 'nothing'}")
+    for key, value in outcome(battle).items():
+        if key in log.result and log.result[key] != value:
+            problems.append(f"{key} {value}, recorded {log.result[key]}")
+    return problems
+
+
+def load(path: str) -> BattleLog:
+    with open(path, "rb") as f:
+        try:
+            data = get_codec().loads(f.read())
+        except ValueError as e:
+            raise ReplayError(f"{path}: {e}") from None
+    return BattleLog.from_dict(data)
+
+
+def save(log: BattleLog, directory: str, keep: int = 0) -> str:
+    '''寫到 directory, 檔名是時間; keep > 0 時只留最新的 keep 個紀錄'''
+    os.makedirs(directory, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    path = os.path.join(directory, f"battle-{stamp}-{log.kind or 'battle'}{REPLAY_SUFFIX}")
+    n = 1
+    while os.path.exists(path):
+        n += 1
+        path = os.path.join(directory, f"battle-{stamp}-{log.kind or 'battle'}-{n}{REPLAY_SUFFIX}")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(get_codec().dumps(log.to_dict()))
+    if keep > 0:
+        for old in replay_paths([directory])[:-keep]:
+            os.remove(old)
+    return path
+
+
+def replay_paths(paths: Sequence[str]) -> list[str]:
+    '''檔案直接用, 資料夾取裡面的紀錄, 依修改時間排序'''
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in os.listdir(path)
+                         if name.startswith("battle-") and name.endswith(REPLAY_SUFFIX))
+        else:
+            files.append(path)
+    return sorted(files, key=lambda p: (os.path.getmtime(p), p))
+
+
+def _print_trace(i: int, is_enemy: bool, action: Action, battle: Battle) -> None:
+    who = "enemy " if is_enemy else "player"
+    p, e = battle.player.fighter, battle.enemy.fighter
+    print(f"{i:>5} {who} {action.value:<16}"
+          f"{p.species} {p.hp}/{p.max_hp}  vs  {e.species} {e.hp}/{e.max_hp}  {battle.state.name}")
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m src.battle.replay",
+                                     description="Replay recorded battles headlessly and check the outcome")
+    parser.add_argument("paths", nargs="+", help="replay files or directories")
+    parser.add_argument("-v", "--verbose", action="store_true", help="print every action")
+    parser.add_argument("--repeat", type=int, default=1, help="replay everything this many times and time it")
+    args = parser.parse_args(argv)
+
+    logs = []
+    for path in replay_paths(args.paths):
+        try:
+            logs.append((path, load(path)))
+        except (OSError, ReplayError) as e:
+            print(f"{path}: {e}")
+    failed = turns = 0
+    for path, log in logs:
+        if args.verbose:
+            print(path)
+        try:
+            battle = replay(log, _print_trace if args.verbose else None)
+        except ReplayError as e:
+            problems = [str(e)]
+        else:
+            problems = verify(log, battle)
+            turns += battle.turns
+        failed += bool(problems)
+        status = "; ".join(problems) if problems else "ok"
+        print(f"{os.path.basename(path)}: {log.kind} {len(log.actions)} actions, {log.end or '-'}: {status}")
+
+    if args.repeat > 1 and logs:
+        actions = sum(len(log.actions) for _, log in logs) * args.repeat
+        turns *= args.repeat
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for _, log in logs:
+                try:
+                    replay(log)
+                except ReplayError:
+                    pass
+        seconds = time.perf_counter() - start
+        print(f"{len(logs) * args.repeat} replays, {turns:,} turns ({actions:,} actions) in {seconds:.2f} s: "
+              f"{turns / seconds:,.0f} turns/s")
+    if failed:
+        raise SystemExit(f"{failed} of {len(logs)} replays differ from the recording")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+from enum import Enum, auto
+from typing import Protocol, Sequence
+
+'''
+戰鬥規則 (不依賴 pygame, 畫面、模擬器共用)
+
+BattleScene 只負責顯示與計時, 傷害、藥水、換怪、經驗值都在這裡算,
+src/battle/engine.py 的無畫面戰鬥與 src/battle/simulator.py 的批次模擬也用同一套規則。
+'''
+
+
+# 使用 Enum 管理戰鬥狀態
+class BattleState(Enum):
+    PLAYER_TURN = auto()
+    ENEMY_TURN = auto()
+    WON = auto()
+    LOST = auto()
+    RUNNING = auto()
+
+
+# 屬性相剋表
+ELEMENT_ADVANTAGE = {
+    'fire': 'grass',
+    'water': 'fire',
+    'grass': 'water'
+}
+
+HEAL_POTION = "Heal Potion"
+STRENGTH_POTION = "Strength Potion"
+DEFENSE_POTION = "Defense Potion"
+POTIONS = (HEAL_POTION, STRENGTH_POTION, DEFENSE_POTION)
+
+HEAL_AMOUNT = 100       # 回復藥水回復量
+STRENGTH_BOOST = 10     # 攻擊藥水提升量
+DEFENSE_BOOST = 10      # 防禦藥水提升量
+EXP_PER_LEVEL = 10      # 勝利經驗值 = 敵人等級 * EXP_PER_LEVEL
+
+
+class Combatant(Protocol):
+    attack: int
+    defense: int
+    type: str
+
+
+def type_modifier(attacker_type: str, defender_type: str) -> int:
+    '''1: 攻擊方相剋, -1: 被相剋, 0: 無'''
+    if ELEMENT_ADVANTAGE.get(attacker_type) == defender_type:
+        return 1
+    if ELEMENT_ADVANTAGE.get(defender_type) == attacker_type:
+        return -1
+    return 0
+
+
+def damage(attack: int, defense: int, attacker_type: str, defender_type: str) -> tuple[int, int]:
+    '''回傳 (基礎傷害, 屬性加減), 實際傷害是兩者相加'''
+    base_dmg = int(max(1, attack - defense))
+    modifier = type_modifier(attacker_type, defender_type)
+    if modifier > 0:
+        return base_dmg, max(1, int(base_dmg * 0.5))
+    if modifier < 0:
+        return base_dmg, -int(base_dmg * 0.5)
+    return base_dmg, 0
+
+
+def calculate_damage(attacker: Combatant, defender: Combatant) -> tuple[int, str]:
+    '''傷害計算，回傳 (final_damage, log_message_suffix)'''
+    base_dmg, modifier = damage(attacker.attack, defender.defense, attacker.type, defender.type)
+    sign = "-" if type_modifier(attacker.type, defender.type) < 0 else "+"
+    return base_dmg + modifier, f"{base_dmg} ( {sign} {abs(modifier)} )"
+
+
+def heal(hp: int, max_hp: int) -> int:
+    '''喝下回復藥水後的血量'''
+    return min(hp + HEAL_AMOUNT, max_hp)
+
+
+def exp_reward(enemy_level: int) -> int:
+    return enemy_level * EXP_PER_LEVEL
+
+
+def exp_to_next_level(level: int) -> int:
+    '''升到 level + 1 需要的累積經驗值'''
+    return (level + 1) ** 2 # 經驗值曲線
+
+
+def first_alive(hps: Sequence[int]) -> int:
+    '''倒下時自動換上的怪獸: 隊伍中第一隻還有血的, 沒有回傳 -1'''
+    for i, hp in enumerate(hps):
+        if hp > 0:
+            return i
+    return -1
+
+
+def next_alive(hps: Sequence[int], current: int) -> int:
+    '''手動換怪: 從目前這隻往後繞一圈找下一隻還有血的, 沒有回傳 -1'''
+    total = len(hps)
+    for i in range(1, total):
+        check_index = (current + i) % total
+        if hps[check_index] > 0:
+            return check_index
+    return -1
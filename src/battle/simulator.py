@@ -0,0 +1,336 @@
+import argparse
+from typing import NamedTuple, Sequence
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from src.battle import rules
+from src.battle.engine import species_type
+from src.data.database import MAX_LEVEL, GameDatabase, get_database
+
+'''
+批次戰鬥模擬 (平衡 trainers.json 用, 不用真的去打)
+
+規則和 src/battle/engine.py 的 Battle + potion_policy 完全相同, 但一次模擬 N 場:
+- 每個物種 0..MAX_LEVEL 級的 max_hp / attack / defense 疊成 (物種, 等級) 的 NumPy 陣列 (StatTables)
+- 雙方隊伍是 (N, 隊伍大小) 的物種 / 等級陣列, 空位填 -1
+- 一個迴圈跑一回合, 每回合只處理還沒分出勝負的場次
+傷害是確定的, 同樣的等級打起來結果一定相同; 勝率來自 level_spread (雙方等級各自在 ±spread 內隨機)。
+
+    python -m src.battle.simulator species --level 20 --spread 3
+    python -m src.battle.simulator trainers --team Sproutkit,Bubphin --levels 5:60:5 --heal 3
+'''
+
+NO_MONSTER = -1
+
+
+class StatTables:
+    '''物種 x 等級的能力表 (GameDatabase 的 stat_table 轉成陣列)'''
+    species: tuple[str, ...]
+    index: dict[str, int]
+    types: tuple[str, ...]
+
+    def __init__(self, database: GameDatabase):
+        if np is None:
+            raise ImportError("src.battle.simulator needs numpy")
+        self.database = database
+        self.species = tuple(database.species)
+        self.index = {sid: i for i, sid in enumerate(self.species)}
+        type_names = [species_type(database, sid) for sid in self.species]
+        self.types = tuple(dict.fromkeys(type_names + sorted(set(rules.ELEMENT_ADVANTAGE) - set(type_names))))
+        type_index = {t: i for i, t in enumerate(self.types)}
+
+        table = np.array([database.species[sid].stat_table for sid in self.species], dtype=np.int32)
+        table = table.reshape(len(self.species), MAX_LEVEL + 1, 3)
+        self.max_hp = np.ascontiguousarray(table[:, :, 0])
+        self.attack = np.ascontiguousarray(table[:, :, 1])
+        self.defense = np.ascontiguousarray(table[:, :, 2])
+        self.type_code = np.array([type_index[t] for t in type_names], dtype=np.int8)
+        # advantage[攻擊方屬性, 防守方屬性] = rules.type_modifier
+        self.advantage = np.array(
+            [[rules.type_modifier(a, d) for d in self.types] for a in self.types], dtype=np.int8
+        )
+
+    def codes(self, species: Sequence[str]) -> list[int]:
+        return [self.index[sid] for sid in species]
+
+    def team(self, species: Sequence[Sequence[str]]) -> "np.ndarray":
+        '''隊伍名單 -> (N, 最大隊伍大小) 的物種代碼, 空位 NO_MONSTER'''
+        size = max((len(t) for t in species), default=0)
+        out = np.full((len(species), max(size, 1)), NO_MONSTER, dtype=np.int32)
+        for row, members in enumerate(species):
+            out[row, :len(members)] = self.codes(members)
+        return out
+
+
+class BatchResult(NamedTuple):
+    won: "np.ndarray"           # (N,) bool, 回合用完也算輸
+    turns: "np.ndarray"         # (N,) 回合數
+    player_hp: "np.ndarray"     # (N,) 玩家隊伍剩下的總血量
+    enemy_hp: "np.ndarray"      # (N,) 敵方隊伍剩下的總血量
+
+    @property
+    def win_rate(self) -> float:
+        return float(self.won.mean()) if len(self.won) else 0.0
+
+
+class WinRates(NamedTuple):
+    rows: tuple
+    cols: tuple
+    rates: "np.ndarray"         # rates[i, j]: rows[i] 對 cols[j] 的勝率
+
+    def format(self, width: int = 12) -> str:
+        lines = [" " * width + "".join(f"{str(c)[:width - 1]:>{width}}" for c in self.cols)]
+        for label, row in zip(self.rows, self.rates):
+            lines.append(f"{str(label)[:width - 1]:<{width}}" + "".join(f"{r:>{width}.2f}" for r in row))
+        return "\n".join(lines)
+
+
+def _team_stats(tables: StatTables, species: "np.ndarray", levels: "np.ndarray"):
+    present = species != NO_MONSTER
+    sp = np.where(present, species, 0)
+    lv = np.clip(levels, 0, MAX_LEVEL)
+    hp = np.where(present, tables.max_hp[sp, lv], 0).astype(np.int32)
+    return hp, tables.attack[sp, lv], tables.defense[sp, lv], tables.type_code[sp]
+
+
+def _damage(tables: StatTables, attack, defense, attacker_type, defender_type) -> "np.ndarray":
+    '''rules.damage 的向量版 (int(base * 0.5) == base // 2)'''
+    base = np.maximum(attack - defense, 1)
+    modifier = tables.advantage[attacker_type, defender_type]
+    half = base // 2
+    return base + np.where(modifier > 0, np.maximum(half, 1), np.where(modifier < 0, -half, 0))
+
+
+def simulate(tables: StatTables,
+             player_species, player_levels,
+             enemy_species, enemy_levels,
+             items=(0, 0, 0),
+             heal_below: float = 0.3,
+             use_boosts: bool = True,
+             max_turns: int = 2000) -> BatchResult:
+    '''
+    一次模擬 N 場戰鬥。
+    player_species / enemy_species: (N, 隊伍大小) 物種代碼 (StatTables.index / team), 空位 NO_MONSTER
+    *_levels: 可以 broadcast 成隊伍形狀的等級
+    items: (回復, 攻擊, 防禦) 藥水數量, 形狀 (3,) 或 (N, 3)
+    玩家照 engine.potion_policy(heal_below, use_boosts) 行動, 敵方一律攻擊。
+    '''
+    player_species = np.atleast_2d(np.asarray(player_species, dtype=np.int32))
+    enemy_species = np.atleast_2d(np.asarray(enemy_species, dtype=np.int32))
+    n = max(len(player_species), len(enemy_species))
+    player_species = np.broadcast_to(player_species, (n, player_species.shape[1]))
+    enemy_species = np.broadcast_to(enemy_species, (n, enemy_species.shape[1]))
+    player_levels = np.broadcast_to(np.asarray(player_levels, dtype=np.int32), player_species.shape)
+    enemy_levels = np.broadcast_to(np.asarray(enemy_levels, dtype=np.int32), enemy_species.shape)
+
+    php, patk, pdef, ptype = _team_stats(tables, player_species, player_levels)
+    pmax = php.copy()
+    ehp, eatk, edef, etype = _team_stats(tables, enemy_species, enemy_levels)
+    stock = np.array(np.broadcast_to(np.asarray(items, dtype=np.int32), (n, 3)))
+    heals, strengths, defenses = stock[:, 0], stock[:, 1], stock[:, 2]
+    atk_boost = np.zeros(n, dtype=np.int32)
+    def_boost = np.zeros(n, dtype=np.int32)
+
+    # 0: 還在打, 1: 贏, -1: 輸
+    outcome = np.zeros(n, dtype=np.int8)
+    turns = np.zeros(n, dtype=np.int32)
+    alive = php > 0
+    outcome[~alive.any(axis=1)] = -1
+    pa = alive.argmax(axis=1)
+    ea = np.zeros(n, dtype=np.intp)
+
+    live = np.flatnonzero(outcome == 0)
+    for _ in range(max_turns):
+        if live.size == 0:
+            break
+        pi, ei = pa[live], ea[live]
+        hp, mx = php[live, pi], pmax[live, pi]
+
+        # 玩家行動 (potion_policy)
+        use_heal = (heals[live] > 0) & (hp < heal_below * mx)
+        if use_boosts:
+            use_str = ~use_heal & (strengths[live] > 0)
+            use_def = ~use_heal & ~use_str & (defenses[live] > 0)
+        else:
+            use_str = use_def = np.zeros(live.size, dtype=bool)
+        use_atk = ~(use_heal | use_str | use_def)
+
+        rows = live[use_heal]
+        php[rows, pi[use_heal]] = np.minimum(hp[use_heal] + rules.HEAL_AMOUNT, mx[use_heal])
+        heals[rows] -= 1
+        rows = live[use_str]
+        atk_boost[rows] += rules.STRENGTH_BOOST
+        strengths[rows] -= 1
+        rows = live[use_def]
+        def_boost[rows] += rules.DEFENSE_BOOST
+        defenses[rows] -= 1
+
+        rows, api, aei = live[use_atk], pi[use_atk], ei[use_atk]
+        dmg = _damage(tables, patk[rows, api] + atk_boost[rows], edef[rows, aei], ptype[rows, api], etype[rows, aei])
+        left = np.maximum(ehp[rows, aei] - dmg, 0)
+        ehp[rows, aei] = left
+        knocked_out = np.zeros(live.size, dtype=bool)
+        knocked_out[use_atk] = left <= 0
+        rows = live[knocked_out]
+        if rows.size:
+            # 敵方換下一隻, 換上後輪到玩家; 全倒就贏了
+            alive = ehp[rows] > 0
+            has_next = alive.any(axis=1)
+            outcome[rows[~has_next]] = 1
+            ea[rows[has_next]] = alive[has_next].argmax(axis=1)
+            turns[rows[has_next]] += 1
+
+        # 敵方回合
+        attacking = ~knocked_out
+        rows, dpi, dei = live[attacking], pi[attacking], ei[attacking]
+        dmg = _damage(tables, eatk[rows, dei], pdef[rows, dpi] + def_boost[rows], etype[rows, dei], ptype[rows, dpi])
+        left = np.maximum(php[rows, dpi] - dmg, 0)
+        php[rows, dpi] = left
+        turns[rows] += 1
+        rows = rows[left <= 0]
+        if rows.size:
+            # 自動換上第一隻還有血的, 藥水加成跟著舊的那隻下場
+            alive = php[rows] > 0
+            has_next = alive.any(axis=1)
+            outcome[rows[~has_next]] = -1
+            rows, alive = rows[has_next], alive[has_next]
+            pa[rows] = alive.argmax(axis=1)
+            atk_boost[rows] = 0
+            def_boost[rows] = 0
+
+        live = live[outcome[live] == 0]
+
+    return BatchResult(outcome == 1, turns, php.sum(axis=1), ehp.sum(axis=1))
+
+
+def _levels(rng, level: int, spread: int, shape) -> "np.ndarray":
+    if spread <= 0:
+        return np.full(shape, level, dtype=np.int32)
+    low, high = max(1, level - spread), min(MAX_LEVEL, level + spread)
+    return rng.integers(low, high + 1, size=shape, dtype=np.int32)
+
+
+def species_matrix(tables: StatTables,
+                   player_level: int,
+                   enemy_level: int | None = None,
+                   species: Sequence[str] | None = None,
+                   level_spread: int = 0,
+                   samples: int = 1,
+                   items=(0, 0, 0),
+                   seed: int | None = None,
+                   **policy) -> WinRates:
+    '''物種對物種的一對一勝率: rates[i, j] 是玩家派 species[i] 打 species[j] 的勝率'''
+    species = tuple(species or tables.species)
+    enemy_level = player_level if enemy_level is None else enemy_level
+    if level_spread <= 0:
+        samples = 1
+    codes = np.array(tables.codes(species), dtype=np.int32)
+    s = len(codes)
+    rng = np.random.default_rng(seed)
+    # 列出 (玩家, 敵方, 第幾次) 的所有組合, 一次模擬
+    player = np.repeat(codes, s * samples)[:, None]
+    enemy = np.tile(np.repeat(codes, samples), s)[:, None]
+    result = simulate(tables, player, _levels(rng, player_level, level_spread, player.shape),
+                      enemy, _levels(rng, enemy_level, level_spread, enemy.shape), items, **policy)
+    return WinRates(species, species, result.won.reshape(s, s, samples).mean(axis=2))
+
+
+def level_matrix(tables: StatTables,
+                 player_species: str,
+                 enemy_species: str,
+                 levels: Sequence[int],
+                 items=(0, 0, 0),
+                 **policy) -> WinRates:
+    '''同一組物種, 玩家等級 (列) x 敵方等級 (欄) 的勝負'''
+    levels = tuple(levels)
+    k = len(levels)
+    lv = np.array(levels, dtype=np.int32)
+    result = simulate(tables,
+                      np.full((k * k, 1), tables.index[player_species], dtype=np.int32), np.repeat(lv, k)[:, None],
+                      np.full((k * k, 1), tables.index[enemy_species], dtype=np.int32), np.tile(lv, k)[:, None],
+                      items, **policy)
+    return WinRates(levels, levels, result.won.reshape(k, k).astype(float))
+
+
+def trainer_matrix(tables: StatTables,
+                   player_team: Sequence[str],
+                   levels: Sequence[int],
+                   trainers: Sequence[str] | None = None,
+                   level_spread: int = 0,
+                   samples: int = 1,
+                   items=(0, 0, 0),
+                   seed: int | None = None,
+                   **policy) -> WinRates:
+    '''玩家隊伍在各等級 (列) 打 trainers.json 每個訓練家整隊 (欄) 的勝率'''
+    database = tables.database
+    trainers = tuple(trainers or database.trainers)
+    levels = tuple(levels)
+    if level_spread <= 0:
+        samples = 1
+    rng = np.random.default_rng(seed)
+    enemy_teams = tables.team([[m.name for m in database.trainers[t].team] for t in trainers])
+    enemy_levels = np.zeros(enemy_teams.shape, dtype=np.int32)
+    for row, t in enumerate(trainers):
+        team_levels = [m.level for m in database.trainers[t].team]
+        enemy_levels[row, :len(team_levels)] = team_levels
+    t, k = len(trainers), len(levels)
+
+    per_cell = t * samples
+    player = np.broadcast_to(tables.team([player_team]), (k * per_cell, max(1, len(player_team))))
+    player_levels = np.concatenate([_levels(rng, lv, level_spread, (per_cell, player.shape[1])) for lv in levels])
+    enemy = np.tile(np.repeat(enemy_teams, samples, axis=0), (k, 1))
+    enemy_lv = np.tile(np.repeat(enemy_levels, samples, axis=0), (k, 1))
+    result = simulate(tables, player, player_levels, enemy, enemy_lv, items, **policy)
+    return WinRates(levels, trainers, result.won.reshape(k, t, samples).mean(axis=2))
+
+
+def _level_range(text: str) -> list[int]:
+    parts = [int(p) for p in text.split(":")]
+    if len(parts) == 1:
+        return parts
+    start, stop = parts[0], parts[1]
+    step = parts[2] if len(parts) > 2 else 1
+    return list(range(start, stop + 1, step))
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m src.battle.simulator", description="Batch battle simulator")
+    parser.add_argument("--heal", type=int, default=0, help="Heal Potions")
+    parser.add_argument("--strength", type=int, default=0, help="Strength Potions")
+    parser.add_argument("--defense", type=int, default=0, help="Defense Potions")
+    parser.add_argument("--heal-below", type=float, default=0.3)
+    parser.add_argument("--spread", type=int, default=0, help="random level spread (+-)")
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=None)
+    sub = parser.add_subparsers(dest="mode", required=True)
+    sp = sub.add_parser("species", help="species vs species win rates")
+    sp.add_argument("--level", type=int, default=20)
+    sp.add_argument("--enemy-level", type=int, default=None)
+    lv = sub.add_parser("levels", help="player level x enemy level for one pairing")
+    lv.add_argument("player")
+    lv.add_argument("enemy")
+    lv.add_argument("--levels", default="5:50:5")
+    tr = sub.add_parser("trainers", help="player team vs every trainer in trainers.json")
+    tr.add_argument("--team", required=True, help="comma separated species")
+    tr.add_argument("--levels", default="5:50:5")
+    args = parser.parse_args(argv)
+
+    tables = StatTables(get_database())
+    items = (args.heal, args.strength, args.defense)
+    common = dict(items=items, heal_below=args.heal_below)
+    if args.mode == "species":
+        rates = species_matrix(tables, args.level, args.enemy_level, level_spread=args.spread,
+                               samples=args.samples, seed=args.seed, **common)
+    elif args.mode == "levels":
+        rates = level_matrix(tables, args.player, args.enemy, _level_range(args.levels), **common)
+    else:
+        rates = trainer_matrix(tables, args.team.split(","), _level_range(args.levels), level_spread=args.spread,
+                               samples=args.samples, seed=args.seed, **common)
+    print(rates.format())
+
+
+if __name__ == "__main__":
+    main()
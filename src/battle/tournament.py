@@ -0,0 +1,274 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterable, NamedTuple, Sequence
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from src.battle import rules
+from src.battle.simulator import StatTables, simulate
+from src.data.database import MAX_LEVEL, TeamMember, get_database
+from src.utils import GameSettings
+from src.utils.save_format import read_file
+
+'''
+循環賽: trainers.json 的每個訓練家隊伍 (和存檔背包裡的玩家隊伍) 兩兩對戰
+
+每一組對戰 (挑戰方, 防守方) 打 games 場, 挑戰方當「玩家」那一邊 (先出手, 照
+potion_policy 喝藥水), 防守方一律攻擊; 每一對都會兩邊各當一次挑戰方。
+雙方每隻怪獸的等級各自在 ±spread 內隨機, 否則同一組對戰每場結果都一樣。
+
+對戰分成 task 丟給 ProcessPoolExecutor, 每個 worker 自己建一份 StatTables,
+一個 task 裡的所有場次用 src/battle/simulator.py 一次模擬。
+每一組對戰的亂數種子是 SeedSequence([seed, 挑戰方, 防守方]), 和 task 怎麼切、
+有幾個 worker、哪個先做完都無關, 同樣的 --seed 結果一定相同。
+
+    python -m src.battle.tournament --games 2000 --spread 2
+    python -m src.battle.tournament --workers 8 --chunk 4 --json tournament.json
+
+玩家隊伍讀的是存檔本身 (不套用自動存檔日誌), 一律滿血; 背包的藥水只有玩家當挑戰方時會用到。
+'''
+
+PLAYER = "Player"
+
+
+class Entrant(NamedTuple):
+    name: str
+    team: tuple[TeamMember, ...]
+    items: tuple[int, int, int] = (0, 0, 0)   # 回復 / 攻擊 / 防禦藥水
+
+
+class Task(NamedTuple):
+    id: int
+    matchups: tuple[tuple[int, int], ...]      # (挑戰方, 防守方) 在 entrants 中的索引
+    games: int
+    spread: int
+    seed: int
+
+
+class TaskResult(NamedTuple):
+    id: int
+    matchups: tuple[tuple[int, int], ...]
+    wins: tuple[int, ...]                      # 挑戰方贏的場數
+    turns: tuple[int, ...]                     # 回合數總和
+    cpu_seconds: float
+
+
+class Standing(NamedTuple):
+    name: str
+    wins: int
+    games: int
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.games if self.games else 0.0
+
+
+class TournamentResult(NamedTuple):
+    entrants: tuple[str, ...]
+    games: int
+    wins: "np.ndarray"              # wins[i, j]: i 挑戰 j 贏的場數
+    turns: "np.ndarray"             # 回合數總和
+    battles: int
+    wall_seconds: float
+    cpu_seconds: float              # 所有 worker 花在模擬上的 CPU 時間
+    workers: int
+
+    def standings(self) -> list[Standing]:
+        '''當挑戰方贏的 + 當防守方守住的, 依勝率排序'''
+        n = len(self.entrants)
+        out = []
+        for i, name in enumerate(self.entrants):
+            others = [j for j in range(n) if j != i]
+            wins = int(self.wins[i, others].sum() + (self.games - self.wins[others, i]).sum())
+            out.append(Standing(name, wins, 2 * self.games * len(others)))
+        return sorted(out, key=lambda s: s.win_rate, reverse=True)
+
+    def to_dict(self) -> dict:
+        return {
+            "entrants": list(self.entrants),
+            "games": self.games,
+            "wins": self.wins.tolist(),
+            "turns": self.turns.tolist(),
+            "standings": [{"name": s.name, "wins": s.wins, "games": s.games} for s in self.standings()],
+            "battles": self.battles,
+            "wall_seconds": self.wall_seconds,
+            "cpu_seconds": self.cpu_seconds,
+            "workers": self.workers,
+        }
+
+
+def trainer_entrants(trainers: Iterable[str] | None = None) -> list[Entrant]:
+    database = get_database()
+    ids = list(trainers) if trainers else list(database.trainers)
+    entrants = []
+    for t in ids:
+        record = database.trainers[t]
+        items = dict(record.items)
+        entrants.append(Entrant(record.name, record.team, tuple(items.get(name, 0) for name in rules.POTIONS)))
+    return entrants
+
+
+def player_entrant(save_path: str) -> Entrant:
+    '''存檔背包裡的怪獸與藥水'''
+    bag = read_file(save_path).get("bag", {})
+    team = tuple(TeamMember(m.get("name", "Sproutkit"), m.get("level", 5)) for m in bag.get("monsters", []))
+    counts = {item.get("name"): item.get("count", 0) for item in bag.get("items", [])}
+    return Entrant(PLAYER, team, tuple(max(0, counts.get(name, 0)) for name in rules.POTIONS))
+
+
+def round_robin(count: int) -> list[tuple[int, int]]:
+    return [(i, j) for i in range(count) for j in range(count) if i != j]
+
+
+def make_tasks(count: int, games: int, spread: int, seed: int, chunk: int) -> list[Task]:
+    matchups = round_robin(count)
+    return [
+        Task(task_id, tuple(matchups[start:start + chunk]), games, spread, seed)
+        for task_id, start in enumerate(range(0, len(matchups), max(1, chunk)))
+    ]
+
+
+# worker 行程裡的狀態, 由 _init_worker 設定
+_entrants: list[Entrant] = []
+_tables: StatTables | None = None
+
+
+def _init_worker(entrants: Sequence[Entrant]) -> None:
+    global _entrants, _tables
+    _entrants = list(entrants)
+    _tables = StatTables(get_database())
+
+
+def _team_arrays(tables: StatTables, entrant: Entrant, rng, games: int, spread: int, size: int):
+    species = np.full(size, -1, dtype=np.int32)
+    species[:len(entrant.team)] = tables.codes([m.name for m in entrant.team])
+    levels = np.zeros((games, size), dtype=np.int32)
+    base = np.array([m.level for m in entrant.team], dtype=np.int32)
+    if spread > 0:
+        base = base + rng.integers(-spread, spread + 1, size=(games, len(base)), dtype=np.int32)
+    levels[:, :len(entrant.team)] = np.clip(base, 1, MAX_LEVEL)
+    return np.broadcast_to(species, (games, size)), levels
+
+
+def run_task(task: Task) -> TaskResult:
+    '''一個 task 的所有對戰接在一起, 呼叫一次 simulate'''
+    start = time.process_time()
+    tables, entrants = _tables, _entrants
+    size = max(len(e.team) for e in entrants)
+    parts = []
+    for challenger, defender in task.matchups:
+        rng = np.random.default_rng(np.random.SeedSequence([task.seed, challenger, defender]))
+        parts.append((
+            *_team_arrays(tables, entrants[challenger], rng, task.games, task.spread, size),
+            *_team_arrays(tables, entrants[defender], rng, task.games, task.spread, size),
+            np.broadcast_to(np.array(entrants[challenger].items, dtype=np.int32), (task.games, 3)),
+        ))
+    player, player_levels, enemy, enemy_levels, items = (np.concatenate(column) for column in zip(*parts))
+    result = simulate(tables, player, player_levels, enemy, enemy_levels, items)
+    wins = result.won.reshape(len(task.matchups), task.games).sum(axis=1)
+    turns = result.turns.reshape(len(task.matchups), task.games).sum(axis=1)
+    return TaskResult(task.id, task.matchups, tuple(wins.tolist()), tuple(turns.tolist()),
+                      time.process_time() - start)
+
+
+def run_tournament(entrants: Sequence[Entrant],
+                   games: int = 1000,
+                   spread: int = 2,
+                   seed: int = 0,
+                   workers: int | None = None,
+                   chunk: int = 4) -> TournamentResult:
+    '''workers=0 在目前的行程裡跑 (除錯用), None 用全部核心'''
+    if np is None:
+        raise ImportError("src.battle.tournament needs numpy")
+    entrants = list(entrants)
+    database = get_database()
+    for entrant in entrants:
+        unknown = [m.name for m in entrant.team if m.name not in database.species]
+        if unknown:
+            raise ValueError(f"{entrant.name}: unknown species {', '.join(unknown)}")
+        if not entrant.team:
+            raise ValueError(f"{entrant.name} has no monsters")
+
+    n = len(entrants)
+    tasks = make_tasks(n, games, spread, seed, chunk)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    started = time.perf_counter()
+    if workers == 0:
+        _init_worker(entrants)
+        results = [run_task(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(entrants,)) as pool:
+            futures = [pool.submit(run_task, task) for task in tasks]
+            results = [future.result() for future in as_completed(futures)]
+    wall = time.perf_counter() - started
+
+    # 合併: 依 task 編號排序, 結果和完成順序無關
+    wins = np.zeros((n, n), dtype=np.int64)
+    turns = np.zeros((n, n), dtype=np.int64)
+    for result in sorted(results, key=lambda r: r.id):
+        for (i, j), w, t in zip(result.matchups, result.wins, result.turns):
+            wins[i, j] += w
+            turns[i, j] += t
+    return TournamentResult(
+        tuple(e.name for e in entrants), games, wins, turns,
+        battles=len(round_robin(n)) * games,
+        wall_seconds=wall,
+        cpu_seconds=sum(r.cpu_seconds for r in results),
+        workers=max(1, workers),
+    )
+
+
+def format_report(result: TournamentResult) -> str:
+    names = [name[:10] for name in result.entrants]
+    lines = [f"{result.games} games per matchup, challenger (row) win rate against defender (column)",
+             " " * 12 + "".join(f"{name:>11}" for name in names)]
+    for i, name in enumerate(names):
+        cells = ["          -" if i == j else f"{result.wins[i, j] / result.games:>11.2f}" for j in range(len(names))]
+        lines.append(f"{name:<12}" + "".join(cells))
+    lines.append("")
+    lines.append(f"{'standings':<12}{'wins':>9}{'games':>9}{'win rate':>10}")
+    for s in result.standings():
+        lines.append(f"{s.name[:11]:<12}{s.wins:>9}{s.games:>9}{s.win_rate:>10.3f}")
+    lines.append("")
+    lines.append(
+        f"{result.battles:,} battles in {result.wall_seconds:.2f} s on {result.workers} worker(s): "
+        f"{result.battles / result.wall_seconds:,.0f} battles/s, "
+        f"{result.battles / result.wall_seconds / result.workers:,.0f} battles/s/core "
+        f"({result.battles / max(result.cpu_seconds, 1e-9):,.0f} per CPU second in the simulator)"
+    )
+    return "\n".join(lines)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m src.battle.tournament",
+                                     description="Round-robin tournament of the trainers in trainers.json")
+    parser.add_argument("--games", type=int, default=1000, help="battles per matchup")
+    parser.add_argument("--spread", type=int, default=2, help="random level spread (+-)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores, 0: no pool)")
+    parser.add_argument("--chunk", type=int, default=4, help="matchups per task")
+    parser.add_argument("--trainers", default=None, help="comma separated trainer ids (default: all)")
+    parser.add_argument("--save", default=GameSettings.SAVE_PATH, help="save file with the player's bag")
+    parser.add_argument("--no-player", action="store_true", help="trainers only")
+    parser.add_argument("--json", default=None, help="write the merged results to this file")
+    args = parser.parse_args(argv)
+
+    entrants = trainer_entrants(args.trainers.split(",") if args.trainers else None)
+    if not args.no_player:
+        entrants.append(player_entrant(args.save))
+    result = run_tournament(entrants, args.games, args.spread, args.seed, args.workers, args.chunk)
+    print(format_report(result))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result.to_dict(), f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,8 @@
 import pygame as pg
 
 from src.utils import GameSettings, Logger
-from .services import scene_manager, input_manager
+from .services import scene_manager, input_manager, save_manager
+from .managers.save_journal import discard
 
 from src.scenes.menu_scene import MenuScene
 from src.scenes.game_scene import GameScene
@@ -43,6 +44,8 @@ class Engine:
             self.handle_events()
             self.update(dt)
             self.render()
+        save_manager.flush() # 關閉前寫完背景存檔
+        discard(GameSettings.SAVE_PATH) # 正常結束: 下次啟動不套用自動存檔日誌
 
     def handle_events(self):
         input_manager.reset()
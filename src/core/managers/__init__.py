@@ -3,4 +3,5 @@ from .input_manager import InputManager
 from .resource_manager import ResourceManager
 from .sound_manager import SoundManager
 from .game_manager import GameManager
+from .save_manager import SaveManager
 from .online_manager import OnlineManager
\ No newline at end of file
@@ -1,6 +1,10 @@
 from __future__ import annotations
 from src.utils import Logger, GameSettings, Position, Teleport
-import json, os
+from src.utils.save_format import convert, is_binary_path, read_file
+from .save_journal import replay
+from src.data.database import get_database
+from src.data.encounters import EncounterTables
+import os
 import pygame as pg
 from typing import TYPE_CHECKING
 import shutil
@@ -12,6 +16,7 @@ if TYPE_CHECKING:
     from src.entities.merchant import Merchant
     from src.entities.nurse import Nurse
     from src.data.bag import Bag
+    from src.data.database import GameDatabase
 
 class GameManager:
     # Entities
@@ -21,6 +26,8 @@ class GameManager:
     bag: "Bag"
 
     # Databases
+    database: GameDatabase
+    encounters: EncounterTables
     item_database: dict[str, dict]
     monster_database: dict[str, dict]
     trainer_database: dict[str, dict]
@@ -34,6 +41,7 @@ class GameManager:
     next_map: str
     player_last_positions: dict[str, Position]
     player_spawns: dict[str, Position]
+    journal_generation: int     # 最後一次完整存檔的編號 (save_journal.py)
     
     def __init__(self, maps: dict[str, Map], start_map: str, 
                  player: Player | None,
@@ -52,15 +60,21 @@ class GameManager:
         self.nurses = nurses if nurses is not None else {}
         self.bag = bag if bag is not None else Bag([], [])
 
-        self.item_database = self._load_database("src/data/items.json")
-        self.monster_database = self._load_database("src/data/monsters.json")
-        self.trainer_database = self._load_database("src/data/trainers.json")
+        # 靜態資料庫只讀一次, 所有 GameManager 共用 (src/data/database.py)
+        self.database = get_database()
+        self.item_database = self.database.raw_items
+        self.monster_database = self.database.raw_monsters
+        self.trainer_database = self.database.raw_trainers
+        # 野生遭遇表: 每個草叢區域的表在載入時建好
+        self.encounters = EncounterTables(self.database, GameSettings.ENCOUNTER_SEED)
+        self.encounters.build(area for m in maps.values() for area, _ in m.grass_areas.values())
         
         # Check If you should change scene
         self.should_change_scene = False
         self.next_map = ""
         self.player_last_positions = {}
         self.player_spawns = {}
+        self.journal_generation = 0
         
     @property
     def current_map(self) -> Map:
@@ -98,6 +112,17 @@ class GameManager:
                 else:
                     self.player.position = self.maps[self.current_map_key].spawn
             
+    def place_player(self, map_key: str, x: float, y: float) -> bool:
+        '''伺服器的位置修正: 直接回到 map_key 的 (x, y), 不經過傳送點 (傳送被拒絕時換回原本的地圖)'''
+        if self.player is None or map_key not in self.maps:
+            return False
+        self.next_map = ""
+        self.should_change_scene = False
+        self.current_map_key = map_key
+        self.player.position.x = x
+        self.player.position.y = y
+        return True
+
     def check_collision(self, rect: pg.Rect) -> bool:
         if self.maps[self.current_map_key].check_collision(rect):
             return True
@@ -112,39 +137,37 @@ class GameManager:
     def save(self, path: str) -> None:
         '''
         check point 2 - 4: Setting Overlay 存檔功能
-        存檔功能: 先寫入暫存檔，確認寫入成功後再覆蓋原檔，避免寫入中斷導致檔案損毀
+        主執行緒只拍下目前狀態 (to_dict), 寫檔交給背景的 SaveManager:
+        先寫入暫存檔並 fsync, 再用 os.replace 覆蓋原檔, 避免寫入中斷導致檔案損毀
         '''
-        tmp_path = f"{path}.tmp"
+        from src.core.services import save_manager
         try:
-            with open(tmp_path, "w") as f:
-                json.dump(self.to_dict(), f, indent=2)
-            if os.path.exists(path): # 如果寫入成功，覆蓋舊檔
-                os.remove(path)
-            os.rename(tmp_path, path)
-            Logger.info(f"Game saved to {path}")
+            # 新的存檔編號: 日誌中比它舊的行都已經包含在這份存檔裡
+            self.journal_generation += 1
+            data = self.to_dict()
+            data["journal"] = self.journal_generation
+            save_manager.submit(path, data)
         except Exception as e:
-            if os.path.exists(tmp_path): # 如果失敗，刪除殘留的暫存檔
-                os.remove(tmp_path)
             Logger.warning(f"Failed to save game: {e}")
              
     @classmethod
-    def load(cls, path: str) -> "GameManager | None":
+    def load(cls, path: str, recover: bool = False) -> "GameManager | None":
         '''
         check point 2 - 4: Setting Overlay 讀檔功能
         讀檔功能: 如果檔案為空或是找不到檔案, 則從backup恢復
+        recover: 遊戲啟動時才設為 True, 套用上次當機前的自動存檔日誌
         '''
+        from src.core.services import save_manager
         data = None
         backup_path = "saves/backup.json"
+        save_manager.flush() # 等還沒寫完的存檔
 
         if os.path.exists(path):
             try:
-                with open(path, "r") as f:
-                    content = f.read()
-                    if not content.strip(): # 檢查檔案是否完全空白
-                        raise json.JSONDecodeError("Empty file", "", 0)                  
-                    f.seek(0)
-                    data = json.load(f)                 
-            except (json.JSONDecodeError, Exception) as e:
+                data = read_file(path) # 只讀一次, 空檔或 checksum 錯誤都會丟例外
+                if recover:
+                    data = replay(path, data) # 套用上次完整存檔之後的自動存檔日誌
+            except Exception as e:
                 Logger.warning(f"Failed to load {path} (Error: {e}). Trying backup...")
                 data = None 
         else:
@@ -155,10 +178,12 @@ class GameManager:
             if os.path.exists(backup_path):
                 try:
                     Logger.info(f"Loading from backup: {backup_path}")
-                    with open(backup_path, "r") as f:
-                        data = json.load(f)
+                    data = read_file(backup_path)
                     try:
-                        shutil.copy(backup_path, path) # 複製 backup.json 到 game0.json
+                        if is_binary_path(path): # 存檔是 .sav 時轉成二進位
+                            convert(backup_path, path)
+                        else:
+                            shutil.copy(backup_path, path) # 複製 backup.json 到 game0.json
                         Logger.info(f"Restored {path} using {backup_path}")
                     except Exception as copy_error:
                         Logger.warning(f"Could not restore file: {copy_error}")
@@ -244,6 +269,7 @@ class GameManager:
         )
 
         gm.player_spawns = player_spawns
+        gm.journal_generation = int(data.get("journal", 0))
         gm.current_map_key = current_map
         
         Logger.info("Loading enemy trainers")
@@ -270,17 +296,3 @@ class GameManager:
         gm.bag = Bag.from_dict(data.get("bag", {})) if data.get("bag") else _Bag([], [])
 
         return gm
-    
-    def _load_database(self, path: str) -> dict:
-        try:
-            if os.path.exists(path):
-                with open(path, "r", encoding='utf-8') as f:
-                    data = json.load(f)
-                    Logger.info(f"Loaded database: {path}")
-                    return data
-            else:
-                Logger.warning(f"Database not found at {path}")
-                return {}
-        except Exception as e:
-            Logger.error(f"Failed to load database {path}: {e}")
-            return {}
\ No newline at end of file
@@ -3,13 +3,15 @@ import threading
 import time
 import queue
 import collections
-import json
 from collections import deque
-from typing import Optional
-from src.utils import Logger, GameSettings
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Optional
+from urllib.parse import urlencode
+from src.utils import Logger, GameSettings, JsonCodec, get_codec
 
 try:
     import websockets
+    from websockets.extensions.permessage_deflate import ClientPerMessageDeflateFactory
 except ImportError:
     Logger.error("websockets library not installed. Run: pip install websockets")
     websockets = None
@@ -17,8 +19,73 @@ except ImportError:
 from typing import Any
 
 
+class RemotePlayer(NamedTuple):
+    id: int
+    x: float
+    y: float
+    map: str
+    direction: str
+    is_moving: bool
+
+
+class PlayersSnapshot(NamedTuple):
+    """
+    Remote players as of the latest players_update, without ourselves.
+    Built by the WebSocket thread and never modified afterwards, so the game
+    loop can read it without a lock. version only changes when the players
+    did, so a caller can skip its own work when it has already seen it.
+    """
+    version: int
+    players: Mapping[int, RemotePlayer]
+
+
+_EMPTY_SNAPSHOT = PlayersSnapshot(0, MappingProxyType({}))
+
+# Chat channel commands (server/chatChannels.py); plain text goes to the current map
+_CHAT_PREFIXES = {"/g": "global", "/m": "map", "/n": "near"}
+
+# players_update frames as server/frameCache.py writes them
+_PLAYERS_PREFIX = '{"type": "players_update", "players": '
+_PLAYERS_SUFFIX = ', "timestamp": '
+
+
+def _players_text(message: str) -> Optional[str]:
+    """The raw players object of a players_update frame, None for any other message"""
+    if not message.startswith(_PLAYERS_PREFIX):
+        return None
+    end = message.rfind(_PLAYERS_SUFFIX)
+    if end < 0:
+        return None
+    return message[len(_PLAYERS_PREFIX):end]
+
+
+def _parse_players(players_data: dict, own_id: int) -> dict[int, RemotePlayer]:
+    try:
+        # Fast path: the server writes every field with its JSON type already
+        return {
+            pid: RemotePlayer(pid, p["x"], p["y"], p["map"], p["direction"], p["is_moving"])
+            for p in players_data.values()
+            if (pid := p["id"]) != own_id
+        }
+    except (KeyError, TypeError):
+        pass
+    players: dict[int, RemotePlayer] = {}
+    for pid_str, player_data in players_data.items():
+        pid = int(pid_str)
+        if pid != own_id:
+            players[pid] = RemotePlayer(
+                pid,
+                float(player_data.get("x", 0)),
+                float(player_data.get("y", 0)),
+                str(player_data.get("map", "")),
+                str(player_data.get("direction", "down")),
+                bool(player_data.get("is_moving", False)),
+            )
+    return players
+
+
 class OnlineManager:
-    list_players: list[dict]
+    players_snapshot: PlayersSnapshot
     player_id: int
     # WebSocket state
     _ws: Optional[Any]
@@ -30,6 +97,11 @@ class OnlineManager:
     _chat_out_queue: queue.Queue
     _chat_messages: collections.deque
     _last_chat_id: int
+    _handoff_url: Optional[str]
+    _session_token: Optional[str]
+    _correction: Optional[dict]
+    _last_players_text: Optional[str]
+    codec: JsonCodec
 
     def __init__(self):
         if websockets is None:
@@ -46,7 +118,9 @@ class OnlineManager:
             self.ws_url = f"ws://{self.base}"
 
         self.player_id = -1
-        self.list_players = []
+        self.players_snapshot = _EMPTY_SNAPSHOT
+        self._last_players_text = None
+        self.codec = get_codec()
         self._ws = None
         self._ws_loop = None
         self._ws_thread = None
@@ -56,6 +130,9 @@ class OnlineManager:
         self._chat_out_queue = queue.Queue(maxsize=50)
         self._chat_messages = deque(maxlen=200)
         self._last_chat_id = 0
+        self._handoff_url = None
+        self._session_token = None
+        self._correction = None
 
         Logger.info("OnlineManager initialized")
 
@@ -66,9 +143,14 @@ class OnlineManager:
         self.stop()
 
     def get_list_players(self) -> list[dict]:
-        """Get list of players"""
+        """Get list of players (as dicts; the game loop reads players_snapshot instead)"""
+        return [p._asdict() for p in self.players_snapshot.players.values()]
+
+    def pop_position_correction(self) -> Optional[dict]:
+        """Position the server moved us back to ({x, y, map}), once"""
         with self._lock:
-            return list(self.list_players)
+            correction, self._correction = self._correction, None
+            return correction
 
     def update(self, x: float, y: float, map_name: str, direction: str, is_moving: bool) -> bool:
         """Queue position update (no dir / moving)."""
@@ -136,12 +218,17 @@ class OnlineManager:
         max_reconnect_delay = 30.0
 
         while not self._stop_event.is_set():
+            # A sharded server may hand us over to the worker that owns our map;
+            # that URL is used once, any later reconnect goes through the front door
+            url = self._session_url(self._handoff_url or self.ws_url)
+            self._handoff_url = None
             try:
                 # Connect to WebSocket server
                 async with websockets.connect(
-                    self.ws_url,
+                    url,
                     ping_interval=20,
-                    ping_timeout=10
+                    ping_timeout=10,
+                    **self._compression_options()
                 ) as websocket:
                     self._ws = websocket
                     Logger.info("WebSocket connected")
@@ -171,52 +258,100 @@ class OnlineManager:
                 reconnect_delay = min(reconnect_delay * 2, max_reconnect_delay)
             finally:
                 self._ws = None
-                if not self._stop_event.is_set():
+                if not self._stop_event.is_set() and not self._handoff_url:
                     await asyncio.sleep(0.5)
 
+    def _session_url(self, url: str) -> str:
+        """Reconnect with our session token so the server gives back the same id and only new chat"""
+        params = {}
+        if self._session_token and "token=" not in url:
+            params["token"] = self._session_token
+        if self._last_chat_id > 0:
+            params["chat_since"] = self._last_chat_id
+        if not params:
+            return url
+        return url + ("&" if "?" in url else "?") + urlencode(params)
+
+    def _compression_options(self) -> dict[str, Any]:
+        """
+        Offer permessage-deflate and let the server pick the window it compresses
+        with; our own messages are small, so a small window is enough for them
+        """
+        if not GameSettings.ONLINE_COMPRESSION:
+            return {"compression": None}
+        return {
+            "compression": None,
+            "extensions": [ClientPerMessageDeflateFactory(
+                client_max_window_bits=True,
+                compress_settings={"memLevel": 4},
+            )],
+        }
+
     async def _handle_message(self, message: str) -> None:
         """Handle incoming WebSocket message"""
         try:
-            data = json.loads(message)
+            # The server sends players_update 60 times a second whether anybody moved
+            # or not; when the players part is unchanged there is nothing to decode
+            players_text = _players_text(message)
+            if players_text is not None and players_text == self._last_players_text:
+                return
+
+            data = self.codec.loads(message)
             msg_type = data.get("type")
 
             if msg_type == "registered":
                 self.player_id = int(data.get("id", -1))
-                Logger.info(f"OnlineManager registered with id={self.player_id}")
+                self._session_token = data.get("token") or None
+                self._last_players_text = None
+                if data.get("chat_since") == 0:
+                    # The server did not take our token (e.g. it restarted), chat ids start over
+                    self._last_chat_id = 0
+                if data.get("resumed"):
+                    Logger.info(f"OnlineManager resumed session id={self.player_id}")
+                else:
+                    Logger.info(f"OnlineManager registered with id={self.player_id}")
 
             elif msg_type == "players_update":
-                players_data = data.get("players", {})
-                with self._lock:
-                    filtered = []
-                    for pid_str, player_data in players_data.items():
-                        pid = int(pid_str)
-                        if pid != self.player_id:
-
-                            # HINT: This part might be helpful for direction change
-                            # Maybe you can add other parameters?
-                            filtered.append({
-                                "id": pid,
-                                "x": float(player_data.get("x", 0)),
-                                "y": float(player_data.get("y", 0)),
-                                "map": str(player_data.get("map", "")),
-                                "direction": str(player_data.get("direction", "down")),
-                                "is_moving": bool(player_data.get("is_moving", False)),
-                            })
-                    self.list_players = filtered
+                self._last_players_text = players_text
+                players = _parse_players(data.get("players", {}), self.player_id)
+                # Publish with a single reference swap; readers see the old or the new one
+                self.players_snapshot = PlayersSnapshot(self.players_snapshot.version + 1, MappingProxyType(players))
 
             elif msg_type == "chat_update":
                 messages = data.get("messages", [])
+                # _last_chat_id is only touched on this thread; the lock guards the deque
+                fresh = []
+                for m in messages:
+                    mid = int(m.get("id", self._last_chat_id))
+                    # Skip anything we already have (backlog after a handoff or resume)
+                    if 0 < mid <= self._last_chat_id:
+                        continue
+                    fresh.append(m)
+                    if mid > self._last_chat_id:
+                        self._last_chat_id = mid
+                if fresh:
+                    with self._lock:
+                        self._chat_messages.extend(fresh)
+
+            elif msg_type == "position_correction":
+                # The server rejected a move (too fast, through a wall, ...)
                 with self._lock:
-                    for m in messages:
-                        self._chat_messages.append(m)
-                        mid = int(m.get("id", self._last_chat_id))
-                        if mid > self._last_chat_id:
-                            self._last_chat_id = mid
+                    self._correction = {
+                        "x": float(data.get("x", 0)),
+                        "y": float(data.get("y", 0)),
+                        "map": str(data.get("map", "")),
+                    }
+
+            elif msg_type == "handoff":
+                self._handoff_url = str(data.get("url", "")) or None
+                Logger.info(f"OnlineManager handed off to {self._handoff_url}")
+                if self._ws:
+                    await self._ws.close()
 
             elif msg_type == "error":
                 Logger.warning(f"Server error: {data.get('message', 'unknown')}")
 
-        except json.JSONDecodeError as e:
+        except ValueError as e:
             Logger.warning(f"Failed to parse WebSocket message: {e}")
         except Exception as e:
             Logger.warning(f"Error handling WebSocket message: {e}")
@@ -250,18 +385,19 @@ class OnlineManager:
                             "direction": latest_update.get("direction"),
                             "is_moving": latest_update.get("is_moving"),
                         }
-                        await websocket.send(json.dumps(message))
+                        await websocket.send(self.codec.dumps(message))
                         last_update = now
 
                 # Send chat messages
                 try:
-                    chat_text = self._chat_out_queue.get_nowait()
+                    chat_text, channel = self._chat_out_queue.get_nowait()
                     if self.player_id >= 0:
                         message = {
                             "type": "chat_send",
-                            "text": chat_text
+                            "text": chat_text,
+                            "channel": channel
                         }
-                        await websocket.send(json.dumps(message))
+                        await websocket.send(self.codec.dumps(message))
                 except queue.Empty:
                     pass
 
@@ -275,13 +411,19 @@ class OnlineManager:
     # Chat API
     # -----------------------------
     def send_chat(self, text: str) -> bool:
+        """Chat to the players on our map; "/g text" goes to everybody, "/n text" only to players nearby"""
         if self.player_id == -1:
             return False
         t = (text or "").strip()
+        channel = "map"
+        prefix, _, rest = t.partition(" ")
+        if prefix in _CHAT_PREFIXES:
+            channel = _CHAT_PREFIXES[prefix]
+            t = rest.strip()
         if not t:
             return False
         try:
-            self._chat_out_queue.put_nowait(t)
+            self._chat_out_queue.put_nowait((t, channel))
             return True
         except queue.Full:
             return False
@@ -10,12 +10,27 @@ class ResourceManager:
         self._images: dict[str, pg.Surface] = {}
         self._sounds: dict[str, pg.mixer.Sound] = {}
         self._fonts: dict[tuple[str, int], pg.font.Font] = {}
+        self._battle_images: dict[tuple[str, bool, tuple[int, int]], pg.Surface] = {}
 
     def get_image(self, path: str) -> pg.Surface:
         if path not in self._images:
             self._images[path] = load_img(path)
         return self._images[path]
 
+    def get_battle_image(self, path: str, is_player: bool, size: tuple[int, int]) -> pg.Surface:
+        """
+        Battle sprite sheets have the enemy's view on the left half and the player's on the right.
+        The half for that side, scaled to size, is made once and shared: don't draw onto it.
+        """
+        key = (path, is_player, size)
+        image = self._battle_images.get(key)
+        if image is None:
+            sheet = self.get_image(path)
+            half = sheet.get_width() // 2
+            crop = sheet.subsurface(pg.Rect(half if is_player else 0, 0, half, sheet.get_height()))
+            image = self._battle_images[key] = pg.transform.scale(crop, size)
+        return image
+
     def get_sound(self, path: str) -> pg.mixer.Sound:
         if path not in self._sounds:
             self._sounds[path] = load_sound(path)
@@ -30,5 +45,6 @@ class ResourceManager:
     def clear(self) -> None:
         """Clear all cached assets (useful when switching levels)."""
         self._images.clear()
+        self._battle_images.clear()
         self._sounds.clear()
         self._fonts.clear()
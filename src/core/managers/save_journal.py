@@ -0,0 +1,191 @@
+import os
+from typing import TYPE_CHECKING, Any
+
+from src.utils import GameSettings, Logger, get_codec
+
+if TYPE_CHECKING:
+    from src.core.managers.game_manager import GameManager
+
+'''
+自動存檔日誌 (saves/game0.json.journal)
+
+完整存檔 (GameManager.save) 要把所有地圖、NPC、背包轉成 dict 再整份寫出,
+不適合每幾秒做一次。SaveJournal 每 AUTOSAVE_INTERVAL 秒只比對會變的部分:
+目前地圖、玩家位置、背包的每一隻怪獸 / 每一個道具, 把有變的寫成一行 JSON
+附加到日誌, 由 SaveManager 在背景寫入並 fsync。
+
+每個完整存檔有一個編號 ("journal" 欄位), 日誌的每一行記錄它接在哪個編號之後
+("base")。遊戲啟動時 (GameManager.load(recover=True)) 把 base 不小於存檔編號的行
+依序套用到存檔上, 所以遊戲當掉時只會損失最後幾秒。正常關閉遊戲和設定裡手動讀檔時
+日誌會被刪掉 (discard), 所以啟動時還留著日誌就代表上次沒有正常結束。日誌累積 AUTOSAVE_COMPACT_ENTRIES 行後
+做一次完整存檔, SaveManager 寫好存檔後刪掉日誌中已經包含在存檔裡的行。
+
+一行的格式:
+    {"base": 3, "op": "map", "current_map": "gym.tmx"}
+    {"base": 3, "op": "pos", "map": "map.tmx", "x": 12.5, "y": 30.0}
+    {"base": 3, "op": "bag", "key": "monsters", "i": 0, "value": {...}}
+    {"base": 3, "op": "bag_len", "key": "items", "n": 4}
+'''
+
+JOURNAL_SUFFIX = ".journal"
+_BAG_KEYS = ("monsters", "items")
+
+
+def journal_path(path: str) -> str:
+    return path + JOURNAL_SUFFIX
+
+
+def read_entries(path: str, generation: int) -> list[dict[str, Any]]:
+    '''日誌中要套用到編號 generation 的存檔上的行; 最後一行寫到一半 (當機) 就略過'''
+    try:
+        with open(journal_path(path), "rb") as f:
+            lines = f.read().splitlines()
+    except FileNotFoundError:
+        return []
+    loads = get_codec().loads
+    entries = []
+    for line in lines:
+        try:
+            entry = loads(line)
+        except ValueError:
+            break
+        if entry.get("base", 0) >= generation:
+            entries.append(entry)
+    return entries
+
+
+def replay(path: str, data: dict[str, Any]) -> dict[str, Any]:
+    '''把日誌套用到剛讀進來的存檔 dict (GameManager.to_dict 的格式) 上'''
+    entries = read_entries(path, data.get("journal", 0))
+    if not entries:
+        return data
+    bag = data.setdefault("bag", {})
+    blocks = {block["path"]: block for block in data.get("map", [])}
+    for entry in entries:
+        op = entry.get("op")
+        if op == "map":
+            data["current_map"] = entry["current_map"]
+        elif op == "pos":
+            data["player"] = {"x": entry["x"], "y": entry["y"]}
+            block = blocks.get(entry["map"])
+            if block is not None:
+                block["player"] = {"x": int(entry["x"]), "y": int(entry["y"])}
+        elif op == "bag":
+            values = bag.setdefault(entry["key"], [])
+            i = entry["i"]
+            if i < len(values):
+                values[i] = entry["value"]
+            else:
+                values.append(entry["value"])
+        elif op == "bag_len":
+            del bag.setdefault(entry["key"], [])[entry["n"]:]
+    Logger.info(f"Replayed {len(entries)} journal entries onto {path}")
+    return data
+
+
+def compact(path: str, generation: int) -> None:
+    '''
+    存檔 generation 寫好之後呼叫 (SaveManager 的執行緒):
+    留下在它之後才寫進日誌的行, 其餘刪掉
+    '''
+    jpath = journal_path(path)
+    if not os.path.exists(jpath):
+        return
+    keep = read_entries(path, generation)
+    if not keep:
+        os.remove(jpath)
+        return
+    dumps = get_codec().dumps
+    tmp_path = f"{jpath}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write("".join(dumps(entry) + "\n" for entry in keep).encode("utf-8"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, jpath)
+
+
+def discard(path: str) -> None:
+    '''正常關閉或手動讀檔時呼叫: 等背景寫完日誌後整個刪掉, 之後只會讀到完整存檔'''
+    from src.core.services import save_manager
+    save_manager.flush()
+    try:
+        os.remove(journal_path(path))
+    except FileNotFoundError:
+        pass
+
+
+class SaveJournal:
+    path: str
+    interval: float
+    compact_entries: int
+    entries_written: int
+
+    def __init__(self, path: str, interval: float | None = None, compact_entries: int | None = None):
+        self.path = path
+        self.interval = GameSettings.AUTOSAVE_INTERVAL if interval is None else interval
+        self.compact_entries = GameSettings.AUTOSAVE_COMPACT_ENTRIES if compact_entries is None else compact_entries
+        self.entries_written = 0
+        self._timer = 0.0
+        self._since_snapshot = 0
+        self._last: dict[str, Any] = {}
+
+    def attach(self, game_manager: "GameManager") -> None:
+        '''讀檔或重新載入後呼叫: 以目前狀態為比對基準'''
+        self._last = self._state(game_manager)
+        self._timer = 0.0
+
+    def update(self, dt: float, game_manager: "GameManager") -> None:
+        if self.interval <= 0:
+            return
+        self._timer += dt
+        if self._timer < self.interval:
+            return
+        self._timer = 0.0
+        self.checkpoint(game_manager)
+
+    def checkpoint(self, game_manager: "GameManager") -> int:
+        '''把上次之後的變化寫進日誌, 回傳寫了幾行; 累積太多行就改做完整存檔'''
+        from src.core.services import save_manager
+        state = self._state(game_manager)
+        entries = self._diff(self._last, state, game_manager.journal_generation)
+        self._last = state
+        if not entries:
+            return 0
+        if self._since_snapshot + len(entries) >= self.compact_entries:
+            game_manager.save(self.path)
+            self._since_snapshot = 0
+            return 0
+        dumps = get_codec().dumps
+        save_manager.append(journal_path(self.path), [dumps(entry) + "\n" for entry in entries])
+        self._since_snapshot += len(entries)
+        self.entries_written += len(entries)
+        return len(entries)
+
+    @staticmethod
+    def _state(game_manager: "GameManager") -> dict[str, Any]:
+        # 只複製會變的部分: 怪獸 / 道具的 dict 很小, 複製比 to_dict() 便宜得多
+        player = game_manager.player
+        return {
+            "current_map": game_manager.current_map_key,
+            "pos": (player.position.x / GameSettings.TILE_SIZE, player.position.y / GameSettings.TILE_SIZE)
+                   if player is not None else None,
+            "monsters": [dict(m) for m in game_manager.bag._monsters_data],
+            "items": [dict(i) for i in game_manager.bag._items_data],
+        }
+
+    @staticmethod
+    def _diff(old: dict[str, Any], new: dict[str, Any], base: int) -> list[dict[str, Any]]:
+        entries: list[dict[str, Any]] = []
+        if new["current_map"] != old.get("current_map"):
+            entries.append({"base": base, "op": "map", "current_map": new["current_map"]})
+        if new["pos"] is not None and (new["pos"] != old.get("pos") or entries):
+            x, y = new["pos"]
+            entries.append({"base": base, "op": "pos", "map": new["current_map"], "x": x, "y": y})
+        for key in _BAG_KEYS:
+            before, after = old.get(key, []), new[key]
+            for i, value in enumerate(after):
+                if i >= len(before) or before[i] != value:
+                    entries.append({"base": base, "op": "bag", "key": key, "i": i, "value": value})
+            if len(after) < len(before):
+                entries.append({"base": base, "op": "bag_len", "key": key, "n": len(after)})
+        return entries
@@ -0,0 +1,121 @@
+import os
+import threading
+from typing import Any
+
+from src.utils import Logger
+from src.utils.save_format import dumps, is_binary_path
+from .save_journal import compact
+
+
+class SaveManager:
+    '''
+    背景存檔: 主執行緒只負責把遊戲狀態轉成 dict (GameManager.save),
+    序列化、寫檔、fsync 與 os.replace 都在存檔執行緒完成, 存檔時畫面不會卡住。
+    同一個檔案在寫入前又收到新的存檔要求時, 只寫最新的一份。
+    自動存檔日誌 (save_journal.py) 的附加也在這裡依序寫入, 且一定比之後的存檔先寫。
+    '''
+    _pending: dict[str, dict[str, Any]]
+    _appends: dict[str, list[str]]
+    _busy: bool
+    _thread: threading.Thread | None
+
+    def __init__(self):
+        self._pending = {}
+        self._appends = {}
+        self._busy = False
+        self._thread = None
+        self._cond = threading.Condition()
+        self.saves_written = 0
+        self.saves_coalesced = 0
+
+    def submit(self, path: str, data: dict[str, Any]) -> None:
+        '''data 交出後不可再修改, 之後由存檔執行緒讀取'''
+        with self._cond:
+            if path in self._pending:
+                self.saves_coalesced += 1
+            self._pending[path] = data
+            self._wake()
+
+    def append(self, path: str, lines: list[str]) -> None:
+        '''把幾行文字附加到檔案尾端 (自動存檔日誌)'''
+        with self._cond:
+            self._appends.setdefault(path, []).extend(lines)
+            self._wake()
+
+    def _wake(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="SaveManager", daemon=True)
+            self._thread.start()
+        self._cond.notify()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        '''等所有存檔寫完 (讀檔前、關閉遊戲前呼叫); 逾時回傳 False'''
+        with self._cond:
+            return self._cond.wait_for(self._is_idle, timeout)
+
+    @property
+    def idle(self) -> bool:
+        with self._cond:
+            return self._is_idle()
+
+    def _is_idle(self) -> bool:
+        return not self._pending and not self._appends and not self._busy
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._appends)
+                # 附加先寫: 之後的存檔才能安全地刪掉日誌中已包含的行
+                if self._appends:
+                    path = next(iter(self._appends))
+                    job = (self._append, path, self._appends.pop(path))
+                else:
+                    path = next(iter(self._pending))
+                    job = (self._write, path, self._pending.pop(path))
+                self._busy = True
+            try:
+                job[0](job[1], job[2])
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def _write(self, path: str, data: dict[str, Any]) -> None:
+        '''先寫入暫存檔並 fsync, 再用 os.replace 一次換掉原檔, 中途失敗不會留下壞檔'''
+        tmp_path = f"{path}.tmp"
+        try:
+            blob = dumps(data, is_binary_path(path)) # .sav 寫二進位, 其他寫 JSON
+            with open(tmp_path, "wb") as f:
+                f.write(blob)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+            self._sync_dir(path)
+            self.saves_written += 1
+            Logger.info(f"Game saved to {path}")
+            if "journal" in data:
+                compact(path, data["journal"])
+        except Exception as e:
+            if os.path.exists(tmp_path): # 如果失敗，刪除殘留的暫存檔
+                os.remove(tmp_path)
+            Logger.warning(f"Failed to save game: {e}")
+
+    def _append(self, path: str, lines: list[str]) -> None:
+        try:
+            with open(path, "ab") as f:
+                f.write("".join(lines).encode("utf-8"))
+                f.flush()
+                os.fsync(f.fileno())
+        except Exception as e:
+            Logger.warning(f"Failed to write {path}: {e}")
+
+    @staticmethod
+    def _sync_dir(path: str) -> None:
+        # 讓 rename 本身也寫進磁碟 (Windows 不支援開啟資料夾, 略過)
+        if not hasattr(os, "O_DIRECTORY"):
+            return
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
@@ -20,8 +20,9 @@ class Bag:
 
     def to_dict(self) -> dict[str, object]:
         return {
-            "monsters": list(self._monsters_data),
-            "items": list(self._items_data)
+            # 複製每一筆資料, 存檔執行緒寫檔時戰鬥仍可能修改原本的 dict
+            "monsters": [dict(m) for m in self._monsters_data],
+            "items": [dict(i) for i in self._items_data]
         }
 
     @classmethod
@@ -0,0 +1,246 @@
+import json
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Mapping, NamedTuple
+
+from src.utils import Logger
+
+'''
+遊戲靜態資料庫 (monsters.json / items.json / trainers.json)
+
+讀檔後只建一次, 之後不會再改:
+- 每筆資料是不可變、有 __slots__ 的 record
+- 次要索引: 道具顯示名稱 -> 道具、屬性 -> 怪獸、怪獸 -> 整條進化鏈
+- 每個物種 0..MAX_LEVEL 級的 (max_hp, attack, defense) 事先算好,
+  Monster.recalculate_stats / Nurse.heal_team 直接查表
+
+原本的 dict 仍放在 raw_* (GameManager.monster_database 等), 戰鬥等需要 dict 副本的地方照舊使用。
+'''
+
+MAX_LEVEL = 100
+DEFAULT_BASE_HP = 50
+DEFAULT_BASE_ATTACK = 10
+DEFAULT_BASE_DEFENSE = 10
+DEFAULT_TYPE = "grass"          # 沒有設定屬性的物種 (Monster、戰鬥引擎也用這個)
+
+
+def calc_max_hp(base_hp: int, level: int) -> int:
+    return int(base_hp * (1 + level * 0.05) + (level * 2))
+
+
+def calc_stat(base: int, level: int) -> int:
+    '''攻擊 / 防禦'''
+    return int(base * (1 + level * 0.05) + (level * 0.5))
+
+
+class Stats(NamedTuple):
+    max_hp: int
+    attack: int
+    defense: int
+
+
+def calc_stats(base_hp: int, base_attack: int, base_defense: int, level: int) -> Stats:
+    return Stats(calc_max_hp(base_hp, level), calc_stat(base_attack, level), calc_stat(base_defense, level))
+
+
+@dataclass(frozen=True, slots=True)
+class SpeciesRecord:
+    id: str
+    name: str
+    type: str
+    base_hp: int
+    base_attack: int
+    base_defense: int
+    sprite_path: str
+    sprite_battle_path: str
+    evolution_level: int | None
+    evolves_to: str | None
+    stat_table: tuple[Stats, ...]    # 索引就是等級, 0..MAX_LEVEL
+    hp_table: tuple[int, ...]        # stat_table 的 max_hp 欄
+
+    def stats(self, level: int) -> Stats:
+        if 0 <= level <= MAX_LEVEL:
+            return self.stat_table[level]
+        return calc_stats(self.base_hp, self.base_attack, self.base_defense, level)
+
+    def max_hp(self, level: int) -> int:
+        if 0 <= level <= MAX_LEVEL:
+            return self.hp_table[level]
+        return calc_max_hp(self.base_hp, level)
+
+
+@dataclass(frozen=True, slots=True)
+class ItemRecord:
+    id: str
+    name: str
+    price: int
+    sprite_path: str
+
+
+class TeamMember(NamedTuple):
+    name: str
+    level: int
+
+
+@dataclass(frozen=True, slots=True)
+class TrainerRecord:
+    id: str
+    name: str
+    sprite_path: str
+    team: tuple[TeamMember, ...]
+    reward_money: int
+    items: tuple[tuple[str, int], ...]    # 戰鬥中敵方 AI 可以用的藥水, trainers.json 的 "items": {"Heal Potion": 2}
+
+
+def _species(species_id: str, data: dict[str, Any]) -> SpeciesRecord:
+    base_hp = data.get("base_hp", DEFAULT_BASE_HP)
+    base_attack = data.get("base_attack", DEFAULT_BASE_ATTACK)
+    base_defense = data.get("base_defense", DEFAULT_BASE_DEFENSE)
+    evolution = data.get("evolution") or {}
+    hp_table, stat_table = _stat_table(base_hp, base_attack, base_defense)
+    return SpeciesRecord(
+        id=species_id,
+        name=data.get("name", species_id),
+        type=data.get("type", DEFAULT_TYPE),
+        base_hp=base_hp,
+        base_attack=base_attack,
+        base_defense=base_defense,
+        sprite_path=data.get("sprite_path", ""),
+        sprite_battle_path=data.get("sprite_battle_path", ""),
+        evolution_level=evolution.get("level"),
+        evolves_to=evolution.get("next_id"),
+        stat_table=stat_table,
+        hp_table=hp_table,
+    )
+
+
+_LEVELS = range(MAX_LEVEL + 1)
+
+
+def _stat_table(base_hp: int, base_attack: int, base_defense: int) -> tuple[tuple[int, ...], tuple[Stats, ...]]:
+    # 與 calc_stats 相同的公式, 一次算完整欄, 資料庫有上千個物種時建表也很快
+    hp = tuple([int(base_hp * (1 + lv * 0.05) + (lv * 2)) for lv in _LEVELS])
+    attack = [int(base_attack * (1 + lv * 0.05) + (lv * 0.5)) for lv in _LEVELS]
+    defense = [int(base_defense * (1 + lv * 0.05) + (lv * 0.5)) for lv in _LEVELS]
+    return hp, tuple(map(Stats._make, zip(hp, attack, defense)))
+
+
+class GameDatabase:
+    species: Mapping[str, SpeciesRecord]
+    items: Mapping[str, ItemRecord]
+    trainers: Mapping[str, TrainerRecord]
+    item_by_name: Mapping[str, ItemRecord]
+    species_by_type: Mapping[str, tuple[SpeciesRecord, ...]]
+    evolution_chains: Mapping[str, tuple[str, ...]]
+    min_level: Mapping[str, int]
+
+    def __init__(self, monsters: dict[str, dict], items: dict[str, dict], trainers: dict[str, dict]):
+        self.raw_monsters = monsters
+        self.raw_items = items
+        self.raw_trainers = trainers
+
+        self.species = MappingProxyType({sid: _species(sid, data) for sid, data in monsters.items()})
+        self.items = MappingProxyType({
+            iid: ItemRecord(iid, data.get("name", iid), data.get("price", 1), data.get("sprite_path", ""))
+            for iid, data in items.items()
+        })
+        self.trainers = MappingProxyType({
+            tid: TrainerRecord(
+                tid, data.get("name", tid), data.get("sprite_path", ""),
+                tuple(TeamMember(m["name"], m.get("level", 1)) for m in data.get("team", [])),
+                data.get("reward_money", 0),
+                tuple((name, int(count)) for name, count in (data.get("items") or {}).items()),
+            )
+            for tid, data in trainers.items()
+        })
+
+        # 同名道具以第一個為準, 和原本 get_item_price 的線性搜尋結果相同
+        item_by_name: dict[str, ItemRecord] = {}
+        for record in self.items.values():
+            item_by_name.setdefault(record.name, record)
+        self.item_by_name = MappingProxyType(item_by_name)
+
+        by_type: dict[str, list[SpeciesRecord]] = {}
+        for record in self.species.values():
+            by_type.setdefault(record.type, []).append(record)
+        self.species_by_type = MappingProxyType({t: tuple(rs) for t, rs in by_type.items()})
+
+        self.evolution_chains, self.min_level = self._build_evolutions()
+        # max_hp 常在迴圈裡查 (治療、背包畫面), 少一層 record 屬性查找;
+        # 沒寫 base_hp 的物種不放進來, 改用呼叫者給的 default_base_hp
+        self._hp_tables = {sid: record.hp_table for sid, record in self.species.items()
+                           if "base_hp" in monsters[sid]}
+
+    def _build_evolutions(self) -> tuple[Mapping[str, tuple[str, ...]], Mapping[str, int]]:
+        parent: dict[str, str] = {}
+        min_level = {sid: 1 for sid in self.species}
+        for record in self.species.values():
+            child = record.evolves_to
+            if child in self.species:
+                parent.setdefault(child, record.id)
+                if record.evolution_level:
+                    # 進化後的物種最低出現等級 = 進化等級 (野生遭遇, src/data/encounters.py)
+                    min_level[child] = record.evolution_level
+
+        chains: dict[str, tuple[str, ...]] = {}
+        for sid in self.species:
+            if sid in chains:
+                continue
+            root, seen = sid, {sid}
+            while root in parent and parent[root] not in seen:
+                root = parent[root]
+                seen.add(root)
+            chain, node = [root], self.species[root].evolves_to
+            while node in self.species and node not in chain:
+                chain.append(node)
+                node = self.species[node].evolves_to
+            for member in chain:
+                chains.setdefault(member, tuple(chain))
+            chains.setdefault(sid, tuple(chain) if sid in chain else (sid,))
+        return MappingProxyType(chains), MappingProxyType(min_level)
+
+    def stats(self, species_id: str, level: int) -> Stats:
+        record = self.species.get(species_id)
+        if record is None:
+            return calc_stats(DEFAULT_BASE_HP, DEFAULT_BASE_ATTACK, DEFAULT_BASE_DEFENSE, level)
+        return record.stats(level)
+
+    def max_hp(self, species_id: str, level: int, default_base_hp: int = DEFAULT_BASE_HP) -> int:
+        table = self._hp_tables.get(species_id)
+        if table is not None and 0 <= level <= MAX_LEVEL:
+            return table[level]
+        return calc_max_hp(self.raw_monsters.get(species_id, {}).get("base_hp", default_base_hp), level)
+
+    def item_price(self, name: str) -> int:
+        '''依顯示名稱查價格, 查不到回傳 0'''
+        record = self.item_by_name.get(name)
+        return record.price if record is not None else 0
+
+    @classmethod
+    def load(cls, monsters_path: str, items_path: str, trainers_path: str) -> "GameDatabase":
+        return cls(_read_json(monsters_path), _read_json(items_path), _read_json(trainers_path))
+
+
+def _read_json(path: str) -> dict:
+    try:
+        if os.path.exists(path):
+            with open(path, "r", encoding='utf-8') as f:
+                data = json.load(f)
+                Logger.info(f"Loaded database: {path}")
+                return data
+        else:
+            Logger.warning(f"Database not found at {path}")
+            return {}
+    except Exception as e:
+        Logger.error(f"Failed to load database {path}: {e}")
+        return {}
+
+
+@lru_cache(maxsize=None)
+def get_database(monsters_path: str = "src/data/monsters.json",
+                 items_path: str = "src/data/items.json",
+                 trainers_path: str = "src/data/trainers.json") -> GameDatabase:
+    '''同一組檔案只讀一次, 每次讀檔建立的 GameManager 共用'''
+    return GameDatabase.load(monsters_path, items_path, trainers_path)
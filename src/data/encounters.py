@@ -0,0 +1,135 @@
+import random
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Any, Iterable, Mapping, NamedTuple
+
+from src.data.database import GameDatabase
+
+'''
+野生怪獸遭遇表
+
+原本每次遭遇都要走過整個 monster_database 挑出「最低出現等級 <= 遭遇等級」的物種。
+現在 GameManager 載入地圖時, 為每個草叢區域 (地圖上名稱含 bush 的圖層) 建好一張表,
+設定相同的區域共用同一張:
+- 物種依最低出現等級 (GameDatabase.min_level) 排序, 再做權重的前綴和
+- 每個等級能遇到的物種剛好是排序後的前 k 個, k 事先算好
+遭遇時: 抽等級 -> 查 k -> 在前 k 個的前綴和上二分搜尋, O(log n), 與資料庫大小無關。
+
+草叢圖層可以在 Tiled 設定屬性 (沒設定就和原本一樣: 2~40 級、所有物種、機率相同):
+    min_level / max_level : 遭遇等級範圍 (至少 1 級, 寫反了會對調)
+    types                 : 只出現這些屬性, 例如 "grass,water"
+monsters.json 的物種可以加 "encounter_weight" (預設 1) 調整出現機率。
+'''
+
+DEFAULT_MIN_LEVEL = 2
+DEFAULT_MAX_LEVEL = 40
+
+
+class EncounterArea(NamedTuple):
+    min_level: int = DEFAULT_MIN_LEVEL
+    max_level: int = DEFAULT_MAX_LEVEL
+    types: frozenset[str] | None = None
+
+    @classmethod
+    def from_properties(cls, properties: Mapping[str, Any]) -> "EncounterArea":
+        types = properties.get("types")
+        min_level = max(1, int(properties.get("min_level", DEFAULT_MIN_LEVEL)))
+        max_level = max(1, int(properties.get("max_level", DEFAULT_MAX_LEVEL)))
+        if min_level > max_level:
+            min_level, max_level = max_level, min_level
+        return cls(
+            min_level,
+            max_level,
+            frozenset(t.strip() for t in str(types).split(",") if t.strip()) if types else None,
+        )
+
+
+class EncounterTable:
+    area: EncounterArea
+    species: tuple[str, ...]            # 依最低出現等級排序
+    _templates: tuple[dict, ...]        # 戰鬥用的物種 dict, 已去掉 hp
+    _cum_weights: tuple[float, ...]
+    _eligible: tuple[int, ...]          # 每個遭遇等級 (從 min_level 起) 可以遇到前幾個物種
+
+    def __init__(self, database: GameDatabase, area: EncounterArea):
+        self.area = area
+        records = [r for r in database.species.values() if area.types is None or r.type in area.types]
+        if not records: # 沒有符合屬性的物種就用全部
+            records = list(database.species.values())
+        records.sort(key=lambda r: database.min_level.get(r.id, 1))
+        min_levels = [database.min_level.get(r.id, 1) for r in records]
+
+        self.species = tuple(r.id for r in records)
+        self._templates = tuple(
+            {k: v for k, v in database.raw_monsters[r.id].items() if k not in ("hp", "current_hp")}
+            for r in records
+        )
+        weights = [max(0.0, float(database.raw_monsters[r.id].get("encounter_weight", 1))) for r in records]
+        self._cum_weights = tuple(accumulate(weights))
+        self._eligible = tuple(
+            bisect_right(min_levels, level) for level in range(area.min_level, area.max_level + 1)
+        )
+
+    def __len__(self) -> int:
+        return len(self.species)
+
+    def sample(self, rng: random.Random) -> tuple[str, int]:
+        '''(物種, 等級)'''
+        i, level = self._sample(rng)
+        return self.species[i], level
+
+    def roll(self, rng: random.Random) -> dict:
+        '''BattleScene.setup_battle 要的怪獸 dict (物種資料的副本 + level)'''
+        i, level = self._sample(rng)
+        enemy_data = dict(self._templates[i])
+        enemy_data["level"] = level
+        return enemy_data
+
+    def _sample(self, rng: random.Random) -> tuple[int, int]:
+        # 呼叫前要確定表不是空的 (EncounterTables.roll 會先檢查)
+        level = rng.randint(self.area.min_level, self.area.max_level)
+        k = self._eligible[level - self.area.min_level]
+        if k == 0 or self._cum_weights[k - 1] <= 0: # 這個等級沒有可遇到的物種時, 從全部裡面挑
+            k = len(self.species)
+        total = self._cum_weights[k - 1]
+        if total <= 0:
+            return rng.randrange(k), level
+        return min(bisect_right(self._cum_weights, rng.random() * total, 0, k), k - 1), level
+
+
+class EncounterTables:
+    '''
+    所有草叢區域的遭遇表, 以 EncounterArea 為 key (設定相同就共用)。
+    rng 可以指定種子 (GameSettings.ENCOUNTER_SEED), 讓測試與 benchmark 結果可重現。
+    '''
+    rng: random.Random
+    _tables: dict[EncounterArea, EncounterTable]
+
+    def __init__(self, database: GameDatabase, seed: int | None = None):
+        self._database = database
+        self._tables = {}
+        self.rng = random.Random(seed)
+
+    def build(self, areas: Iterable[EncounterArea]) -> None:
+        '''載入時先把表建好, 第一次遭遇不會卡頓'''
+        for area in areas:
+            self.table(area)
+
+    def set_database(self, database: GameDatabase) -> None:
+        '''資料庫換掉時呼叫: 舊的表全部作廢, 用到時再依新資料庫重建'''
+        if database is not self._database:
+            self._database = database
+            self._tables.clear()
+
+    def table(self, area: EncounterArea) -> EncounterTable:
+        table = self._tables.get(area)
+        if table is None:
+            table = self._tables[area] = EncounterTable(self._database, area)
+        return table
+
+    def roll(self, area: EncounterArea) -> dict | None:
+        '''資料庫沒有任何物種時回傳 None (沒有遭遇)'''
+        table = self.table(area)
+        if not table:
+            return None
+        return table.roll(self.rng)
@@ -2,15 +2,43 @@ import pygame as pg
 from src.sprites import Sprite
 from src.utils import GameSettings, Logger, Position, load_img
 import math
+from src.data.database import (DEFAULT_BASE_ATTACK, DEFAULT_BASE_DEFENSE, DEFAULT_BASE_HP, DEFAULT_TYPE,
+                               calc_max_hp, calc_stats)
+from src.battle.rules import exp_to_next_level
+from src.core.services import resource_manager
 
 class Monster:
+    '''
+    戰鬥中的怪獸, 自己保存 hp / level / exp 等狀態,
+    sync() 時才寫回背包的 dict (data), BattleScene 在換怪、戰鬥結束時呼叫。
+    戰鬥圖由 resource_manager 快取裁切、縮放好的版本, 同一物種同一邊共用同一張 Surface。
+    '''
+    __slots__ = ("game_manager", "is_player", "data", "id", "name", "level", "exp", "species_data",
+                 "type", "max_hp", "attack", "defense", "hp", "sprite")
+
+    SPRITE_SIZE = (300, 300)
+
+    game_manager: object
+    is_player: bool
+    data: dict
+    id: str
+    name: str
+    level: int
+    exp: int
+    species_data: dict
+    type: str
+    max_hp: int
+    attack: int
+    defense: int
+    hp: int
+    sprite: Sprite | None
+
     def __init__(self, data: dict, is_player: bool, game_manager):
         self.game_manager = game_manager
         self.is_player = is_player
         self.data = data
 
         self.id = data.get("name", "Sproutkit")
-        self.name = data.get("name", "Sproutkit")
         self.level = data.get("level", 5)
         self.exp = data.get("exp", 0)
         
@@ -23,7 +51,7 @@ class Monster:
 
         # 物種屬性
         self.name = self.species_data.get("name", "Unknown")
-        self.type = self.species_data.get("type", "grass")
+        self.type = self.species_data.get("type", DEFAULT_TYPE)
         
         # 計算能力值
         self.max_hp = 0
@@ -37,20 +65,38 @@ class Monster:
 
         # 圖片
         battle_path = self.species_data.get("sprite_battle_path", "")
-        self.sprite: Sprite | None = None
+        self.sprite = None
         self._setup_sprite(battle_path)
 
+    def sync(self):
+        '''把目前狀態寫回背包的 dict (進化後 name 是新的物種)'''
+        data = self.data
+        data["name"] = self.id
+        data["level"] = self.level
+        data["exp"] = self.exp
+        data["hp"] = self.hp
+
+    def to_dict(self) -> dict:
+        '''新的 dict (捕捉到的怪獸放進背包用), 不動原本的 data'''
+        data = self.data.copy()
+        data.update(name=self.id, level=self.level, exp=self.exp, hp=self.hp)
+        return data
+
     @staticmethod
     def calculate_max_hp(base_hp: int, level: int) -> int:
-        return int(base_hp * (1 + level * 0.05) + (level * 2))
+        return calc_max_hp(base_hp, level)
     def recalculate_stats(self):
-        base_hp = self.species_data.get("base_hp", 50)
-        base_atk = self.species_data.get("base_attack", 10)
-        base_dfn = self.species_data.get("base_defense", 10)
-        
-        self.max_hp = Monster.calculate_max_hp(base_hp, self.level)
-        self.attack = int(base_atk * (1 + self.level * 0.05) + (self.level * 0.5))
-        self.defense = int(base_dfn * (1 + self.level * 0.05) + (self.level * 0.5))
+        # 查資料庫事先算好的等級能力表 (src/data/database.py)
+        database = getattr(self.game_manager, "database", None)
+        if database is not None and self.id in database.species:
+            self.max_hp, self.attack, self.defense = database.species[self.id].stats(self.level)
+            return
+        self.max_hp, self.attack, self.defense = calc_stats(
+            self.species_data.get("base_hp", DEFAULT_BASE_HP),
+            self.species_data.get("base_attack", DEFAULT_BASE_ATTACK),
+            self.species_data.get("base_defense", DEFAULT_BASE_DEFENSE),
+            self.level,
+        )
 
     # checkpoint 3-4: 經驗值與升級
     def gain_exp(self, amount: int):
@@ -60,7 +106,7 @@ class Monster:
         logs.append(f"Gained {amount} EXP!")
         
         while True:
-            required_exp = (self.level + 1) ** 2 # 經驗值曲線
+            required_exp = exp_to_next_level(self.level) # 經驗值曲線
             if self.exp >= required_exp:
                 lvl_logs = self.level_up()
                 logs.extend(lvl_logs)
@@ -122,24 +168,9 @@ class Monster:
     def _setup_sprite(self, path: str):
         if not path: return
         try:
-            temp = Sprite(path)
-            full_img = temp.image
-            
-            sheet_w = full_img.get_width()
-            sheet_h = full_img.get_height()
-            single_w = sheet_w // 2
-
-            # 根據是否為玩家決定切左邊還是右邊
-            start_x = single_w if self.is_player else 0
-            crop_rect = pg.Rect(start_x, 0, single_w, sheet_h)
-            cropped_img = full_img.subsurface(crop_rect)
-
-            final_img = pg.transform.scale(cropped_img, (300, 300))
-
-            # 建立 Sprite
-            self.sprite = Sprite(path)
-            self.sprite.image = final_img
-            self.sprite.rect = final_img.get_rect()
+            # 裁切 (玩家用右半、敵人用左半) 與縮放只在第一次用到時做, 之後共用
+            final_img = resource_manager.get_battle_image(path, self.is_player, self.SPRITE_SIZE)
+            self.sprite = Sprite.from_image(final_img)
 
             # 設定畫面位置
             if self.is_player:
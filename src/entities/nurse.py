@@ -6,7 +6,6 @@ from .entity import Entity
 from src.sprites import Sprite
 from src.core import GameManager
 from src.utils import GameSettings, Direction, Position, PositionCamera, Logger
-from src.entities.monster import Monster
 
 class Nurse(Entity):
     warning_sign: Sprite
@@ -40,11 +39,8 @@ class Nurse(Entity):
             name = m_data.get("name")
             level = m_data.get("level", 1)
             
-            db_data = self.game_manager.monster_database.get(name, {})
-            base_hp = db_data.get("base_hp", 40)
-            
-            # 使用 Monster 類別的公式計算 Max HP
-            max_hp = Monster.calculate_max_hp(base_hp, level)
+            # 查資料庫的等級能力表 (物種沒寫 base_hp 或找不到時以 40 計算)
+            max_hp = self.game_manager.database.max_hp(name, level, default_base_hp=40)
             
             # 恢復血量
             m_data["hp"] = max_hp
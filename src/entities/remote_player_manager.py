@@ -0,0 +1,129 @@
+from __future__ import annotations
+import pygame as pg
+from typing import Mapping
+
+from .entity import Entity
+from src.core import GameManager
+from src.core.managers.online_manager import PlayersSnapshot, RemotePlayer
+from src.utils import Direction, PositionCamera
+
+_REMOTE_DIRECTIONS = {
+    "up": Direction.UP,
+    "down": Direction.DOWN,
+    "left": Direction.LEFT,
+    "right": Direction.RIGHT,
+}
+
+# 最多保留幾個離開的 Entity 給之後加入的玩家重複使用
+POOL_SIZE = 64
+
+
+class RemotePlayerManager:
+    '''
+    其他線上玩家的 Entity
+    - sync(): 依照 OnlineManager.players_snapshot 增加 / 更新 / 移除 (以 id 為準)，
+      快照版本沒變時只推進移動中玩家的動畫
+    - 離開的玩家的 Entity 放回 pool，下一個加入的玩家直接拿來用，
+      不用再讀圖、切割、縮放整張 sprite sheet
+    - draw(): 每個玩家只畫一次，而且只畫在畫面內的
+    '''
+    entities: dict[int, Entity]     # 存 id 對應的 Entity
+    game_manager: GameManager
+    _pool: list[Entity]
+    _moving: set[int]               # 正在移動的玩家
+    _synced: tuple[int, str]        # 上次對齊的 (快照版本, 地圖)
+    _seen: Mapping[int, RemotePlayer]  # 上次對齊時的快照內容
+
+    def __init__(self, game_manager: GameManager, sprite_path: str = "character/ow1.png"):
+        self.game_manager = game_manager
+        self.sprite_path = sprite_path
+        self.entities = {}
+        self._pool = []
+        self._moving = set()
+        self._synced = (-1, "")
+        self._seen = {}
+
+    def __contains__(self, pid: int) -> bool:
+        return pid in self.entities
+
+    def __len__(self) -> int:
+        return len(self.entities)
+
+    def get(self, pid: int) -> Entity | None:
+        return self.entities.get(pid)
+
+    def _acquire(self, x: float, y: float) -> Entity:
+        if not self._pool:
+            return Entity(x, y, self.game_manager, self.sprite_path)
+        ent = self._pool.pop()
+        ent.game_manager = self.game_manager
+        ent.position.x = x
+        ent.position.y = y
+        ent.animation.accumulator = 0
+        return ent
+
+    def _release(self, pid: int) -> None:
+        ent = self.entities.pop(pid)
+        self._moving.discard(pid)
+        if len(self._pool) < POOL_SIZE:
+            self._pool.append(ent)
+
+    def clear(self) -> None:
+        for pid in list(self.entities):
+            self._release(pid)
+        self._synced = (-1, "")
+        self._seen = {}
+
+    def sync(self, snapshot: PlayersSnapshot, map_name: str, dt: float) -> None:
+        # 快照版本和地圖都沒變時不用重新對齊，只需要推進移動中玩家的動畫
+        if (snapshot.version, map_name) != self._synced:
+            seen = {} if self._synced[1] != map_name else self._seen
+            self._synced = (snapshot.version, map_name)
+            self._seen = snapshot.players
+            self._moving.clear()
+            valid_ids = set() # 記錄這次還在的玩家
+
+            for p_data in snapshot.players.values():
+                # 只處理同一張地圖的玩家
+                if p_data.map != map_name:
+                    continue
+
+                pid = p_data.id
+                valid_ids.add(pid)
+                if p_data.is_moving:
+                    self._moving.add(pid)
+
+                # 和上次一樣的玩家不用再對齊
+                remote_ent = self.entities.get(pid)
+                if remote_ent is not None and seen.get(pid) == p_data:
+                    continue
+
+                # 新玩家: 從 pool 拿一個 Entity
+                if remote_ent is None:
+                    remote_ent = self.entities[pid] = self._acquire(p_data.x, p_data.y)
+
+                # 同步位置和方向
+                remote_ent.position.x = p_data.x
+                remote_ent.position.y = p_data.y
+                remote_ent.direction = _REMOTE_DIRECTIONS.get(p_data.direction, Direction.DOWN)
+
+                # 同步動畫狀態
+                if not p_data.is_moving:
+                    remote_ent.update(0)  # 靜止: 只更新方向
+                    remote_ent.animation.accumulator = 0 # 強制重置為第一幀 (站立姿勢)
+
+            # 清除已經離開或切換地圖的玩家
+            if len(valid_ids) != len(self.entities):
+                for pid in [pid for pid in self.entities if pid not in valid_ids]:
+                    self._release(pid)
+
+        # 移動: 正常更新動畫
+        for pid in self._moving:
+            self.entities[pid].update(dt)
+
+    def draw(self, screen: pg.Surface, camera: PositionCamera) -> None:
+        # 只畫和畫面有重疊的玩家
+        view = pg.Rect(camera.x, camera.y, screen.get_width(), screen.get_height())
+        for ent in self.entities.values():
+            if view.colliderect(ent.animation.rect):
+                ent.draw(screen, camera)
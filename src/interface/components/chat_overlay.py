@@ -136,7 +136,9 @@ class ChatOverlay(UIComponent):
             for m in lines:
                 sender = str(m.get("from", ""))
                 text = str(m.get("text", ""))
-                surf = self._font_msg.render(f"{sender}: {text}", True, (255, 255, 255))
+                # 全體 / 附近頻道的訊息加上標記，地圖頻道不加
+                tag = {"global": "[G] ", "near": "[N] "}.get(m.get("channel"), "")
+                surf = self._font_msg.render(f"{tag}{sender}: {text}", True, (255, 255, 255))
                 _ = screen.blit(surf, (x + 10, draw_y))
                 draw_y += surf.get_height() + 4
         # If not open, skip input field
@@ -4,7 +4,6 @@ from src.interface.windows.window import Window
 from src.interface.components import Button
 from src.core import GameManager
 from src.utils import load_img, Logger
-from src.entities.monster import Monster
 
 class BagWindow(Window):
     def __init__(self, game_manager: GameManager, font_title: pg.font.Font, font_item: pg.font.Font):
@@ -203,8 +202,7 @@ class BagWindow(Window):
             req_exp = (m_level + 1) ** 2
             
             m_hp = monster.get("hp")
-            base_hp = db_data.get("base_hp", 40)
-            m_max = Monster.calculate_max_hp(base_hp, m_level)
+            m_max = self.game_manager.database.max_hp(m_name, m_level, default_base_hp=40)
             if m_hp > m_max: m_hp = m_max
             if m_hp < 0: m_hp = 0
 
@@ -4,6 +4,7 @@ from src.interface.components import Button
 from src.utils import GameSettings, Logger
 from src.core.services import sound_manager
 from src.core import GameManager
+from src.core.managers.save_journal import discard
 
 class SettingWindow(Window):
     def __init__(self, game_manager: GameManager, font_title: pg.font.Font, font_item: pg.font.Font, on_game_reload_callback):
@@ -85,12 +86,12 @@ class SettingWindow(Window):
             sound_manager.pause_all()
 
     def save_game(self):
-        save_path = "saves/game0.json"
-        self.game_manager.save(save_path)
-        Logger.info(f"Game saved to {save_path}")
+        save_path = GameSettings.SAVE_PATH
+        self.game_manager.save(save_path) # 背景寫檔, 完成後由 SaveManager 記錄
 
     def load_game(self):
-        save_path = "saves/game0.json"
+        save_path = GameSettings.SAVE_PATH
+        discard(save_path) # 回到手動存檔: 之後的自動存檔日誌作廢, 當機後也不會再套用
         new_manager = GameManager.load(save_path)
         
         if new_manager:
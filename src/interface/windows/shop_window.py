@@ -115,10 +115,7 @@ class ShopWindow(Window):
             self.action_buttons.append(btn)
 
     def get_item_price(self, item_name: str) -> int:
-        for key, data in self.game_manager.item_database.items():
-            if data["name"] == item_name:
-                return data.get("price", 1)
-        return 0
+        return self.game_manager.database.item_price(item_name) # 顯示名稱索引
 
     def buy_item(self, item_data: dict):
         price = item_data.get("price", 0)
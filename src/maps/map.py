@@ -2,6 +2,7 @@ import pygame as pg
 import pytmx
 
 from src.utils import load_tmx, Position, GameSettings, PositionCamera, Teleport
+from src.data.encounters import EncounterArea
 
 class Map:
     # Map Properties
@@ -14,6 +15,7 @@ class Map:
     _surface: pg.Surface
     _collision_map: list[pg.Rect]
     _grass_map: list[pg.Rect]
+    grass_areas: dict[str, tuple[EncounterArea, list[pg.Rect]]]   # 草叢圖層名稱 -> (遭遇設定, 範圍)
 
     def __init__(self, path: str, tp: list[Teleport], spawn: Position):
         self.path_name = path
@@ -29,6 +31,7 @@ class Map:
         self._render_all_layers(self._surface)
         # Prebake the collision map
         self._collision_map = self._create_collision_map()
+        self.grass_areas = {}
         self._grass_map = self._create_grass_map()
 
     def update(self, dt: float):
@@ -61,6 +64,13 @@ class Map:
     def check_in_grass(self, rect: pg.Rect) -> bool:
         return rect.collidelist(self._grass_map) != -1
 
+    def grass_area_at(self, rect: pg.Rect) -> EncounterArea | None:
+        '''rect 所在草叢的遭遇設定, 不在草叢裡回傳 None'''
+        for area, rects in self.grass_areas.values():
+            if rect.collidelist(rects) != -1:
+                return area
+        return None
+
     def check_teleport(self, pos: Position) -> Teleport | None:
         '''[TODO HACKATHON 6] 
         Teleportation: Player can enter a building by walking into certain tiles defined inside saves/*.json, and the map will be changed
@@ -127,12 +137,16 @@ class Map:
         rects = []
         for layer in self.tmxdata.visible_layers:
             if isinstance(layer, pytmx.TiledTileLayer) and "bush" in layer.name.lower():
+                layer_rects = []
                 for x, y, gid in layer:
                     if gid != 0:
                         rect_x = x * GameSettings.TILE_SIZE
                         rect_y = y * GameSettings.TILE_SIZE
                         rect = pg.Rect(rect_x, rect_y, GameSettings.TILE_SIZE, GameSettings.TILE_SIZE)
-                        rects.append(rect)
+                        layer_rects.append(rect)
+                # 圖層屬性決定遭遇等級與屬性 (src/data/encounters.py)
+                self.grass_areas[layer.name] = (EncounterArea.from_properties(layer.properties), layer_rects)
+                rects.extend(layer_rects)
         return rects
 
     @classmethod
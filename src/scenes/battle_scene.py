@@ -1,6 +1,5 @@
 '''check point 2 - 5: Enemy Interaction'''
 import pygame as pg
-from enum import Enum, auto
 from typing import Optional
 
 from src.utils import BattleType
@@ -15,20 +14,12 @@ from src.entities.monster import Monster
 from src.interface.health_bar import HealthBar
 from src.interface.battle_dashboard import BattleDashboard
 
-# 使用 Enum 管理戰鬥狀態
-class BattleState(Enum):
-    PLAYER_TURN = auto()
-    ENEMY_TURN = auto()
-    WON = auto()
-    LOST = auto()
-    RUNNING = auto()
-
-# 屬性相剋表
-ELEMENT_ADVANTAGE = {
-    'fire': 'grass',
-    'water': 'fire',
-    'grass': 'water'
-}
+# 戰鬥規則在 src/battle (無畫面的引擎與批次模擬共用), 這裡只負責畫面與計時
+from src.battle import rules
+from src.battle.rules import BattleState
+from src.battle.engine import Action, Battle, Fighter, Side
+from src.battle.ai import IncrementalAI, ThreadedAI, make_ai
+from src.battle import replay
 
 class BattleScene(Scene):
     background: BackgroundSprite
@@ -52,6 +43,9 @@ class BattleScene(Scene):
         # 戰鬥相關實體
         self.player: Optional[Monster] = None
         self.enemy: Optional[Monster] = None 
+        self.enemy_team: list[dict] = []      # 訓練家整隊, 野生怪獸只有一隻
+        self.enemy_index = 0
+        self.enemy_items: dict[str, int] = {}
         self.all_monsters: list[dict] = []
         self.current_monster_index = -1
         self.battle_type = BattleType.WILD
@@ -73,13 +67,27 @@ class BattleScene(Scene):
         self.message_queue: list[str] = []
         self.waiting_input = False
 
+        # 敵方 AI (src/battle/ai.py) 在敵方回合的每一幀思考一小段, TURN_DELAY_ATTACK 到了就用它的決定
+        ai = make_ai(GameSettings.BATTLE_AI, GameSettings.BATTLE_AI_TIME_BUDGET)
+        self.enemy_ai = ThreadedAI(ai) if GameSettings.BATTLE_AI_THREAD else IncrementalAI(ai)
+        self.enemy_action: Action | None = None
+        self.enemy_acted = False
+
+        # 重播紀錄 (src/battle/replay.py): 開始狀態 + 每個動作, 戰鬥結束時寫到 BATTLE_REPLAY_DIR
+        self.replay_log: replay.BattleLog | None = None
+
     ## 初始化戰鬥 ##
-    def setup_battle(self, game_manager, enemy_data, battle_type: BattleType):
+    def setup_battle(self, game_manager, enemy_data, battle_type: BattleType,
+                     enemy_team: list[dict] | None = None, enemy_items: dict[str, int] | None = None):
         self.game_manager = game_manager
         self.battle_type = battle_type
         
-        self.enemy = Monster(enemy_data, is_player=False, game_manager=self.game_manager)
+        self.enemy_team = enemy_team or [enemy_data]
+        self.enemy_index = 0
+        self.enemy_items = dict(enemy_items or {})
+        self.enemy = Monster(self.enemy_team[0], is_player=False, game_manager=self.game_manager)
         self.enemy.hp = self.enemy.max_hp
+        self.enemy_ai.reset()
 
         if self.battle_type == BattleType.WILD:
             self.log_text = f"A wild {self.enemy.name} appeared!"
@@ -117,12 +125,17 @@ class BattleScene(Scene):
             if not found_alive:
                 self.log_text = "You have no energy to fight..."
                 self.state = BattleState.LOST
+            elif GameSettings.BATTLE_REPLAY_DIR:
+                self.replay_log = replay.BattleLog.begin(
+                    self._battle_snapshot(BattleState.PLAYER_TURN),
+                    self.battle_type.name.lower(), GameSettings.BATTLE_AI)
 
     ## 攻擊邏輯 ##    
     def player_attack(self):
         if self.state != BattleState.PLAYER_TURN or not self.enemy: 
             return
         Logger.info("Player chose to Fight!")
+        self._record(Action.ATTACK)
         
         # 呼叫傷害計算
         dmg, dmg_text = self._calculate_damage(self.player, self.enemy)
@@ -132,12 +145,19 @@ class BattleScene(Scene):
 
         if self.enemy.hp <= 0:
             self.enemy.hp = 0
-            self.state = BattleState.WON
-            self.log_text = f"You defeated {self.enemy.name}!"
+            self.enemy.sync()
+            # 訓練家還有怪獸就換下一隻上場, 仍是玩家回合
+            index = rules.first_alive([m.get("hp", 1) for m in self.enemy_team])
+            if index >= 0:
+                self._switch_enemy(index)
+                self.log_text = f"Trainer sent out {self.enemy.name}!"
+            else:
+                self.state = BattleState.WON
+                self.log_text = f"You defeated {self.enemy.name}!"
+                self._finish_replay("won")
+            self.turn_timer = 0
         else:
-            self.state = BattleState.ENEMY_TURN
-        
-        self.turn_timer = 0
+            self._begin_enemy_turn()
 
     ## 捕捉邏輯 ##
     def try_catch_monster(self):
@@ -159,12 +179,11 @@ class BattleScene(Scene):
         Logger.info("Player threw a Ball!")
         self.state = BattleState.WON
         self.log_text = f"Gotcha! {self.enemy.name} was caught!"
+        self._finish_replay("caught")
 
         # 加入背包列表
         if self.game_manager and self.game_manager.bag:    
-            data = self.enemy.data.copy()
-            data["hp"] = self.enemy.hp    
-            self.game_manager.bag._monsters_data.append(data) 
+            self.game_manager.bag._monsters_data.append(self.enemy.to_dict())
             Logger.info(f"Added {self.enemy.name} to bag.")
 
         self.turn_timer = 0
@@ -172,6 +191,8 @@ class BattleScene(Scene):
     ## 逃跑邏輯 (資料回寫)##
     def run_away(self):
         Logger.info("Player chose to Run!")
+        self.enemy_ai.cancel()
+        self._finish_replay("ran")
         self._save_player_state()
         scene_manager.change_scene("game")
 
@@ -180,50 +201,45 @@ class BattleScene(Scene):
         if self.state != BattleState.PLAYER_TURN: return
         if not self.all_monsters: return
 
-        found_index = -1
-        total = len(self.all_monsters)
-        for i in range(1, total):
-            check_index = (self.current_monster_index + i) % total
-            if self.all_monsters[check_index].get("hp", 0) > 0:
-                found_index = check_index
-                break
+        found_index = rules.next_alive([m.get("hp", 0) for m in self.all_monsters], self.current_monster_index)
 
         if found_index == -1:
             self.log_text = "No other Pokemon available!"
             return
 
+        self._record(Action.SWITCH)
         self._switch_monster(found_index)
-        self.state = BattleState.ENEMY_TURN
-        self.turn_timer = 0
+        self._begin_enemy_turn()
     
     # checkpoint 3-4: 藥水功能，搭配 _use_item 輔助函式
     def on_use_heal_potion(self):
         def effect():
-            heal_amount = 100 # 設定回復量
             old_hp = self.player.hp
-            self.player.hp += heal_amount
-            if self.player.hp > self.player.max_hp:
-                self.player.hp = self.player.max_hp
+            self.player.hp = rules.heal(self.player.hp, self.player.max_hp)
             recovered = self.player.hp - old_hp
             return f"Used Healing Potion! Recovered {recovered} HP."
 
-        self._use_item("Heal Potion", effect)
+        self._use_item(rules.HEAL_POTION, effect)
 
     def on_use_power_potion(self):
         def effect():
-            boost = 10 # 設定攻擊提升量
+            boost = rules.STRENGTH_BOOST
             self.player.attack += boost
             return f"Used Strength Potion! Attack rose by {boost}!"
             
-        self._use_item("Strength Potion", effect)
+        self._use_item(rules.STRENGTH_POTION, effect)
 
     def on_use_def_potion(self):
         def effect():
-            boost = 10 # 設定防禦提升量
+            boost = rules.DEFENSE_BOOST
             self.player.defense += boost
             return f"Used Defense Potion! Defense rose by {boost}!"
 
-        self._use_item("Defense Potion", effect)
+        self._use_item(rules.DEFENSE_POTION, effect)
+
+    def exit(self):
+        self.enemy_ai.cancel()
+        self._finish_replay("quit")
 
     ## update 支援四種狀態 ##
     def update(self, dt: float):
@@ -274,71 +290,59 @@ class BattleScene(Scene):
     # checkpoint 3-4: 計算屬性相剋的傷害
     def _calculate_damage(self, attacker: Monster, defender: Monster) -> tuple[int, str]:
         """傷害計算，回傳 (final_damage, log_message_suffix)"""
-        base_dmg = int(max(1, attacker.attack - defender.defense))
-        
-        attacker_type = attacker.type
-        defender_type = defender.type
-
-        final_damage = base_dmg
-        damage_info = f"{base_dmg}"
-
-        # 屬性相剋判斷
-        if ELEMENT_ADVANTAGE.get(attacker_type) == defender_type:
-            bonus = int(base_dmg * 0.5)
-            if bonus < 1: bonus = 1
-            final_damage = base_dmg + bonus
-            damage_info = f"{base_dmg} ( + {bonus} )"
-        
-        elif ELEMENT_ADVANTAGE.get(defender_type) == attacker_type:
-            reduction = int(base_dmg * 0.5)
-            final_damage = base_dmg - reduction
-            damage_info = f"{base_dmg} ( - {reduction} )"
-        
-        else:
-            damage_info = f"{base_dmg} ( + 0 )"
-
-        return final_damage, damage_info
+        return rules.calculate_damage(attacker, defender)
     
     def _switch_monster(self, new_index: int):
         """執行切換怪獸的動作"""
         if self.player:
-            self.player.data["hp"] = self.player.hp # 保存舊怪獸血量
+            self.player.sync() # 保存舊怪獸血量
 
         self.current_monster_index = new_index
         new_data = self.all_monsters[new_index]
         self.player = Monster(new_data, is_player=True, game_manager=self.game_manager)
         self.log_text = f"Go! {self.player.name}!"
 
+    def _switch_enemy(self, new_index: int):
+        """敵方換怪, 血量留在 enemy_team 裡"""
+        if self.enemy:
+            self.enemy.sync()
+        self.enemy_index = new_index
+        self.enemy = Monster(self.enemy_team[new_index], is_player=False, game_manager=self.game_manager)
+
     def _auto_switch(self) -> bool:
         '''自動切換邏輯: 當前怪獸死掉時觸發'''
         if self.player:
-            self.player.data["hp"] = 0
+            self.player.hp = 0
+            self.player.sync()
 
-        for i, m_data in enumerate(self.all_monsters):
-            if m_data.get("hp", 0) > 0:
-                self._switch_monster(i)
-                return True
-        return False 
+        index = rules.first_alive([m.get("hp", 0) for m in self.all_monsters])
+        if index >= 0:
+            self._switch_monster(index)
+            return True
+        return False
 
     def _save_player_state(self):
         """將當前狀態寫回"""
-        if self.player and self.player.data:
-            self.player.data["hp"] = self.player.hp
-            self.player.data["level"] = self.player.level
-            self.player.data["exp"] = self.player.exp
-            self.player.data["name"] = self.player.id
+        if self.player:
+            self.player.sync()
             Logger.info(f"Saved Data: {self.player.name} Lv.{self.player.level} Exp:{self.player.exp}")
 
     def _process_enemy_turn(self, dt: float):
         """處理敵方回合的計時與攻擊"""
         self.turn_timer += dt
 
-        # 攻擊 
-        if self.turn_timer > self.TURN_DELAY_ATTACK and "attacked" not in self.log_text:
-             if self.player.hp > 0:
-                dmg, dmg_text = self._calculate_damage(self.enemy, self.player)
-                self.player.take_damage(dmg)
-                self.log_text = f"{self.enemy.name} attacked! {dmg_text} dmg"
+        if self.enemy_action is None and not self.enemy_acted:
+            self.enemy_action = self.enemy_ai.poll()
+
+        # 思考時間到了就行動; AI 還沒算完就用目前最好的, 不等它
+        if self.turn_timer > self.TURN_DELAY_ATTACK and not self.enemy_acted:
+            self.enemy_acted = True
+            action = self.enemy_action
+            if action is None:
+                self.enemy_ai.cancel()
+                action = self.enemy_ai.best
+            if self.player.hp > 0:
+                self._enemy_action(action)
         
         # 回合結束判斷
         if self.turn_timer > self.TURN_DELAY_END:
@@ -349,10 +353,78 @@ class BattleScene(Scene):
                 else:
                     self.state = BattleState.LOST
                     self.log_text = "You fainted..."
+                    self._finish_replay("lost")
             else:
                 self.state = BattleState.PLAYER_TURN
             self.turn_timer = 0
 
+    def _begin_enemy_turn(self):
+        self.state = BattleState.ENEMY_TURN
+        self.turn_timer = 0
+        self.enemy_action = None
+        self.enemy_acted = False
+        self.enemy_ai.begin(self._battle_snapshot())
+
+    def _enemy_action(self, action: Action):
+        """敵方的攻擊 / 換怪 / 藥水"""
+        self._record(action, enemy=True)
+        if action is Action.SWITCH:
+            index = rules.next_alive([m.get("hp", 1) for m in self.enemy_team], self.enemy_index)
+            if index >= 0:
+                self._switch_enemy(index)
+                self.log_text = f"Trainer switched to {self.enemy.name}!"
+                return
+        elif action is not Action.ATTACK and self.enemy_items.get(action.value, 0) > 0:
+            self.enemy_items[action.value] -= 1
+            if action is Action.HEAL:
+                self.enemy.hp = rules.heal(self.enemy.hp, self.enemy.max_hp)
+            elif action is Action.STRENGTH:
+                self.enemy.attack += rules.STRENGTH_BOOST
+            else:
+                self.enemy.defense += rules.DEFENSE_BOOST
+            self.log_text = f"{self.enemy.name} used a {action.value}!"
+            return
+
+        dmg, dmg_text = self._calculate_damage(self.enemy, self.player)
+        self.player.take_damage(dmg)
+        self.log_text = f"{self.enemy.name} attacked! {dmg_text} dmg"
+
+    def _battle_snapshot(self, state: BattleState = BattleState.ENEMY_TURN) -> Battle:
+        """目前戰況轉成無畫面引擎的 Battle, 給 AI 搜尋與重播紀錄用"""
+        database = self.game_manager.database
+
+        def side(team_data: list[dict], active_index: int, active: Monster) -> Side:
+            team = [Fighter.create(database, m.get("name", "Sproutkit"), m.get("level", 5), m.get("hp"))
+                    for m in team_data]
+            # 場上這隻用畫面上的血量, 藥水加成 = 目前能力值 - 等級能力值
+            fighter = Fighter.create(database, active.id, active.level, active.hp)
+            team[active_index] = fighter
+            return Side(team, active_index, active.attack - fighter.attack, active.defense - fighter.defense)
+
+        potions = {i["name"]: i.get("count", 0) for i in self.game_manager.bag._items_data if i["name"] in rules.POTIONS}
+        return Battle(
+            side(self.all_monsters, self.current_monster_index, self.player),
+            side(self.enemy_team, self.enemy_index, self.enemy),
+            potions, dict(self.enemy_items), state,
+        )
+
+    def _record(self, action: Action, enemy: bool = False):
+        if self.replay_log is not None:
+            (self.replay_log.enemy if enemy else self.replay_log.player)(action)
+
+    def _finish_replay(self, end: str):
+        """記下畫面上的結果並寫檔, 之後重播的結果要和這個一樣"""
+        log, self.replay_log = self.replay_log, None
+        if log is None or not GameSettings.BATTLE_REPLAY_DIR:
+            return
+        log.finish(end, self._battle_snapshot(self.state))
+        try:
+            path = replay.save(log, GameSettings.BATTLE_REPLAY_DIR, GameSettings.BATTLE_REPLAY_KEEP)
+        except OSError as e:
+            Logger.warning(f"Failed to save battle replay: {e}")
+        else:
+            Logger.info(f"Battle replay saved to {path}")
+
     # checkpoint 3-4: 經驗值結算
     def _handle_victory(self):
         """處理勝利後的經驗值結算"""
@@ -362,8 +434,11 @@ class BattleScene(Scene):
 
         self.log_text = f"You defeated {self.enemy.name}!"
         
-        # 計算經驗值: 敵人等級 * 基礎經驗
-        exp_gain = self.enemy.level * 10 
+        # 計算經驗值: 敵人等級 * 基礎經驗; 場上這隻 (打倒或捕捉) 加上訓練家之前倒下的每一隻
+        exp_gain = rules.exp_reward(self.enemy.level) + sum(
+            rules.exp_reward(m.get("level", 1)) for i, m in enumerate(self.enemy_team)
+            if i != self.enemy_index and m.get("hp", 1) <= 0
+        )
         logs = self.player.gain_exp(exp_gain)
 
         self.message_queue.extend(logs) # 將紀錄加入佇列
@@ -394,8 +469,8 @@ class BattleScene(Scene):
 
     ## 戰鬥結束處理 (資料回寫) ##
     def _end_battle(self):
-        if self.player and self.player.data:
-            self.player.data["hp"] = self.player.hp
+        if self.player:
+            self.player.sync()
             Logger.info(f"Battle ended. HP saved: {self.player.hp}")
         scene_manager.change_scene("game")
 
@@ -414,6 +489,7 @@ class BattleScene(Scene):
             return
 
         # 執行具體效果
+        self._record(Action(item_name))
         success_msg = effect_callback()
         
         # 扣除道具
@@ -425,8 +501,7 @@ class BattleScene(Scene):
         
         # 設定訊息並切換回合
         self.log_text = success_msg
-        self.state = BattleState.ENEMY_TURN
-        self.turn_timer = 0
+        self._begin_enemy_turn()
         
         # 使用完道具後，讓 dashboard 回到主選單
         self.dashboard.back_to_main()
\ No newline at end of file
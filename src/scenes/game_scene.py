@@ -1,11 +1,11 @@
 import pygame as pg
 import threading
 import time
-import random
 from src.utils import BattleType
 
 from src.scenes.scene import Scene
 from src.core import GameManager, OnlineManager
+from src.core.managers.save_journal import SaveJournal
 from src.utils import Logger, PositionCamera, GameSettings, Position
 from src.core.services import sound_manager
 from src.sprites import Sprite
@@ -20,8 +20,7 @@ from src.interface.windows.setting_window import SettingWindow
 from src.interface.windows.shop_window import ShopWindow
 from src.interface.windows.navigation_window import NavigationWindow
 
-from src.entities.entity import Entity
-from src.utils import Direction
+from src.entities.remote_player_manager import RemotePlayerManager
 from src.interface.components.chat_overlay import ChatOverlay
 
 class GameScene(Scene):
@@ -56,11 +55,14 @@ class GameScene(Scene):
     def __init__(self):
         super().__init__()
         # Game Manager
-        manager = GameManager.load("saves/game0.json")
+        manager = GameManager.load(GameSettings.SAVE_PATH, recover=True)
         if manager is None:
             Logger.error("Failed to load game manager")
             exit(1)
         self.game_manager = manager
+        # 自動存檔日誌: 每幾秒只記下變化, 當機後下次啟動時套用 (save_journal.py)
+        self.journal = SaveJournal(GameSettings.SAVE_PATH)
+        self.journal.attach(self.game_manager)
 
         self._chat_bubbles = {}
         self._last_chat_id_seen = 0
@@ -77,7 +79,7 @@ class GameScene(Scene):
             )
         else:
             self.online_manager = None
-        self.remote_players: dict[int, Entity] = {} # 存 id 對應的 Entity
+        self.remote_players = RemotePlayerManager(self.game_manager) # 其他線上玩家的 Entity
         
         ## 字型
         self.font_title = pg.font.Font("././assets/fonts/Pokemon Solid.ttf", 30)
@@ -142,16 +144,16 @@ class GameScene(Scene):
         self.shop_window = ShopWindow(self.game_manager, self.font_title, self.font_bag)
         ## check point 3-5: 初始化小地圖 ##
         self.minimap = Minimap(self.game_manager, self.font_item)
-        ## 初始化等級限制表
-        self.min_level_requirements = self._generate_min_levels()
 
 
     ## 當 SettingWindow 讀取存檔後，會呼叫此函式來更新所有場景中的參照 ##
     def on_game_reload(self, new_manager: GameManager):
         self.game_manager = new_manager
+        self.remote_players.game_manager = new_manager
         self.menu_window.game_manager = new_manager
         self.bag_window.game_manager = new_manager
         self.shop_window.game_manager = new_manager
+        self.journal.attach(new_manager)
         Logger.info("GameScene reference updated successfully.")
 
     # 檢查背包中是否有任何怪獸 HP > 0
@@ -185,6 +187,8 @@ class GameScene(Scene):
             self.log_timer -= dt
             if self.log_timer <= 0:
                 self.log_text = ""
+
+        self.journal.update(dt, self.game_manager)
         
         if self.menu_window.is_open:
             self.menu_window.update(dt)
@@ -222,10 +226,10 @@ class GameScene(Scene):
                 
                 # 檢查是否踩在草叢上，縮小判定範圍
                 hitbox = player.animation.rect.inflate(-10, -10)
-                in_grass = self.game_manager.current_map.check_in_grass(hitbox)
+                grass_area = self.game_manager.current_map.grass_area_at(hitbox)
 
                 # 在草叢上且按下空白鍵
-                if in_grass and input_manager.key_pressed(pg.K_SPACE):
+                if grass_area is not None and input_manager.key_pressed(pg.K_SPACE):
                     Logger.info("Wild Monster Encountered!")
 
                     if not self.check_team_alive():
@@ -233,30 +237,11 @@ class GameScene(Scene):
                         self.log_timer = 1.0
                         return
                     
-                    # 隨機生成遭遇等級
-                    encounter_level = random.randint(2, 40)
-                    # 篩選怪獸
-                    valid_monsters = []
-                    db = self.game_manager.monster_database
-                    
-                    for name in db.keys():
-                        # 從快取表中讀取該怪獸的最低等級
-                        required_lv = self.min_level_requirements.get(name, 1)
-                        # 遭遇等級必須 >= 該怪獸的最低需求
-                        if encounter_level >= required_lv:
-                            valid_monsters.append(name)
-
-                    if not valid_monsters:
-                        valid_monsters = list(db.keys())
-
-                    # 生成怪獸
-                    species = random.choice(valid_monsters)
-                    enemy_data = db[species].copy()
-                    
-                    enemy_data["level"] = encounter_level
-                    
-                    if "current_hp" in enemy_data: del enemy_data["current_hp"]
-                    if "hp" in enemy_data: del enemy_data["hp"]
+                    # 從這塊草叢的遭遇表抽出物種與等級 (src/data/encounters.py)
+                    enemy_data = self.game_manager.encounters.roll(grass_area)
+                    if enemy_data is None:
+                        Logger.warning("No species to encounter in this area")
+                        return
 
                     battle_scene = scene_manager._scenes["battle"]    
                     battle_scene.setup_battle(
@@ -288,17 +273,21 @@ class GameScene(Scene):
                         return
                     Logger.info(f"Fighting against {trainer_data['name']}")
 
-                    first_monster_info = trainer_data["team"][0]
-                    base_monster_data = self.game_manager.monster_database.get(first_monster_info["name"])
-
-                    battle_monster_data = base_monster_data.copy()
-                    battle_monster_data["level"] = first_monster_info["level"]
+                    # 預設只派第一隻; BATTLE_TRAINER_TEAMS 時整隊上場, 敵方 AI 可以換怪、用 trainers.json 的 "items"
+                    members = trainer_data["team"] if GameSettings.BATTLE_TRAINER_TEAMS else trainer_data["team"][:1]
+                    enemy_team = []
+                    for member in members:
+                        battle_monster_data = self.game_manager.monster_database.get(member["name"]).copy()
+                        battle_monster_data["level"] = member["level"]
+                        enemy_team.append(battle_monster_data)
 
                     battle_scene = scene_manager._scenes["battle"]    
                     battle_scene.setup_battle(
                         self.game_manager, 
-                        battle_monster_data,
-                        BattleType.TRAINER
+                        enemy_team[0],
+                        BattleType.TRAINER,
+                        enemy_team=enemy_team,
+                        enemy_items=trainer_data.get("items") if GameSettings.BATTLE_TRAINER_TEAMS else None,
                     )
                     scene_manager.change_scene("battle")
                     return
@@ -350,6 +339,12 @@ class GameScene(Scene):
             if self.game_manager.player is not None and self.online_manager is not None:
                 player = self.game_manager.player
 
+                # 伺服器拒絕了移動 (太快 / 穿牆 / 傳送)，拉回伺服器認可的位置;
+                # 傳送被拒絕時伺服器認可的是原本的地圖, 要一起換回去, 否則之後每次更新都會被拒絕
+                correction = self.online_manager.pop_position_correction()
+                if correction:
+                    self.game_manager.place_player(correction["map"], correction["x"], correction["y"])
+
                 dir_str = player.direction.name.lower()
                 is_moving = player.dis.x != 0 or player.dis.y != 0
 
@@ -363,53 +358,12 @@ class GameScene(Scene):
 
             # checkpoint 3-3: 同步其他玩家
             if self.online_manager:
-                list_online = self.online_manager.get_list_players()
-                current_map_name = self.game_manager.current_map.path_name
-                valid_ids = set() # 記錄這幀還在的玩家
-
-                for p_data in list_online:
-                    # 只處理同一張地圖的玩家
-                    if p_data["map"] != current_map_name:
-                        continue
-                    
-                    pid = p_data["id"]
-                    valid_ids.add(pid)
-
-                    # 若是新玩家就創建一個 Entity
-                    if pid not in self.remote_players:
-                        self.remote_players[pid] = Entity(
-                            p_data["x"], p_data["y"], self.game_manager, "character/ow1.png"
-                        )
-                    
-                    # 取得該玩家的 Entity
-                    remote_ent = self.remote_players[pid]
-                    
-                    # 同步位置
-                    remote_ent.position.x = p_data["x"]
-                    remote_ent.position.y = p_data["y"]
-                    
-                    # 同步方向 (將字串轉回 Enum)
-                    d_str = p_data.get("direction", "down")
-                    if d_str == "up": remote_ent.direction = Direction.UP
-                    elif d_str == "down": remote_ent.direction = Direction.DOWN
-                    elif d_str == "left": remote_ent.direction = Direction.LEFT
-                    elif d_str == "right": remote_ent.direction = Direction.RIGHT
-                    
-                    # 同步動畫狀態
-                    remote_is_moving = p_data.get("is_moving", False)
-                    if remote_is_moving:
-                        remote_ent.update(dt) # 移動: 正常更新動畫
-                    else:
-                        remote_ent.update(0)  # 靜止: 只更新方向
-                        remote_ent.animation.accumulator = 0 # 強制重置為第一幀 (站立姿勢)
-
-                # 清除已經離開或切換地圖的玩家
-                for pid in list(self.remote_players.keys()):
-                    if pid not in valid_ids:
-                        del self.remote_players[pid]
-
+                self.remote_players.sync(
+                    self.online_manager.players_snapshot,
+                    self.game_manager.current_map.path_name,
+                    dt
+                )
 
-        
     @override
     def draw(self, screen: pg.Surface):        
         if self.game_manager.player:
@@ -440,14 +394,8 @@ class GameScene(Scene):
         self.game_manager.bag.draw(screen)
         
         if self.online_manager and self.game_manager.player:
-            list_online = self.online_manager.get_list_players()
-            for player in list_online:
-                if player["map"] == self.game_manager.current_map.path_name:
-                    camera = self.game_manager.player.camera
-
-                    # checkpoint 3-3: 繪製其他線上玩家
-                    for entity in self.remote_players.values():
-                        entity.draw(screen, camera)
+            # checkpoint 3-3: 繪製其他線上玩家 (每人一次，畫面外的跳過)
+            self.remote_players.draw(screen, camera)
             try:
                 # checkpoint 3-3: 繪製對話
                 self._draw_chat_bubbles(screen, camera)
@@ -515,8 +463,8 @@ class GameScene(Scene):
                 continue
             
             # 從 remote_players 找到該玩家的 Entity
-            if pid in self.remote_players:
-                remote_ent = self.remote_players[pid]
+            remote_ent = self.remote_players.get(pid)
+            if remote_ent is not None:
                 self._draw_chat_bubble_for_pos(
                     screen, camera, 
                     remote_ent.position, 
@@ -604,25 +552,3 @@ class GameScene(Scene):
             3. Measure the rendered text to determine bubble size.
             Add padding around the text.
         """
-
-    def _generate_min_levels(self) -> dict[str, int]:
-        """從資料庫解析怪獸的最低出現等級"""
-        db = self.game_manager.monster_database
-        min_levels = {name: 1 for name in db.keys()}
-        
-        # 遍歷資料庫尋找進化關係
-        for name, data in db.items():
-            evo_data = data.get("evolution")
-            
-            # 如果這隻怪獸有進化資訊
-            if evo_data:
-                next_id = evo_data.get("next_id")
-                level_req = evo_data.get("level")
-                
-                # 更新下一階怪獸的最低等級限制
-                if next_id and level_req:
-                    # 如果資料庫裡有這隻怪獸，就更新它的最低等級
-                    if next_id in min_levels:
-                        min_levels[next_id] = level_req
-                        
-        return min_levels
\ No newline at end of file
@@ -12,6 +12,14 @@ class Sprite:
         if size is not None:
             self.image = pg.transform.scale(self.image, size)
         self.rect = self.image.get_rect()
+
+    @classmethod
+    def from_image(cls, image: pg.Surface) -> "Sprite":
+        """A sprite for an image that is already loaded (e.g. cached by resource_manager)"""
+        sprite = cls.__new__(cls)
+        sprite.image = image
+        sprite.rect = image.get_rect()
+        return sprite
         
     def update(self, dt: float):
         pass
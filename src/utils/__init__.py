@@ -4,6 +4,7 @@ from .logger import Logger
 from .settings import GameSettings
 from .loader import load_tmx, load_img, load_font, load_sound
 from .definition import Position, PositionCamera, Direction, MouseBtn, Key, Teleport
+from .codec import JsonCodec, get_codec
 
 __all__ = [
     "Logger",
@@ -18,6 +19,8 @@ __all__ = [
     "MouseBtn",
     "Key",
     "Teleport",
+    "JsonCodec",
+    "get_codec",
 ]
 
 from enum import Enum
@@ -0,0 +1,46 @@
+import json
+from dataclasses import dataclass
+from typing import Any, Callable
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+@dataclass(frozen=True)
+class JsonCodec:
+    '''
+    JSON loads / dumps 的組合，讓線上模式可以換成比較快的函式庫
+    - orjson / ujson 有安裝就用，沒有就用標準庫 json
+    - 解析錯誤都是 ValueError 的子類別 (json.JSONDecodeError 也是)，用 except ValueError 接
+    '''
+    name: str
+    loads: Callable[[str | bytes], Any]
+    dumps: Callable[[Any], str]
+
+
+def _orjson_dumps(obj: Any) -> str:
+    return orjson.dumps(obj).decode()
+
+
+CODECS: dict[str, JsonCodec] = {}
+if orjson is not None:
+    CODECS["orjson"] = JsonCodec("orjson", orjson.loads, _orjson_dumps)
+if ujson is not None:
+    CODECS["ujson"] = JsonCodec("ujson", ujson.loads, ujson.dumps)
+CODECS["json"] = JsonCodec("json", json.loads, json.dumps)
+
+
+def get_codec(name: str | None = None) -> JsonCodec:
+    """指定名稱的 codec，沒指定就用已安裝中最快的"""
+    if name is None:
+        return next(iter(CODECS.values()))
+    if name not in CODECS:
+        raise ValueError(f"JSON codec {name!r} is not available (installed: {', '.join(CODECS)})")
+    return CODECS[name]
@@ -0,0 +1,129 @@
+import json
+import os
+import struct
+import sys
+import zlib
+from typing import Any
+
+from .codec import get_codec
+
+'''
+存檔格式: 副檔名 .json 是原本的 JSON (indent=2, 方便手動修改),
+.sav 是二進位格式, 讀檔時看開頭的 MAGIC 判斷, 與副檔名無關。
+
+二進位格式 (little endian):
+    header : MAGIC (4s) | VERSION (H) | 區段數 (H)
+    區段   : 名稱長度 (B) | 名稱 (utf-8) | 原始長度 (I) | 壓縮後長度 (I) | crc32 (I) | zlib 壓縮的 JSON
+每個最上層欄位 (map / current_map / player / bag) 各是一個區段, 各自有 crc32,
+讀不懂的區段名稱會直接帶回 dict, 新版本加欄位不會讓舊版讀不到其他資料。
+
+轉換: python -m src.utils.save_format saves/game0.json saves/game0.sav
+'''
+
+MAGIC = b"MGSV"
+VERSION = 1
+BINARY_SUFFIX = ".sav"
+COMPRESS_LEVEL = 6
+
+_HEADER = struct.Struct("<4sHH")
+_SECTION = struct.Struct("<III")
+
+
+class SaveFormatError(ValueError):
+    '''存檔是空的、被截斷或 checksum 不符'''
+
+
+def is_binary_path(path: str) -> bool:
+    return path.endswith(BINARY_SUFFIX)
+
+
+def encode(data: dict[str, Any]) -> bytes:
+    codec = get_codec()
+    parts = [_HEADER.pack(MAGIC, VERSION, len(data))]
+    for key, value in data.items():
+        name = key.encode("utf-8")
+        raw = codec.dumps(value).encode("utf-8")
+        packed = zlib.compress(raw, COMPRESS_LEVEL)
+        parts.append(bytes((len(name),)) + name)
+        parts.append(_SECTION.pack(len(raw), len(packed), zlib.crc32(raw)))
+        parts.append(packed)
+    return b"".join(parts)
+
+
+def decode(blob: bytes) -> dict[str, Any]:
+    if len(blob) < _HEADER.size:
+        raise SaveFormatError("Truncated header")
+    magic, version, count = _HEADER.unpack_from(blob)
+    if magic != MAGIC:
+        raise SaveFormatError("Not a binary save")
+    if version > VERSION:
+        raise SaveFormatError(f"Save version {version} is newer than supported ({VERSION})")
+
+    codec = get_codec()
+    view = memoryview(blob)
+    data: dict[str, Any] = {}
+    pos = _HEADER.size
+    for _ in range(count):
+        try:
+            name_len = blob[pos]
+            name = bytes(view[pos + 1:pos + 1 + name_len]).decode("utf-8")
+            pos += 1 + name_len
+            raw_len, packed_len, crc = _SECTION.unpack_from(blob, pos)
+        except (IndexError, struct.error, UnicodeDecodeError) as e:
+            raise SaveFormatError(f"Truncated section table: {e}") from None
+        pos += _SECTION.size
+        if pos + packed_len > len(blob):
+            raise SaveFormatError(f"Section {name!r} is truncated")
+        try:
+            raw = zlib.decompress(view[pos:pos + packed_len])
+        except zlib.error as e:
+            raise SaveFormatError(f"Section {name!r} is corrupted: {e}") from None
+        if len(raw) != raw_len or zlib.crc32(raw) != crc:
+            raise SaveFormatError(f"Checksum mismatch in section {name!r}")
+        data[name] = codec.loads(raw)
+        pos += packed_len
+    return data
+
+
+def loads(blob: bytes) -> dict[str, Any]:
+    '''二進位或 JSON 存檔都可以; 空檔、格式錯誤都丟 SaveFormatError'''
+    if blob.startswith(MAGIC):
+        return decode(blob)
+    if not blob.strip():
+        raise SaveFormatError("Empty file")
+    try:
+        data = get_codec().loads(blob)
+    except ValueError as e:
+        raise SaveFormatError(f"Invalid JSON: {e}") from None
+    if not isinstance(data, dict):
+        raise SaveFormatError("Save is not a JSON object")
+    return data
+
+
+def dumps(data: dict[str, Any], binary: bool) -> bytes:
+    if binary:
+        return encode(data)
+    return json.dumps(data, indent=2).encode("utf-8")
+
+
+def read_file(path: str) -> dict[str, Any]:
+    '''只讀一次檔案'''
+    with open(path, "rb") as f:
+        return loads(f.read())
+
+
+def convert(src: str, dst: str) -> None:
+    '''依 dst 的副檔名轉成 JSON 或二進位'''
+    data = read_file(src)
+    tmp_path = f"{dst}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(dumps(data, is_binary_path(dst)))
+    os.replace(tmp_path, dst)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("usage: python -m src.utils.save_format <src> <dst>   (.sav = binary, otherwise JSON)")
+        sys.exit(2)
+    convert(sys.argv[1], sys.argv[2])
+    print(f"{sys.argv[1]} ({os.path.getsize(sys.argv[1])} B) -> {sys.argv[2]} ({os.path.getsize(sys.argv[2])} B)")
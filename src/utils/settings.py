@@ -14,8 +14,22 @@ class Settings:
     MAX_CHANNELS: int = 16
     IS_MUTED = False
     AUDIO_VOLUME: float = 0.5   # Volume of audio
+    # Save
+    SAVE_PATH: str = "saves/game0.json"  # .sav = binary save (src/utils/save_format.py)
+    AUTOSAVE_INTERVAL: float = 5.0      # seconds between autosave journal entries (0 = off)
+    AUTOSAVE_COMPACT_ENTRIES: int = 200 # full save after this many journal entries
+    # Wild encounters
+    ENCOUNTER_SEED: int | None = None   # fixed seed = reproducible encounters (src/data/encounters.py)
+    # Battle
+    BATTLE_AI: str = "attack"           # enemy AI: "attack" | "expectimax" (src/battle/ai.py)
+    BATTLE_AI_TIME_BUDGET: float = 0.25 # seconds of search per enemy turn, less than BattleScene.TURN_DELAY_ATTACK
+    BATTLE_AI_THREAD: bool = False      # search on a worker thread instead of a slice of every frame
+    BATTLE_TRAINER_TEAMS: bool = False  # trainers bring their whole team and trainers.json "items", not only the first monster
+    BATTLE_REPLAY_DIR: str | None = "saves/replays"  # every battle is recorded here (src/battle/replay.py), None = off
+    BATTLE_REPLAY_KEEP: int = 20        # only the newest replays are kept
     # Online
     IS_ONLINE: bool = True
     ONLINE_SERVER_URL: str = "http://localhost:8989"
+    ONLINE_COMPRESSION: bool = True  # permessage-deflate (server/compression.py)
     
 GameSettings = Settings()
\ No newline at end of file